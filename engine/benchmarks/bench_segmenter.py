@@ -0,0 +1,104 @@
+"""
+Frame-size scaling benchmark for pipeline.segment_image
+
+Compares the array-level segmenter with the original per-row/per-column Python
+loops (kept here as the reference implementation), checks that both produce
+the same regions, and prints one JSON line per resolution.
+
+Usage (from engine/):
+    python3 benchmarks/bench_segmenter.py [--repeat N]
+"""
+
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+
+from synthetic import RESOLUTIONS, make_screenshot
+
+from pipeline import segment_image
+
+
+def segment_image_reference(image: np.ndarray):
+    """The original loop-based segmenter"""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    _, bw = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    h, w = bw.shape
+
+    horizontal_sum = np.sum(bw > 0, axis=1)
+    band_threshold = 0.02 * w
+    bands, in_band, start = [], False, 0
+    for y, val in enumerate(horizontal_sum):
+        if val > band_threshold and not in_band:
+            start, in_band = y, True
+        elif val <= band_threshold and in_band:
+            if y - start > 12:
+                bands.append((start, y))
+            in_band = False
+    if in_band:
+        bands.append((start, h))
+
+    regions = []
+    for y1, y2 in bands:
+        vertical_sum = np.sum(bw[y1:y2, :] > 0, axis=0)
+        col_threshold = 0.01 * (y2 - y1)
+        in_block, x_start = False, 0
+        for x, val in enumerate(vertical_sum):
+            if val > col_threshold and not in_block:
+                x_start, in_block = x, True
+            elif val <= col_threshold and in_block:
+                if x - x_start > 15:
+                    regions.append({"x": x_start, "y": y1, "w": x - x_start, "h": y2 - y1})
+                in_block = False
+        if in_block:
+            regions.append({"x": x_start, "y": y1, "w": w - x_start, "h": y2 - y1})
+
+    merged = []
+    regions.sort(key=lambda r: (r["y"], r["x"]))
+    for r in regions:
+        if not merged:
+            merged.append(r)
+            continue
+        prev = merged[-1]
+        if abs(prev["y"] - r["y"]) < 10 and r["x"] - (prev["x"] + prev["w"]) < 15:
+            prev["w"] = (r["x"] + r["w"]) - prev["x"]
+            prev["h"] = max(prev["h"], r["h"])
+        else:
+            merged.append(r)
+    return merged
+
+
+def best_of(fn, image, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(image)
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for name, (width, height) in RESOLUTIONS.items():
+        image = make_screenshot(width, height)
+        reference_s, expected = best_of(segment_image_reference, image, args.repeat)
+        vectorized_s, actual = best_of(segment_image, image, args.repeat)
+
+        print(json.dumps({
+            "resolution": name,
+            "pixels": width * height,
+            "regions": len(actual),
+            "matches_reference": actual == expected,
+            "reference_ms": round(reference_s * 1000, 2),
+            "vectorized_ms": round(vectorized_s * 1000, 2),
+            "speedup": round(reference_s / vectorized_s, 1),
+        }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Cold-start benchmark for screenshot_pipeline.py
+
+Times a fresh process from spawn to its first result, the way the TypeScript
+side runs it, in three setups:
+
+- help: ``--help`` only (interpreter plus the script's own imports)
+- cold: a one-shot run that imports and warms everything itself
+- zygote: ``--connect`` to a warm ``--zygote`` process that forks a child per job
+
+Each run uses ``--stream``. ``first_ms`` is the time to the first segment line
+and ``total_ms`` is the time until the process exits. Time-to-first-result
+for the zygote is its median ``first_ms``, which covers the client's startup,
+segmentation and OCR of one segment. It must stay within ``--budget-ms``; if
+it does not, the script exits with status 1. The OCR cache is disabled so
+every run does real OCR. Needs the ``tesseract`` binary.
+
+Usage (from engine/):
+    python3 benchmarks/bench_startup.py [--repeat N] [--budget-ms MS]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+from synthetic import RESOLUTIONS, make_screenshot
+
+from pipelines.worker import request_unix_socket
+
+SCRIPT = Path(__file__).resolve().parent.parent / "src" / "pipelines" / "screenshot_pipeline.py"
+
+# Time-to-first-result budget for a job handed to a warm zygote
+DEFAULT_BUDGET_MS = 1000.0
+
+
+def time_run(args: List[str], env: Dict[str, str]) -> Dict[str, float]:
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, str(SCRIPT), *args], env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    first = proc.stdout.readline()
+    first_ms = (time.perf_counter() - started) * 1000
+    proc.stdout.read()
+    if proc.wait() != 0 or not first:
+        raise RuntimeError(f"screenshot_pipeline.py {' '.join(args)} failed")
+    return {"first_ms": first_ms, "total_ms": (time.perf_counter() - started) * 1000}
+
+
+def summarize(setup: str, runs: List[Dict[str, float]]) -> Dict:
+    out: Dict = {"setup": setup, "runs": len(runs)}
+    for key in ("first_ms", "total_ms"):
+        values = [run[key] for run in runs]
+        out[f"{key[:-3]}_min_ms"] = round(min(values), 2)
+        out[f"{key[:-3]}_p50_ms"] = round(float(np.median(values)), 2)
+    return out
+
+
+def wait_for_zygote(socket_path: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            request_unix_socket(socket_path, {"id": 0, "op": "ping"})
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("Zygote did not start listening")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--resolution", choices=list(RESOLUTIONS), default="1080p")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    args = parser.parse_args()
+
+    if shutil.which("tesseract") is None:
+        sys.exit("bench_startup needs the tesseract binary")
+
+    env = dict(os.environ, OCR_CACHE="0")
+    with tempfile.TemporaryDirectory() as tmp:
+        image = str(Path(tmp) / "frame.png")
+        cv2.imwrite(image, make_screenshot(*RESOLUTIONS[args.resolution]))
+        socket_path = str(Path(tmp) / "zygote.sock")
+
+        results = [
+            summarize("help", [time_run(["--help"], env) for _ in range(args.repeat)]),
+            summarize("cold", [time_run([image, "--stream"], env) for _ in range(args.repeat)]),
+        ]
+
+        zygote = subprocess.Popen([sys.executable, str(SCRIPT), "--zygote", socket_path],
+                                  env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_for_zygote(socket_path)
+            results.append(summarize("zygote", [
+                time_run(["--connect", socket_path, image, "--stream"], env)
+                for _ in range(args.repeat)
+            ]))
+        finally:
+            request_unix_socket(socket_path, {"id": 0, "op": "shutdown"})
+            zygote.wait(timeout=10)
+
+    for result in results:
+        print(json.dumps(result))
+
+    zygote_ms = results[-1]["first_p50_ms"]
+    within = zygote_ms <= args.budget_ms
+    print(json.dumps({"budget_ms": args.budget_ms, "zygote_first_p50_ms": zygote_ms,
+                      "within_budget": within}))
+    if not within:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
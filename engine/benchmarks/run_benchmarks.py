@@ -0,0 +1,292 @@
+"""
+Offline benchmark suite for the four screenshot -> text pipelines
+
+Runs every pipeline, and each of its stages, on synthetic screenshots at
+several resolutions and text densities. Reports latency percentiles,
+throughput and peak memory as JSON so runs can be diffed between versions.
+
+Usage (from engine/):
+    python3 benchmarks/run_benchmarks.py --output results.json
+    python3 benchmarks/run_benchmarks.py --resolutions 1080p 4k --densities dense
+    python3 benchmarks/run_benchmarks.py --compare baseline.json --tolerance 0.15
+
+OCR stages need the ``tesseract`` binary; without it (or with --no-ocr) they
+are reported as skipped. The OCR cache is disabled so repeats do real work.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+os.environ["OCR_CACHE"] = "0"
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from synthetic import DENSITIES, RESOLUTIONS, make_screenshot
+
+import pipeline as llm_context_pipeline
+import segmentor
+from pipelines import screenshot_pipeline
+from vision_pipeline import ScreenshotSegmentationPipeline
+
+ENGINE_DIR = Path(__file__).resolve().parent.parent
+
+
+class Stage:
+    """One measurable step: `run` gets the prepared inputs and returns the next stage's input"""
+
+    def __init__(self, pipeline: str, name: str, run: Callable, needs_ocr: bool = False):
+        self.pipeline = pipeline
+        self.name = name
+        self.run = run
+        self.needs_ocr = needs_ocr
+
+
+def build_stages(frame_path: str) -> List[Stage]:
+    """
+    Stages for every pipeline; each takes the decoded BGR frame
+
+    Intermediate inputs are computed once up front so a stage is timed alone.
+    """
+    vision = ScreenshotSegmentationPipeline(enable_preprocessing=True)
+    vision_fast = ScreenshotSegmentationPipeline(preprocess_profile="fast")
+    vision_adaptive = ScreenshotSegmentationPipeline(preprocess_profile="adaptive")
+    bgr = cv2.imread(frame_path)
+    pil = Image.open(frame_path)
+    pil.load()
+
+    processed = vision.preprocess_image(pil)
+    mask = screenshot_pipeline.preprocess(bgr)
+    boxes = screenshot_pipeline.sort_boxes_reading_order(
+        screenshot_pipeline.find_segments(mask, bgr))
+    regions = llm_context_pipeline.segment_image(bgr)
+    seg_mask = segmentor.preprocess(bgr)
+
+    stages = [
+        # vision_pipeline.ScreenshotSegmentationPipeline
+        Stage("vision_pipeline", "preprocess", lambda: vision.preprocess_image(pil)),
+        Stage("vision_pipeline", "preprocess_fast", lambda: vision_fast.preprocess_image(pil)),
+        Stage("vision_pipeline", "preprocess_adaptive",
+              lambda: vision_adaptive.preprocess_image(pil)),
+        Stage("vision_pipeline", "segment_layout", lambda: vision.segment_layout(pil)),
+        Stage("vision_pipeline", "extract_text_regions",
+              lambda: vision.extract_text_regions(processed), needs_ocr=True),
+        Stage("vision_pipeline", "total", lambda: vision.process(frame_path), needs_ocr=True),
+
+        # pipelines/screenshot_pipeline.py
+        Stage("screenshot_pipeline", "preprocess", lambda: screenshot_pipeline.preprocess(bgr)),
+        Stage("screenshot_pipeline", "preprocess_tiled",
+              lambda: screenshot_pipeline.preprocess_tiled(bgr)),
+        Stage("screenshot_pipeline", "find_segments",
+              lambda: screenshot_pipeline.find_segments(mask, bgr)),
+        Stage("screenshot_pipeline", "ocr",
+              lambda: screenshot_pipeline.run_ocr(screenshot_pipeline.crop_segments(bgr, boxes)),
+              needs_ocr=True),
+        Stage("screenshot_pipeline", "total",
+              lambda: screenshot_pipeline.process_image(cv2.imread(frame_path)), needs_ocr=True),
+
+        # pipeline.build_llm_context
+        Stage("build_llm_context", "segment_image",
+              lambda: llm_context_pipeline.segment_image(bgr, tiled="never")),
+        Stage("build_llm_context", "segment_image_tiled",
+              lambda: llm_context_pipeline.segment_image(bgr, tiled="always")),
+        Stage("build_llm_context", "ocr_regions",
+              lambda: llm_context_pipeline.ocr_regions(bgr, regions), needs_ocr=True),
+        Stage("build_llm_context", "total",
+              lambda: llm_context_pipeline.build_llm_context(frame_path), needs_ocr=True),
+
+        # segmentor.py (segmentation only, no OCR)
+        Stage("segmentor", "preprocess", lambda: segmentor.preprocess(bgr)),
+        Stage("segmentor", "find_segments", lambda: segmentor.find_segments(seg_mask, bgr)),
+        Stage("segmentor", "total", lambda: segmentor.sort_boxes_reading_order(
+            segmentor.find_segments(segmentor.preprocess(cv2.imread(frame_path)),
+                                    cv2.imread(frame_path)))),
+    ]
+    return stages
+
+
+def measure(run: Callable, warmup: int, repeat: int) -> Dict[str, float]:
+    for _ in range(warmup):
+        run()
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+
+    # Separate run for memory: tracemalloc slows allocation-heavy code down
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    ms = np.array(timings) * 1000
+    mean_s = float(np.mean(timings))
+    return {
+        "runs": repeat,
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p90_ms": round(float(np.percentile(ms, 90)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "min_ms": round(float(ms.min()), 3),
+        "max_ms": round(float(ms.max()), 3),
+        "throughput_fps": round(1 / mean_s, 3) if mean_s else None,
+        "peak_alloc_bytes": peak,
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ENGINE_DIR, check=True,
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> Dict:
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "tesseract": shutil.which("tesseract"),
+        "ocr_engine": os.environ.get("OCR_ENGINE", "auto"),
+        "ocr_mode": os.environ.get("OCR_MODE", "crops"),
+    }
+
+
+def run_suite(args) -> Dict:
+    has_ocr = not args.no_ocr and shutil.which("tesseract") is not None
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for res_name in args.resolutions:
+            width, height = RESOLUTIONS[res_name]
+            for density_name in args.densities:
+                frame = make_screenshot(width, height, DENSITIES[density_name], seed=args.seed)
+                frame_path = os.path.join(tmp, f"{res_name}-{density_name}.png")
+                cv2.imwrite(frame_path, frame)
+
+                for stage in build_stages(frame_path):
+                    if args.pipelines and stage.pipeline not in args.pipelines:
+                        continue
+
+                    entry = {
+                        "pipeline": stage.pipeline,
+                        "stage": stage.name,
+                        "resolution": res_name,
+                        "density": density_name,
+                        "megapixels": round(width * height / 1e6, 2),
+                    }
+                    if stage.needs_ocr and not has_ocr:
+                        entry["skipped"] = "tesseract unavailable" if not args.no_ocr else "--no-ocr"
+                    else:
+                        entry.update(measure(stage.run, args.warmup, args.repeat))
+                        entry["megapixels_per_s"] = round(
+                            entry["megapixels"] * entry["throughput_fps"], 3)
+                    results.append(entry)
+                    print(f"{stage.pipeline:>20} {stage.name:<22} {res_name:>6} {density_name:<7}"
+                          f" {entry.get('p50_ms', entry.get('skipped'))}", file=sys.stderr)
+
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        max_rss *= 1024
+
+    return {
+        "environment": environment(),
+        "settings": {
+            "warmup": args.warmup,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "peak_rss_bytes": max_rss,
+        "results": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[Dict]:
+    """Entries whose p50 latency got worse than baseline by more than `tolerance`"""
+    def key(entry):
+        return (entry["pipeline"], entry["stage"], entry["resolution"], entry["density"])
+
+    previous = {key(e): e for e in baseline["results"] if "p50_ms" in e}
+    regressions = []
+    for entry in current["results"]:
+        before = previous.get(key(entry))
+        if before is None or "p50_ms" not in entry:
+            continue
+        ratio = entry["p50_ms"] / before["p50_ms"] if before["p50_ms"] else 1.0
+        if ratio > 1 + tolerance:
+            regressions.append({
+                "pipeline": entry["pipeline"],
+                "stage": entry["stage"],
+                "resolution": entry["resolution"],
+                "density": entry["density"],
+                "baseline_p50_ms": before["p50_ms"],
+                "p50_ms": entry["p50_ms"],
+                "ratio": round(ratio, 3),
+            })
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the screenshot-to-text pipelines")
+    parser.add_argument("--resolutions", nargs="+", choices=list(RESOLUTIONS),
+                        default=list(RESOLUTIONS))
+    parser.add_argument("--densities", nargs="+", choices=list(DENSITIES),
+                        default=list(DENSITIES))
+    parser.add_argument("--pipelines", nargs="+",
+                        choices=["vision_pipeline", "screenshot_pipeline",
+                                 "build_llm_context", "segmentor"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-ocr", action="store_true", help="skip stages that run tesseract")
+    parser.add_argument("--output", metavar="PATH", help="write JSON here instead of stdout")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="fail if p50 latency regressed against this earlier result file")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="allowed p50 slowdown for --compare (0.1 = 10%%)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    report = run_suite(args)
+
+    exit_code = 0
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        report["regressions"] = compare(report, baseline, args.tolerance)
+        exit_code = 1 if report["regressions"] else 0
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
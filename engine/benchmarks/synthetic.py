@@ -0,0 +1,82 @@
+"""
+Synthetic UI-like screenshots for offline benchmarks
+
+Frames are drawn with OpenCV from a fixed seed, so every run sees the same
+pixels: a title bar, a sidebar of menu items, and a main area of text lines.
+`density` (0-1) controls how much of the main area is covered by text.
+"""
+
+import sys
+from pathlib import Path
+from typing import Dict, Tuple
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+RESOLUTIONS: Dict[str, Tuple[int, int]] = {
+    "1080p": (1920, 1080),
+    "1440p": (2560, 1440),
+    "4k": (3840, 2160),
+    "5k": (5120, 2880),
+}
+
+WORDS = (
+    "file edit view help settings profile submit cancel save delete search "
+    "inbox draft project commit branch merge review deploy status report "
+    "meeting calendar notes budget invoice customer order shipping"
+).split()
+
+
+DENSITIES: Dict[str, float] = {
+    "sparse": 0.2,
+    "normal": 0.5,
+    "dense": 0.9,
+}
+
+
+def make_screenshot(width: int, height: int, density: float = 0.5, seed: int = 0) -> np.ndarray:
+    """Draw a BGR frame with a header, sidebar and body text scaled to the frame size"""
+    rng = np.random.default_rng(seed)
+    img = np.full((height, width, 3), 250, dtype=np.uint8)
+
+    scale = height / 1080
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    font_scale = 0.6 * scale
+    thickness = max(1, int(round(1.5 * scale)))
+    line_height = int(34 * scale)
+
+    # Title bar
+    header_h = int(60 * scale)
+    cv2.rectangle(img, (0, 0), (width, header_h), (60, 60, 60), -1)
+    cv2.putText(img, "File  Edit  View  Help", (int(20 * scale), int(40 * scale)),
+                font, font_scale, (255, 255, 255), thickness, cv2.LINE_AA)
+
+    # Sidebar
+    sidebar_w = int(260 * scale)
+    cv2.rectangle(img, (0, header_h), (sidebar_w, height), (235, 235, 235), -1)
+    y = header_h + line_height
+    while y < height - line_height:
+        cv2.putText(img, str(rng.choice(WORDS)).title(), (int(24 * scale), y),
+                    font, font_scale, (40, 40, 40), thickness, cv2.LINE_AA)
+        y += line_height
+
+    # Body text: `density` sets both how many lines are used and how full they are
+    max_words = max(1, int(round(24 * density)))
+    y = header_h + line_height * 2
+    while y < height - line_height:
+        if rng.random() > density:
+            y += line_height
+            continue
+        x = sidebar_w + int(40 * scale)
+        for _ in range(int(rng.integers(1, max_words + 1))):
+            word = str(rng.choice(WORDS))
+            (tw, _), _ = cv2.getTextSize(word, font, font_scale, thickness)
+            if x + tw > width - int(40 * scale):
+                break
+            cv2.putText(img, word, (x, y), font, font_scale, (20, 20, 20), thickness, cv2.LINE_AA)
+            x += tw + int(12 * scale)
+        y += line_height
+
+    return img
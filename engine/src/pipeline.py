@@ -1,151 +1,421 @@
-import cv2
-import numpy as np
-import subprocess
-import tempfile
-import os
-from PIL import Image
-from typing import List, Dict
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Executor
+from contextlib import nullcontext
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Dict, Optional, Tuple
+
+from pipelines.lazy import lazy_import
+
+if TYPE_CHECKING:
+    from pipelines.incremental import IncrementalOcr
+    from pipelines.ingest import FrameSource
+    from pipelines.instrumentation import Instrumentation
+    from pipelines.ocr_cache import OcrCache
+    from pipelines.ocr_engine import OcrConfig, OcrEngine, TimedText
+
+# Imported on first use, so importing this module for its helpers stays cheap
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+aio = lazy_import("pipelines.aio")
+history = lazy_import("pipelines.history")
+ingest = lazy_import("pipelines.ingest")
+merging = lazy_import("pipelines.merging")
+ocr_cache = lazy_import("pipelines.ocr_cache")
+ocr_engine = lazy_import("pipelines.ocr_engine")
+ocr_pool = lazy_import("pipelines.ocr_pool")
+prefilter = lazy_import("pipelines.prefilter")
+tiling = lazy_import("pipelines.tiling")
 
 SCREENSHOT_PATH = "screenshot.png"
 
 
-def segment_image(image: np.ndarray) -> List[Dict]:
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+def _runs(active: np.ndarray, min_length: int):
+    """
+    Start/end indices of the runs of True in a 1-D mask.
+
+    A run is kept if it is longer than `min_length` or reaches the end of the
+    mask (an unterminated run is always kept).
+    """
+    padded = np.concatenate(([False], active, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    starts, ends = edges[0::2], edges[1::2]
+    keep = (ends - starts > min_length) | (ends == len(active))
+    return starts[keep], ends[keep]
+
+
+def _otsu_threshold(hist: np.ndarray) -> int:
+    """
+    Otsu's threshold from a 256-bin histogram, computed the way OpenCV does,
+    so tiled and full-frame binarization agree (short of exact ties between
+    two thresholds, which rounding may break either way)
+    """
+    eps = float(np.finfo(np.float32).eps)
+    counts = hist.astype(np.int64).tolist()
+    scale = 1.0 / sum(counts)
+    mu = 0.0
+    for i, count in enumerate(counts):
+        mu += i * float(count)
+    mu *= scale
+
+    q1, mu1, max_sigma, best = 0.0, 0.0, 0.0, 0
+    for i, count in enumerate(counts):
+        p_i = count * scale
+        mu1 *= q1
+        q1 += p_i
+        q2 = 1.0 - q1
+        if min(q1, q2) < eps or max(q1, q2) > 1.0 - eps:
+            continue
+        mu1 = (mu1 + i * p_i) / q1
+        mu2 = (mu - q1 * mu1) / q2
+        sigma = q1 * q2 * (mu2 - mu1) * (mu2 - mu1)
+        if sigma > max_sigma:
+            max_sigma, best = sigma, i
+    return best
 
-    # Strong binarization tuned for text
-    _, bw = cv2.threshold(
-        gray, 0, 255,
-        cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU
-    )
+
+def _binarize_tiled(image: np.ndarray, tile_size: Optional[int] = None) -> np.ndarray:
+    """
+    Same result as the Otsu threshold below, with grayscale conversion and
+    thresholding done per tile in parallel. Otsu needs the whole frame's
+    histogram, so tiles run in two passes: histogram, then threshold in place.
+    """
+    h, w = image.shape[:2]
+    tiles = tiling.tile_grid(w, h, tile_size or tiling.DEFAULT_TILE_SIZE, overlap=0)
+    workers = ocr_pool.available_cores()
+    bw = np.empty((h, w), dtype=np.uint8)
+
+    def gray_and_hist(crop, tile):
+        x1, y1, x2, y2 = tile.core
+        gray = bw[y1:y2, x1:x2]
+        cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY, dst=gray)
+        return cv2.calcHist([gray], [0], None, [256], [0, 256]).ravel()
+
+    t = _otsu_threshold(np.sum(tiling.map_tiles(gray_and_hist, image, tiles, workers), axis=0))
+    tiling.map_tiles(lambda gray, _: cv2.threshold(gray, t, 255, cv2.THRESH_BINARY_INV, dst=gray),
+              bw, tiles, workers)
+    return bw
+
+
+def segment_image(image: np.ndarray, tiled: str = "auto") -> List[Dict]:
+    """
+    Text blocks as {x, y, w, h} dicts, in reading order.
+    `tiled` ('auto', 'always' or 'never') binarizes large frames tile by tile.
+    """
+    if tiling.should_tile(image.shape[1], image.shape[0], tiled):
+        bw = _binarize_tiled(image)
+    else:
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+        # Strong binarization tuned for text
+        _, bw = cv2.threshold(
+            gray, 0, 255,
+            cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU
+        )
 
     h, w = bw.shape
 
     # --- PASS 1: horizontal text bands ---
-    horizontal_sum = np.sum(bw > 0, axis=1)
+    # bw is 0/255, so row sums / 255 count the filled pixels per row
+    horizontal_sum = cv2.reduce(bw, 1, cv2.REDUCE_SUM, dtype=cv2.CV_32S).ravel() // 255
     band_threshold = 0.02 * w  # % of row filled
 
-    bands = []
-    in_band = False
-    start = 0
-
-    for y, val in enumerate(horizontal_sum):
-        if val > band_threshold and not in_band:
-            start = y
-            in_band = True
-        elif val <= band_threshold and in_band:
-            if y - start > 12:  # minimum text height
-                bands.append((start, y))
-            in_band = False
-
-    if in_band:
-        bands.append((start, h))
+    band_starts, band_ends = _runs(horizontal_sum > band_threshold, 12)  # minimum text height
 
     regions = []
 
     # --- PASS 2: vertical blocks inside bands ---
-    for y1, y2 in bands:
+    for y1, y2 in zip(band_starts.tolist(), band_ends.tolist()):
         band = bw[y1:y2, :]
-        vertical_sum = np.sum(band > 0, axis=0)
+        vertical_sum = cv2.reduce(band, 0, cv2.REDUCE_SUM, dtype=cv2.CV_32S).ravel() // 255
         col_threshold = 0.01 * (y2 - y1)
 
-        in_block = False
-        x_start = 0
-
-        for x, val in enumerate(vertical_sum):
-            if val > col_threshold and not in_block:
-                x_start = x
-                in_block = True
-            elif val <= col_threshold and in_block:
-                if x - x_start > 15:
-                    regions.append({
-                        "x": x_start,
-                        "y": y1,
-                        "w": x - x_start,
-                        "h": y2 - y1
-                    })
-                in_block = False
-
-        if in_block:
+        x_starts, x_ends = _runs(vertical_sum > col_threshold, 15)
+        for x1, x2 in zip(x_starts.tolist(), x_ends.tolist()):
             regions.append({
-                "x": x_start,
+                "x": x1,
                 "y": y1,
-                "w": w - x_start,
+                "w": x2 - x1,
                 "h": y2 - y1
             })
 
     # --- PASS 3: merge nearby regions ---
-    merged = []
-    regions.sort(key=lambda r: (r["y"], r["x"]))
-
-    for r in regions:
-        if not merged:
-            merged.append(r)
-            continue
+    # Blocks on the same row less than 15px apart, found through a grid index
+    if not regions:
+        return []
 
-        prev = merged[-1]
-        same_row = abs(prev["y"] - r["y"]) < 10
-        close_x = r["x"] - (prev["x"] + prev["w"]) < 15
+    boxes = np.array([[r["x"], r["y"], r["w"], r["h"]] for r in regions], dtype=np.int64)
+    groups = merging.cluster_boxes(boxes, merging.row_block_linker(10, 15), reach=15)
 
-        if same_row and close_x:
-            prev["w"] = (r["x"] + r["w"]) - prev["x"]
-            prev["h"] = max(prev["h"], r["h"])
-        else:
-            merged.append(r)
+    merged = []
+    for group in groups:
+        g = boxes[group]
+        x1 = int(g[:, 0].min())
+        merged.append({
+            "x": x1,
+            "y": int(g[0, 1]),
+            "w": int((g[:, 0] + g[:, 2]).max()) - x1,
+            "h": int(g[:, 3].max()),
+        })
 
     return merged
 
 
-
-def ocr_region(image: np.ndarray, bbox: Dict) -> str:
+def ocr_region(image: np.ndarray, bbox: Dict, engine: Optional[OcrEngine] = None) -> str:
     """
-    OCR a single region using Tesseract CLI.
+    OCR a single region with the shared OCR engine.
+    The crop is a view of `image` and is never written to disk.
     """
     x, y, w, h = bbox["x"], bbox["y"], bbox["w"], bbox["h"]
     crop = image[y:y+h, x:x+w]
 
-    tmp_path = 'temp_region.png'
+    try:
+        return (engine or ocr_cache.cached(ocr_engine.get_engine())).recognize(crop)
+    except RuntimeError:
+        return ""
+
 
-    # with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp:
-    #     tmp_path = tmp.name
+def _box_to_region(box) -> Dict:
+    x1, y1, x2, y2 = box
+    return {"x": x1, "y": y1, "w": x2 - x1, "h": y2 - y1}
 
-    Image.fromarray(crop).save(tmp_path)
 
-    try:
-        result = subprocess.run(
-            [
-                "tesseract",
-                tmp_path,
-                "stdout",
-                # "--psm", "6",
-                # "-l", "eng"
-            ],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            check=False,
-        )
+def prefilter_regions(image: np.ndarray, regions: List[Dict],
+                      threshold: Optional[float] = None) -> Tuple[List[Dict], int]:
+    """
+    Drop regions unlikely to hold text (see pipelines/prefilter.py)
 
-        text = result.stdout.strip()
-        return text
-    finally:
-        os.remove(tmp_path)
+    Returns the kept regions, in order, and how many were skipped.
+    """
+    boxes = [(r["x"], r["y"], r["x"] + r["w"], r["y"] + r["h"]) for r in regions]
+    kept, skipped = prefilter.split_boxes(image, boxes, threshold)
+    return [_box_to_region(b) for b in kept], len(skipped)
 
 
-def build_llm_context(screenshot_path: str) -> Dict:
+def ocr_regions(image: np.ndarray, regions: List[Dict],
+                engine: Optional[OcrEngine] = None,
+                instrumentation: Optional[Instrumentation] = None) -> List[str]:
+    """
+    OCR many regions of one frame, spread over the OCR process pool.
+    Texts come back in the same order as `regions`. In 'frame' mode
+    ($OCR_MODE) the frame is analysed once, restricted to the regions,
+    instead of OCR-ing each crop on its own. As with ocr_region, a region
+    tesseract fails on comes back as "".
+    """
+    engine = engine or ocr_cache.cached(ocr_pool.get_parallel_engine())
+    frame_pass = ocr_engine.ocr_mode() == "frame"
+    try:
+        if frame_pass:
+            boxes = [(r["x"], r["y"], r["x"] + r["w"], r["y"] + r["h"]) for r in regions]
+            if instrumentation is None:
+                return engine.recognize_regions(image, boxes)
+            results = engine.recognize_regions_timed(image, boxes)
+        else:
+            crops = [image[r["y"]:r["y"]+r["h"], r["x"]:r["x"]+r["w"]] for r in regions]
+            if instrumentation is None:
+                return engine.recognize_many(crops)
+            results = engine.recognize_many_timed(crops)
+    except RuntimeError:
+        # One failure fails the whole batch: redo it region by region
+        results = _ocr_regions_one_by_one(image, regions, engine)
+        if instrumentation is None:
+            return [text for text, _, _ in results]
+
+    # A crop keeps the frame's channels; a frame pass reads it as grayscale
+    pixel_bytes = image.itemsize * (image.shape[2] if image.ndim == 3 and not frame_pass else 1)
+    texts = []
+    for r, (text, wall_ms, cpu_ms) in zip(regions, results):
+        instrumentation.segment(len(instrumentation.segments), wall_ms, cpu_ms,
+                                r["w"] * r["h"] * pixel_bytes,
+                                bbox=[r["x"], r["y"], r["w"], r["h"]])
+        texts.append(text)
+    return texts
+
+
+def _ocr_regions_one_by_one(image: np.ndarray, regions: List[Dict],
+                            engine: OcrEngine) -> List[TimedText]:
+    results = []
+    for r in regions:
+        crop = image[r["y"]:r["y"]+r["h"], r["x"]:r["x"]+r["w"]]
+        try:
+            results.append(engine.recognize_many_timed([crop])[0])
+        except RuntimeError:
+            results.append(("", 0.0, 0.0))
+    return results
+
+
+def build_llm_context(screenshot_path: FrameSource,
+                      max_workers: Optional[int] = None,
+                      incremental: Optional[IncrementalOcr] = None,
+                      instrumentation: Optional[Instrumentation] = None,
+                      tiled: str = "auto",
+                      text_threshold: Optional[float] = None) -> Dict:
     """
     Full pipeline:
     screenshot -> segments -> OCR -> structured LLM context
+
+    max_workers caps the OCR processes (default: $OCR_MAX_WORKERS or all cores).
+    Pass the same `incremental` tracker across calls to reuse OCR results for
+    regions that did not change since the previous screenshot.
+    Pass an `instrumentation` to get per-stage and per-region timings under
+    "metrics". `tiled` controls tiled binarization of large frames (see
+    segment_image). Regions scoring below `text_threshold` (default
+    $OCR_TEXT_THRESHOLD or 0.5, 0 to OCR all) for text likelihood are not
+    OCR'd; "skipped_regions" counts them. The screenshot may also be encoded
+    image bytes or a BGR array instead of a path. With $OCR_HISTORY_PATH set,
+    the regions are also recorded in the history store (pipelines/history.py).
     """
-    image = cv2.imread(screenshot_path)
-    if image is None:
-        raise RuntimeError(f"Failed to load {screenshot_path}")
+    inst = instrumentation
+
+    def stage(name):
+        return inst.stage(name) if inst is not None else nullcontext()
+
+    with stage("load"):
+        image = _load(screenshot_path)
+
+    engine = ocr_cache.cached(ocr_pool.get_parallel_engine(max_workers))
+    skipped = 0
+
+    if incremental is None:
+        with stage("segment"):
+            regions = segment_image(image, tiled)
+        with stage("prefilter"):
+            regions, skipped = prefilter_regions(image, regions, text_threshold)
+        with stage("ocr"):
+            texts = ocr_regions(image, regions, engine, inst)
+    else:
+        def segment(frame):
+            nonlocal skipped
+            with stage("segment"):
+                boxes = [(r["x"], r["y"], r["x"] + r["w"], r["y"] + r["h"])
+                         for r in segment_image(frame, tiled)]
+            with stage("prefilter"):
+                boxes, dropped = prefilter.split_boxes(frame, boxes, text_threshold)
+            skipped += len(dropped)
+            return boxes
+
+        def recognize(boxes):
+            with stage("ocr"):
+                return ocr_regions(image, [_box_to_region(b) for b in boxes], engine, inst)
+
+        boxes, texts = incremental.run(image, segment, recognize)
+        regions = [_box_to_region(b) for b in boxes]
+
+    context = _context_from(screenshot_path, regions, texts, skipped)
+    with stage("history"):
+        _record_history(image, context)
+    if incremental is not None:
+        context["incremental"] = dict(incremental.last)
+    if inst is not None:
+        context["metrics"] = inst.finish(regions=context["num_regions"], skipped=skipped)
+
+    return context
+
+
+async def ocr_regions_async(image: np.ndarray, regions: List[Dict],
+                            max_concurrency: Optional[int] = None,
+                            config: Optional[OcrConfig] = None) -> List[str]:
+    """
+    ocr_regions with one awaited tesseract subprocess per region, at most
+    `max_concurrency` (default: all cores) at a time, or a single one over the
+    frame in 'frame' mode. Shares the OCR cache with the synchronous path.
+    """
+    config = config or ocr_engine.OcrConfig()
+    cache = ocr_cache.get_ocr_cache() if ocr_cache.cache_enabled() else None
+    # The awaited subprocesses run the tesseract CLI, like the 'cli' engine
+    cli = ocr_engine.TesseractCliEngine.name
+    namespace = ocr_cache.cache_namespace(cli, config)
+    if ocr_engine.ocr_mode() == "frame":
+        frame_namespace = ocr_cache.cache_namespace(cli, config, frame=True)
+        return await _ocr_regions_frame_async(image, regions, config, cache, frame_namespace)
+    limit = asyncio.Semaphore(max_concurrency or ocr_pool.available_cores())
+
+    async def recognize(r: Dict) -> str:
+        crop = image[r["y"]:r["y"]+r["h"], r["x"]:r["x"]+r["w"]]
+        key = ocr_cache.content_key(crop, namespace) if cache is not None else None
+        text = cache.get(key) if key is not None else None
+        if text is None:
+            async with limit:
+                text = await aio.recognize_async(crop, config)
+            if key is not None:
+                cache.put(key, text)
+        return text
 
-    regions = segment_image(image)
+    return list(await asyncio.gather(*(recognize(r) for r in regions)))
+
+
+async def _ocr_regions_frame_async(image: np.ndarray, regions: List[Dict], config: OcrConfig,
+                                   cache: Optional[OcrCache], namespace: str) -> List[str]:
+    boxes = [(r["x"], r["y"], r["x"] + r["w"], r["y"] + r["h"]) for r in regions]
+    # Overlapping boxes are never cached (see pipelines.ocr_cache)
+    skip = ocr_cache.overlapped(boxes)
+    keys = [None] * len(regions)
+    if cache is not None:
+        keys = [None if i in skip else ocr_cache.content_key(image[y1:y2, x1:x2], namespace)
+                for i, (x1, y1, x2, y2) in enumerate(boxes)]
+    texts = [cache.get(key) if key is not None else None for key in keys]
+
+    missing = [i for i, text in enumerate(texts) if text is None]
+    recognized = await aio.recognize_regions_async(image, [boxes[i] for i in missing], config)
+    for i, text in zip(missing, recognized):
+        texts[i] = text
+        if keys[i] is not None:
+            cache.put(keys[i], text)
+    return texts
+
+
+async def build_llm_context_async(screenshot_path: FrameSource,
+                                  timeout: Optional[float] = None,
+                                  max_concurrency: Optional[int] = None,
+                                  tiled: str = "auto",
+                                  executor: Optional[Executor] = None,
+                                  text_threshold: Optional[float] = None) -> Dict:
+    """
+    build_llm_context for asyncio services
+
+    Decoding and segmentation run in `executor` (the loop's default when
+    None); OCR subprocesses are awaited, so many screenshots can be in flight
+    on one event loop. On timeout (asyncio.TimeoutError) or cancellation the
+    running tesseract processes are killed.
+    """
+    async def run() -> Dict:
+        loop = asyncio.get_running_loop()
+        image = await loop.run_in_executor(executor, _load, screenshot_path)
+
+        regions = await loop.run_in_executor(executor, segment_image, image, tiled)
+        regions, skipped = await loop.run_in_executor(
+            executor, prefilter_regions, image, regions, text_threshold)
+        texts = await ocr_regions_async(image, regions, max_concurrency)
+        context = _context_from(screenshot_path, regions, texts, skipped)
+        await loop.run_in_executor(executor, _record_history, image, context)
+        return context
+
+    return await asyncio.wait_for(run(), timeout)
+
+
+def _load(screenshot: FrameSource) -> np.ndarray:
+    try:
+        return ingest.load(screenshot)
+    except (FileNotFoundError, ValueError):
+        raise RuntimeError(f"Failed to load {_source(screenshot)}") from None
+
+
+def _source(screenshot: FrameSource) -> str:
+    return str(screenshot) if isinstance(screenshot, (str, Path)) else "<memory>"
 
-    output = []
-    for idx, r in enumerate(regions):
-        text = ocr_region(image, r)
 
+def _record_history(image: np.ndarray, context: Dict) -> None:
+    store = history.get_history_store()
+    if store is not None:
+        store.add_frame([(r["bbox"], r["text"]) for r in context["regions"]],
+                        source="pipeline", size=(image.shape[1], image.shape[0]))
+
+
+def _context_from(screenshot_path: FrameSource, regions: List[Dict], texts: List[str],
+                  skipped: int = 0) -> Dict:
+    output = []
+    for idx, (r, text) in enumerate(zip(regions, texts)):
         if not text:
             confidence = "low"
         elif len(text) < 10:
@@ -161,8 +431,9 @@ def build_llm_context(screenshot_path: str) -> Dict:
         })
 
     return {
-        "source": screenshot_path,
+        "source": _source(screenshot_path),
         "num_regions": len(output),
+        "skipped_regions": skipped,
         "regions": output,
     }
 
@@ -0,0 +1,3 @@
+"""
+Shared helpers for the Python vision pipelines (screenshot -> segments -> text)
+"""
@@ -0,0 +1,70 @@
+"""
+asyncio OCR primitives for the vision pipelines
+
+Tesseract runs as an asyncio subprocess fed over stdin, so an event loop can
+wait on many OCR jobs at once without a thread per job. If the awaiting task
+is cancelled (including by ``asyncio.wait_for`` timing out), the tesseract
+process is killed instead of being left to finish in the background.
+"""
+
+import asyncio
+import io
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+from PIL import Image
+
+from pipelines.ocr_engine import Box, OcrConfig, _encode_pnm, masked_frame, parse_tsv, texts_by_region
+
+
+async def run_tesseract_async(stdin: bytes, args: List[str]) -> str:
+    """Run ``tesseract stdin stdout <args>`` and return its output"""
+    proc = await asyncio.create_subprocess_exec(
+        "tesseract", "stdin", "stdout", *args,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await proc.communicate(stdin)
+    except BaseException:
+        # Cancelled or timed out: do not leave tesseract running
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        raise
+
+    if proc.returncode != 0:
+        raise RuntimeError(f"tesseract failed: {stderr.decode('utf-8', 'replace').strip()}")
+    return stdout.decode("utf-8", "replace")
+
+
+async def recognize_async(image: np.ndarray, config: Optional[OcrConfig] = None) -> str:
+    """Plain text of a BGR/grayscale array, like ``OcrEngine.recognize``"""
+    config = config or OcrConfig()
+    return (await run_tesseract_async(_encode_pnm(image), config.cli_args())).strip()
+
+
+async def recognize_regions_async(image: np.ndarray, boxes: List[Box],
+                                  config: Optional[OcrConfig] = None) -> List[str]:
+    """
+    Text of each box of a frame from one awaited tesseract pass over the
+    frame, like ``OcrEngine.recognize_regions`` in 'frame' mode
+    """
+    if not boxes:
+        return []
+    config = config or OcrConfig()
+    tsv = await run_tesseract_async(_encode_pnm(masked_frame(image, boxes)),
+                                    config.cli_args() + ["tsv"])
+    return texts_by_region(parse_tsv(tsv), boxes)
+
+
+async def image_to_data_async(image: Union[Image.Image, np.ndarray],
+                              config: Optional[OcrConfig] = None) -> Dict[str, list]:
+    """Word boxes and confidences of a PIL image or RGB/grayscale array, like ``pytesseract.image_to_data``"""
+    if isinstance(image, np.ndarray):
+        image = Image.fromarray(image)
+    buf = io.BytesIO()
+    image.save(buf, format="PPM" if image.mode in ("RGB", "L") else "PNG")
+    args = (config.cli_args() if config is not None else []) + ["tsv"]
+    return parse_tsv(await run_tesseract_async(buf.getvalue(), args))
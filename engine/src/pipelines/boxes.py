@@ -0,0 +1,119 @@
+"""
+Overlap suppression and containment pruning for detected segments
+
+Contour segmentation pads every bounding box, so neighbouring blocks end up
+overlapping and small blocks end up nested inside larger ones (a card inside a
+panel, a label inside its padded row). Each of those pixels is then OCR'd
+once per box and its text shows up more than once in the output.
+
+``dedupe`` collapses them: a box contained in another is dropped, and boxes
+whose intersection covers at least MIN_OVERLAP of the smaller one are merged
+into their bounding box (which can be larger than their union). Merging can
+create new overlaps, so it repeats until nothing changes, usually after one
+or two passes. Overlapping pairs come from a sort-and-sweep over x (boxes
+sorted by their left edge, with an active list of those still open), not
+from comparing every pair.
+
+Boxes are ``(x1, y1, x2, y2)`` in frame pixels, as in ``screenshot_pipeline``.
+"""
+
+from typing import Iterator, List, Sequence, Tuple
+
+from pipelines.merging import UnionFind
+
+Box = Tuple[int, int, int, int]
+
+# Intersection, as a fraction of the smaller box, from which two boxes merge
+# (1.0 only prunes boxes that are fully contained in another)
+MIN_OVERLAP = 0.5
+
+
+def area(box: Box) -> int:
+    x1, y1, x2, y2 = box
+    return max(x2 - x1, 0) * max(y2 - y1, 0)
+
+
+def intersection(a: Box, b: Box) -> int:
+    w = min(a[2], b[2]) - max(a[0], b[0])
+    h = min(a[3], b[3]) - max(a[1], b[1])
+    return w * h if w > 0 and h > 0 else 0
+
+
+def overlapping_pairs(boxes: Sequence[Box]) -> Iterator[Tuple[int, int]]:
+    """Index pairs (i, j) of boxes that share at least one pixel, by sweeping over x"""
+    active: List[int] = []
+    for i in sorted(range(len(boxes)), key=lambda k: boxes[k][0]):
+        x1, y1, _, y2 = boxes[i]
+        active = [j for j in active if boxes[j][2] > x1]
+        for j in active:
+            if boxes[j][1] < y2 and y1 < boxes[j][3]:
+                yield j, i
+        active.append(i)
+
+
+def group_overlapping(boxes: Sequence[Box],
+                      min_overlap: float = MIN_OVERLAP) -> List[List[int]]:
+    """
+    Indices of the input boxes that collapse into each output box
+
+    Groups are ordered by their first member, and members by index.
+    """
+    groups = [[i] for i in range(len(boxes))]
+    current = [tuple(b) for b in boxes]
+    while True:
+        uf = UnionFind(len(current))
+        merged = False
+        for i, j in overlapping_pairs(current):
+            smaller = min(area(current[i]), area(current[j]))
+            if intersection(current[i], current[j]) >= min_overlap * smaller:
+                uf.union(i, j)
+                merged = True
+        if not merged:
+            return groups
+
+        joined = sorted(uf.groups(), key=lambda g: min(groups[k][0] for k in g))
+        groups = [sorted(i for k in g for i in groups[k]) for g in joined]
+        current = [bounding_box([current[k] for k in g]) for g in joined]
+
+
+def bounding_box(boxes: Sequence[Box]) -> Box:
+    return (min(b[0] for b in boxes), min(b[1] for b in boxes),
+            max(b[2] for b in boxes), max(b[3] for b in boxes))
+
+
+def union_area(boxes: Sequence[Box]) -> int:
+    """Pixels covered by at least one of the boxes"""
+    xs = sorted({x for b in boxes for x in (b[0], b[2])})
+    total = 0
+    for left, right in zip(xs, xs[1:]):
+        spans = sorted((b[1], b[3]) for b in boxes if b[0] <= left and right <= b[2] and b[1] < b[3])
+        covered, reach = 0, None
+        for y1, y2 in spans:
+            if reach is None or y1 > reach:
+                covered += y2 - y1
+                reach = y2
+            elif y2 > reach:
+                covered += y2 - reach
+                reach = y2
+        total += covered * (right - left)
+    return total
+
+
+def duplicate_area(boxes: Sequence[Box]) -> int:
+    """Pixels covered more than once, counted once per extra box covering them"""
+    return sum(map(area, boxes)) - union_area(boxes) if len(boxes) > 1 else 0
+
+
+def dedupe(boxes: Sequence[Box], min_overlap: float = MIN_OVERLAP) -> Tuple[List[Box], int]:
+    """
+    (boxes with contained ones dropped and overlapping ones merged, pixels saved)
+
+    Pixels saved counts the pixels the boxes of each merged group shared,
+    each time beyond the first it would have been OCR'd: the duplicate work
+    removed. It is never negative. A merged bounding box can also take in
+    pixels that were in none of its boxes; that added area is not
+    subtracted. Output boxes keep the order of their first input box.
+    """
+    groups = group_overlapping(boxes, min_overlap)
+    members = [[boxes[i] for i in g] for g in groups]
+    return [bounding_box(m) for m in members], sum(map(duplicate_area, members))
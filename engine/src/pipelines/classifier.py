@@ -0,0 +1,105 @@
+"""
+Batch text-region classifier
+
+Each keyword vocabulary (button labels, navigation items) is compiled once into
+a single regex alternation. A frame's words are lowercased, joined with
+newlines and searched in one pass per vocabulary; match offsets are mapped
+back to word indices. The length, case and height rules then run as numpy
+column operations, so classifying a frame is a handful of C-level passes
+rather than one Python call per word.
+
+Vocabularies are configurable: pass them to ``RegionClassifier`` or point
+``REGION_KEYWORDS_PATH`` at a JSON file such as
+``{"button": ["submit", "ok", "apply"], "navigation": ["home", "inbox"]}``.
+Keys that are missing keep the defaults. Matching is case-insensitive.
+"""
+
+import json
+import os
+import re
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+
+from pipelines.region_table import type_code, type_name
+
+DEFAULT_KEYWORDS: Dict[str, Sequence[str]] = {
+    "button": ("submit", "ok", "cancel", "save", "delete", "add"),
+    "navigation": ("home", "settings", "profile", "menu", "help"),
+}
+
+
+def _compile(keywords: Iterable[str]) -> Optional["re.Pattern[str]"]:
+    words = sorted({k.lower() for k in keywords if k}, key=len, reverse=True)
+    if any("\n" in word for word in words):
+        raise ValueError("Keywords can not contain newlines")
+    return re.compile("|".join(map(re.escape, words))) if words else None
+
+
+class RegionClassifier:
+    """Labels words as button, navigation, header, label, body or text"""
+
+    def __init__(self, keywords: Optional[Dict[str, Iterable[str]]] = None):
+        """
+        Args:
+            keywords: Vocabulary per label ('button', 'navigation'); labels
+                left out use DEFAULT_KEYWORDS
+        """
+        keywords = {**DEFAULT_KEYWORDS, **(keywords or {})}
+        unknown = set(keywords) - set(DEFAULT_KEYWORDS)
+        if unknown:
+            raise ValueError(f"Unknown keyword labels {sorted(unknown)}")
+        self.keywords = {label: tuple(words) for label, words in keywords.items()}
+        self._button = _compile(self.keywords["button"])
+        self._navigation = _compile(self.keywords["navigation"])
+        self._codes = {name: type_code(name) for name in
+                       ("button", "navigation", "header", "label", "body", "text")}
+
+    @classmethod
+    def from_env(cls) -> "RegionClassifier":
+        """Default vocabularies, overridden by the JSON file at ``REGION_KEYWORDS_PATH``"""
+        path = os.environ.get("REGION_KEYWORDS_PATH")
+        if not path:
+            return cls()
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def classify(self, texts: Sequence[str], heights: Sequence[int]) -> np.ndarray:
+        """Region type codes (see region_table.type_name) for stripped words and their box heights"""
+        n = len(texts)
+        if not n:
+            return np.zeros(0, dtype=np.uint8)
+
+        lengths = np.fromiter(map(len, texts), dtype=np.int64, count=n)
+        heights = np.asarray(heights)
+        lowered = [t.lower() for t in texts]
+        joined = "\n".join(lowered)
+        # Offset of each word in `joined`; a match belongs to the last word starting at or before it
+        starts = np.cumsum([0] + [len(t) + 1 for t in lowered[:-1]])
+
+        def contains(pattern: Optional["re.Pattern[str]"]) -> np.ndarray:
+            found = np.zeros(n, dtype=bool)
+            if pattern is not None:
+                offsets = [m.start() for m in pattern.finditer(joined)]
+                found[np.searchsorted(starts, offsets, side="right") - 1] = True
+            return found
+
+        upper = np.char.isupper(np.asarray(texts, dtype=str))
+        colon = np.char.find(np.asarray(texts, dtype=str), ":") >= 0
+
+        # First matching rule wins, as in np.select
+        rules = [
+            ((lengths < 20) & contains(self._button), "button"),
+            ((lengths < 30) & contains(self._navigation), "navigation"),
+            ((lengths < 50) & (upper | (heights > 20)), "header"),
+            ((lengths < 30) & colon, "label"),
+            (lengths > 50, "body"),
+        ]
+        return np.select(
+            [mask for mask, _ in rules],
+            [self._codes[name] for _, name in rules],
+            default=self._codes["text"],
+        ).astype(np.uint8)
+
+    def classify_one(self, text: str, height: int) -> str:
+        return type_name(int(self.classify([text], [height])[0]))
@@ -0,0 +1,108 @@
+"""
+One decoded screenshot, shared by every stage of a pipeline run
+
+A 5K frame is ~44 MB as RGB. The PIL round trips between stages (decode,
+``np.array``, ``fromarray``, ``convert('RGB')``, ``np.asarray`` for the cache
+key) each made another full-frame copy. A ``Frame`` holds the decoded pixels
+in one array. Derived planes (grayscale, binarised) are computed on first use
+and kept for the rest of the run. Crops are views into the same buffer and
+reuse any planes the parent has already computed.
+"""
+
+from pathlib import Path
+from typing import Callable, Dict, Hashable, Tuple, Union
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from pipelines import ingest
+
+FrameSource = Union[str, Path, bytes, Image.Image, np.ndarray, "Frame"]
+
+
+class Frame:
+    """Decoded pixels (H x W gray or H x W x 3 RGB, uint8) plus cached derived planes"""
+
+    __slots__ = ("pixels", "_planes")
+
+    def __init__(self, pixels: np.ndarray):
+        if pixels.ndim == 3 and pixels.shape[2] == 4:
+            pixels = pixels[..., :3]  # drop alpha, as convert('RGB') does
+        self.pixels = pixels
+        self._planes: Dict[Hashable, np.ndarray] = {}
+
+    @classmethod
+    def load(cls, source: FrameSource) -> "Frame":
+        """
+        Wrap a path, encoded image bytes, PIL image or array (treated as
+        RGB) without extra copies
+
+        Files and bytes are decoded straight into one RGB buffer by OpenCV;
+        files fall back to PIL for formats OpenCV can not read.
+        """
+        if isinstance(source, Frame):
+            return source
+        if isinstance(source, np.ndarray):
+            return cls(source)
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return cls(ingest.decode(source, 'rgb'))
+        if isinstance(source, Image.Image):
+            if source.mode not in ('RGB', 'L'):
+                source = source.convert('RGB')
+            return cls(np.asarray(source))
+
+        try:
+            return cls(ingest.read_path(source, 'rgb'))
+        except FileNotFoundError:
+            with Image.open(source) as image:
+                return cls.load(image)
+
+    @classmethod
+    def from_raw(cls, buffer, fmt: ingest.RawFormat) -> "Frame":
+        """Copy a raw pixel buffer (see ingest.RawFormat) into a new RGB frame"""
+        return cls(ingest.from_raw(buffer, fmt, 'rgb'))
+
+    @classmethod
+    def from_shared_memory(cls, name: str, fmt: ingest.RawFormat) -> "Frame":
+        return cls(ingest.read_shared_memory(name, fmt, 'rgb'))
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """(width, height), like PIL's Image.size"""
+        return self.pixels.shape[1], self.pixels.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        return self.pixels.nbytes + sum(p.nbytes for p in self._planes.values())
+
+    def plane(self, key: Hashable, compute: Callable[[], np.ndarray]) -> np.ndarray:
+        """A derived plane, computed by `compute` the first time `key` is asked for"""
+        plane = self._planes.get(key)
+        if plane is None:
+            plane = self._planes[key] = compute()
+        return plane
+
+    @property
+    def rgb(self) -> np.ndarray:
+        if self.pixels.ndim == 3:
+            return self.pixels
+        return self.plane('rgb', lambda: cv2.cvtColor(self.pixels, cv2.COLOR_GRAY2RGB))
+
+    @property
+    def gray(self) -> np.ndarray:
+        if self.pixels.ndim == 2:
+            return self.pixels
+        return self.plane('gray', lambda: cv2.cvtColor(self.pixels, cv2.COLOR_RGB2GRAY))
+
+    def crop(self, x1: int, y1: int, x2: int, y2: int) -> "Frame":
+        """A view of (x1, y1, x2, y2) sharing this frame's buffer and per-pixel planes"""
+        cropped = Frame(self.pixels[y1:y2, x1:x2])
+        # Colour conversions are per pixel, so they crop; filtered planes do not
+        for key in ('gray', 'rgb'):
+            if key in self._planes:
+                cropped._planes[key] = self._planes[key][y1:y2, x1:x2]
+        return cropped
+
+    def to_pil(self) -> Image.Image:
+        return Image.fromarray(self.pixels)
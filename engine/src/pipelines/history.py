@@ -0,0 +1,389 @@
+"""
+Local full-text history of what the pipelines read off the screen
+
+OCR output used to be printed and forgotten, so "what was on screen earlier"
+meant capturing and OCR-ing again. ``HistoryStore`` keeps every frame's
+regions (text, bbox, kind) in SQLite with an FTS5 index, so such questions
+become index queries:
+
+- frames: one row per distinct frame, with the time it was first and last
+  seen and where it came from. A frame whose regions match the previous frame
+  from the same source only extends that frame's ``last_seen``.
+- regions: the frame's text blocks in reading order, bbox as (x, y, w, h).
+  An external-content FTS5 table, kept in step by triggers, indexes their
+  text.
+
+Writes are buffered and committed in batches, one transaction per
+BATCH_FRAMES frames or FLUSH_INTERVAL seconds, whichever comes first: a
+timer commits a partial batch once its oldest change has waited that long,
+even if no further frame arrives. Queries flush first, so they always see
+every frame added. Content is append-only.
+Compaction deletes frames last seen longer ago than the retention period
+and merges the FTS index segments. It runs on its own every COMPACT_INTERVAL
+seconds.
+
+The shared store is enabled by ``OCR_HISTORY_PATH``; ``OCR_HISTORY_RETENTION_DAYS``
+sets the retention (default DEFAULT_RETENTION_DAYS).
+"""
+
+import atexit
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# (x, y, w, h)
+BBox = Tuple[int, int, int, int]
+# (bbox, text) or (bbox, text, kind)
+HistoryRegion = Tuple
+
+DEFAULT_RETENTION_DAYS = 7.0
+BATCH_FRAMES = 32
+FLUSH_INTERVAL = 5.0
+COMPACT_INTERVAL = 3600.0
+DEFAULT_LIMIT = 50
+# Words of context around the match in HistoryHit.snippet
+SNIPPET_TOKENS = 12
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS frames (
+    id INTEGER PRIMARY KEY,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    source TEXT,
+    width INTEGER,
+    height INTEGER,
+    digest TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS frames_first_seen ON frames (first_seen);
+CREATE INDEX IF NOT EXISTS frames_last_seen ON frames (last_seen);
+
+CREATE TABLE IF NOT EXISTS regions (
+    id INTEGER PRIMARY KEY,
+    frame_id INTEGER NOT NULL REFERENCES frames (id),
+    seq INTEGER NOT NULL,
+    x INTEGER NOT NULL,
+    y INTEGER NOT NULL,
+    w INTEGER NOT NULL,
+    h INTEGER NOT NULL,
+    kind TEXT,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS regions_frame ON regions (frame_id, seq);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS regions_fts USING fts5 (
+    text, content='regions', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS regions_insert AFTER INSERT ON regions BEGIN
+    INSERT INTO regions_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS regions_delete AFTER DELETE ON regions BEGIN
+    INSERT INTO regions_fts (regions_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+
+@dataclass(frozen=True)
+class HistoryFrame:
+    id: int
+    first_seen: float
+    last_seen: float
+    source: Optional[str]
+    width: Optional[int]
+    height: Optional[int]
+    regions: int
+
+
+@dataclass(frozen=True)
+class HistoryHit:
+    """One region whose text matched a search"""
+    frame_id: int
+    first_seen: float
+    last_seen: float
+    source: Optional[str]
+    bbox: BBox
+    kind: Optional[str]
+    text: str
+    snippet: str  # matched words in [brackets]
+
+
+@dataclass
+class _PendingFrame:
+    first_seen: float
+    last_seen: float
+    source: Optional[str]
+    size: Optional[Tuple[int, int]]
+    digest: str
+    regions: List[Tuple[BBox, str, Optional[str]]]
+    id: Optional[int] = None  # set once written
+
+
+def match_query(keywords: str) -> str:
+    """An FTS5 query matching regions that contain every word of `keywords`"""
+    words = re.findall(r"\w+", keywords)
+    return " AND ".join(f'"{word}"' for word in words)
+
+
+def _digest(regions: Sequence[Tuple[BBox, str, Optional[str]]]) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for bbox, text, kind in regions:
+        h.update(f"{bbox}|{kind}|{text}\x00".encode("utf-8"))
+    return h.hexdigest()
+
+
+class HistoryStore:
+    """Append-only, full-text indexed record of OCR output over time"""
+
+    def __init__(self, path: str,
+                 retention_days: float = DEFAULT_RETENTION_DAYS,
+                 batch_frames: int = BATCH_FRAMES,
+                 flush_interval: float = FLUSH_INTERVAL):
+        """
+        Args:
+            path: SQLite file (":memory:" for a throwaway store)
+            retention_days: Age after which compact() deletes frames (0 keeps everything)
+            batch_frames, flush_interval: Commit buffered frames once this many
+                are waiting, or the oldest has waited this many seconds
+        """
+        self.path = path
+        self.retention_days = retention_days
+        self.batch_frames = batch_frames
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pending: List[_PendingFrame] = []
+        # Updates to frames already written: frame id -> last_seen
+        self._seen: Dict[int, float] = {}
+        # Last frame added per source, written or not
+        self._latest: Dict[Optional[str], _PendingFrame] = {}
+        # Commits a partial batch FLUSH_INTERVAL after its first change
+        self._timer: Optional[threading.Timer] = None
+        self._last_compact = time.time()
+        self.frames_added = 0
+        self.frames_merged = 0
+
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        # Only takes effect on a new file; lets compaction hand pages back
+        self._db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+        # Repeats across restarts (one-shot runs) extend the stored frame too
+        for frame_id, first, last, source, width, height, digest in self._db.execute(
+                "SELECT id, first_seen, last_seen, source, width, height, digest FROM frames "
+                "WHERE id IN (SELECT max(id) FROM frames GROUP BY source)"):
+            size = (width, height) if width is not None else None
+            self._latest[source] = _PendingFrame(first, last, source, size, digest, [], frame_id)
+
+    def add_frame(self, regions: Iterable[HistoryRegion],
+                  timestamp: Optional[float] = None,
+                  source: Optional[str] = None,
+                  size: Optional[Tuple[int, int]] = None) -> None:
+        """
+        Record one frame's regions, as (bbox, text) or (bbox, text, kind) in
+        reading order; regions with no text are left out
+
+        Args:
+            timestamp: When the frame was captured (default: now), as time.time()
+            source: Which pipeline or display the frame came from
+            size: (width, height) of the frame
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        kept = []
+        for region in regions:
+            bbox, text = region[0], region[1]
+            kind = region[2] if len(region) > 2 else None
+            if text and text.strip():
+                kept.append((tuple(int(v) for v in bbox), text, kind))
+        frame = _PendingFrame(timestamp, timestamp, source, size, _digest(kept), kept)
+
+        with self._lock:
+            latest = self._latest.get(source)
+            if latest is not None and latest.digest == frame.digest and latest.size == size:
+                latest.last_seen = max(latest.last_seen, timestamp)
+                if latest.id is not None:
+                    self._seen[latest.id] = latest.last_seen
+                self.frames_merged += 1
+            else:
+                self._pending.append(frame)
+                self._latest[source] = frame
+                self.frames_added += 1
+
+            if len(self._pending) + len(self._seen) >= self.batch_frames:
+                self._flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._db is None or (not self._pending and not self._seen):
+            return
+        with self._db:
+            for frame in self._pending:
+                width, height = frame.size or (None, None)
+                frame.id = self._db.execute(
+                    "INSERT INTO frames (first_seen, last_seen, source, width, height, digest) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (frame.first_seen, frame.last_seen, frame.source, width, height, frame.digest),
+                ).lastrowid
+                self._db.executemany(
+                    "INSERT INTO regions (frame_id, seq, x, y, w, h, kind, text) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(frame.id, seq, *bbox, kind, text)
+                     for seq, (bbox, text, kind) in enumerate(frame.regions)],
+                )
+            self._db.executemany(
+                "UPDATE frames SET last_seen = max(last_seen, ?) WHERE id = ?",
+                [(seen, frame_id) for frame_id, seen in self._seen.items()],
+            )
+        # Later repeats of a written frame become last_seen updates
+        for frame in self._pending:
+            frame.regions = []
+        self._pending = []
+        self._seen = {}
+
+        if self.retention_days > 0 and time.time() - self._last_compact >= COMPACT_INTERVAL:
+            self._compact(time.time())
+
+    def flush(self) -> None:
+        """Commit every buffered frame now"""
+        with self._lock:
+            self._flush()
+
+    def _compact(self, now: float) -> int:
+        self._last_compact = now
+        cutoff = now - self.retention_days * 86400
+        with self._db:
+            self._db.execute(
+                "DELETE FROM regions WHERE frame_id IN (SELECT id FROM frames WHERE last_seen < ?)",
+                (cutoff,),
+            )
+            removed = self._db.execute("DELETE FROM frames WHERE last_seen < ?", (cutoff,)).rowcount
+            self._db.execute("INSERT INTO regions_fts (regions_fts) VALUES ('optimize')")
+        self._db.execute("PRAGMA incremental_vacuum")
+        self._latest = {source: frame for source, frame in self._latest.items()
+                        if frame.id is None or frame.last_seen >= cutoff}
+        return removed
+
+    def compact(self, now: Optional[float] = None) -> int:
+        """
+        Delete frames last seen longer than the retention period before `now`
+        and merge the index; returns the number of frames deleted
+        """
+        with self._lock:
+            self._flush()
+            if self.retention_days <= 0:
+                return 0
+            return self._compact(time.time() if now is None else now)
+
+    def search(self, keywords: str,
+               since: Optional[float] = None,
+               until: Optional[float] = None,
+               source: Optional[str] = None,
+               limit: int = DEFAULT_LIMIT,
+               raw: bool = False) -> List[HistoryHit]:
+        """
+        Regions containing every word of `keywords` (an FTS5 query as is with
+        raw=True) on frames seen between `since` and `until`, newest first
+        """
+        query = keywords if raw else match_query(keywords)
+        if not query:
+            return []
+        sql = ("SELECT f.id, f.first_seen, f.last_seen, f.source, r.x, r.y, r.w, r.h, r.kind, r.text, "
+               f"snippet(regions_fts, 0, '[', ']', '...', {SNIPPET_TOKENS}) "
+               "FROM regions_fts JOIN regions r ON r.id = regions_fts.rowid "
+               "JOIN frames f ON f.id = r.frame_id WHERE regions_fts MATCH ?")
+        where, params = self._time_range(since, until, source)
+        with self._lock:
+            self._flush()
+            rows = self._db.execute(
+                sql + where + " ORDER BY f.last_seen DESC, r.seq LIMIT ?",
+                [query, *params, limit],
+            ).fetchall()
+        return [HistoryHit(frame_id, first, last, src, (x, y, w, h), kind, text, snippet)
+                for frame_id, first, last, src, x, y, w, h, kind, text, snippet in rows]
+
+    def frames(self, since: Optional[float] = None,
+               until: Optional[float] = None,
+               source: Optional[str] = None,
+               limit: int = DEFAULT_LIMIT) -> List[HistoryFrame]:
+        """Frames seen between `since` and `until`, newest first"""
+        where, params = self._time_range(since, until, source)
+        with self._lock:
+            self._flush()
+            rows = self._db.execute(
+                "SELECT f.id, f.first_seen, f.last_seen, f.source, f.width, f.height, "
+                "(SELECT count(*) FROM regions r WHERE r.frame_id = f.id) "
+                "FROM frames f WHERE 1" + where + " ORDER BY f.last_seen DESC LIMIT ?",
+                [*params, limit],
+            ).fetchall()
+        return [HistoryFrame(*row) for row in rows]
+
+    def frame_text(self, frame_id: int) -> str:
+        """A frame's text, one region per line in reading order"""
+        with self._lock:
+            self._flush()
+            rows = self._db.execute(
+                "SELECT text FROM regions WHERE frame_id = ? ORDER BY seq", (frame_id,)
+            ).fetchall()
+        return "\n".join(text for (text,) in rows)
+
+    @staticmethod
+    def _time_range(since: Optional[float], until: Optional[float],
+                    source: Optional[str]) -> Tuple[str, List]:
+        where, params = "", []
+        if since is not None:
+            where += " AND f.last_seen >= ?"
+            params.append(since)
+        if until is not None:
+            where += " AND f.first_seen <= ?"
+            params.append(until)
+        if source is not None:
+            where += " AND f.source = ?"
+            params.append(source)
+        return where, params
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            frames, regions = self._db.execute(
+                "SELECT (SELECT count(*) FROM frames), (SELECT count(*) FROM regions)"
+            ).fetchone()
+            return {
+                "frames": frames,
+                "regions": regions,
+                "pending": len(self._pending),
+                "frames_added": self.frames_added,
+                "frames_merged": self.frames_merged,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is None:
+                return
+            self._flush()
+            self._db.close()
+            self._db = None
+
+
+_store: Optional[HistoryStore] = None
+
+
+def get_history_store() -> Optional[HistoryStore]:
+    """Shared store for this process, or None unless ``OCR_HISTORY_PATH`` is set"""
+    global _store
+    if _store is None:
+        path = os.environ.get("OCR_HISTORY_PATH")
+        if not path:
+            return None
+        retention = float(os.environ.get("OCR_HISTORY_RETENTION_DAYS", DEFAULT_RETENTION_DAYS))
+        _store = HistoryStore(path, retention)
+        atexit.register(_store.close)
+    return _store
@@ -0,0 +1,218 @@
+"""
+Frame-to-frame change detection for incremental OCR
+
+Consecutive desktop captures are mostly identical. ``FrameTracker`` keeps the
+previous frame and reports which areas changed (dirty rectangles);
+``IncrementalOcr`` uses that to re-OCR only the segments that overlap a change
+and to skip identical frames entirely.
+
+Boxes are ``(x1, y1, x2, y2)`` in frame pixels, as in ``screenshot_pipeline``.
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+Box = Tuple[int, int, int, int]
+
+# Changes are tracked on a grid of CELL_SIZE x CELL_SIZE pixel cells
+CELL_SIZE = 16
+
+
+@dataclass
+class FrameChange:
+    """Difference between the previous frame and the current one"""
+    identical: bool
+    dirty: List[Box] = field(default_factory=list)
+    dirty_fraction: float = 0.0
+
+
+def dirty_rects(previous: np.ndarray, current: np.ndarray,
+                pixel_threshold: int = 0,
+                cell_size: int = CELL_SIZE) -> Tuple[List[Box], float]:
+    """
+    Find the rectangles that changed between two frames of the same shape
+
+    Returns:
+        (dirty rectangles, fraction of pixels that changed)
+    """
+    diff = cv2.absdiff(previous, current)
+    if diff.ndim == 3:
+        diff = diff.max(axis=2)
+    changed = diff > pixel_threshold
+
+    h, w = changed.shape
+    grid_h, grid_w = -(-h // cell_size), -(-w // cell_size)
+    padded = np.zeros((grid_h * cell_size, grid_w * cell_size), dtype=bool)
+    padded[:h, :w] = changed
+    cells = padded.reshape(grid_h, cell_size, grid_w, cell_size).any(axis=(1, 3))
+
+    n, _, stats, _ = cv2.connectedComponentsWithStats(cells.astype(np.uint8), connectivity=8)
+    rects = []
+    for x, y, cw, ch, _ in stats[1:n]:
+        rects.append((
+            int(x * cell_size),
+            int(y * cell_size),
+            int(min((x + cw) * cell_size, w)),
+            int(min((y + ch) * cell_size, h)),
+        ))
+
+    return rects, float(changed.mean())
+
+
+def overlaps_any(boxes: Sequence[Box], rects: Sequence[Box]) -> np.ndarray:
+    """Boolean mask: which boxes intersect at least one of the rects"""
+    if not len(boxes) or not len(rects):
+        return np.zeros(len(boxes), dtype=bool)
+
+    b = np.asarray(boxes)[:, None, :]
+    r = np.asarray(rects)[None, :, :]
+    hit = (b[..., 0] < r[..., 2]) & (r[..., 0] < b[..., 2]) & \
+          (b[..., 1] < r[..., 3]) & (r[..., 1] < b[..., 3])
+    return hit.any(axis=1)
+
+
+def grow_rects(rects: Sequence[Box], covering: Sequence[Box],
+               margin: int, width: int, height: int) -> List[Box]:
+    """
+    Expand dirty rectangles so re-OCR does not cut words at their edges
+
+    Each rect is padded by `margin`, grown to fully contain every box in
+    `covering` that it touches, and overlapping results are unioned.
+    """
+    grown = [(max(x1 - margin, 0), max(y1 - margin, 0),
+              min(x2 + margin, width), min(y2 + margin, height))
+             for x1, y1, x2, y2 in rects]
+
+    changed = True
+    while changed:
+        changed = False
+        pool = grown + list(covering)
+        out: List[Box] = []
+        for rect in grown:
+            x1, y1, x2, y2 = rect
+            for bx1, by1, bx2, by2 in pool:
+                if bx1 < x2 and x1 < bx2 and by1 < y2 and y1 < by2:
+                    x1, y1 = min(x1, bx1), min(y1, by1)
+                    x2, y2 = max(x2, bx2), max(y2, by2)
+            merged = (x1, y1, x2, y2)
+            changed |= merged != rect
+            if merged not in out:
+                out.append(merged)
+        grown = out
+
+    return grown
+
+
+class FrameTracker:
+    """Remembers the last frame and diffs new frames against it"""
+
+    def __init__(self, pixel_threshold: int = 0, cell_size: int = CELL_SIZE):
+        """
+        Args:
+            pixel_threshold: Per-channel difference a pixel must exceed to count
+                as changed (0 = any change)
+            cell_size: Granularity of dirty rectangles in pixels
+        """
+        self.pixel_threshold = pixel_threshold
+        self.cell_size = cell_size
+        self.previous: Optional[np.ndarray] = None
+
+    def compare(self, frame: np.ndarray) -> Optional[FrameChange]:
+        """
+        Diff a frame against the previous one
+
+        Returns:
+            None when there is nothing comparable (first frame or a new size)
+        """
+        if self.previous is None or self.previous.shape != frame.shape:
+            return None
+        if np.array_equal(self.previous, frame):
+            return FrameChange(identical=True)
+
+        rects, fraction = dirty_rects(self.previous, frame,
+                                      self.pixel_threshold, self.cell_size)
+        return FrameChange(identical=False, dirty=rects, dirty_fraction=fraction)
+
+    def update(self, frame: np.ndarray) -> None:
+        self.previous = frame.copy()
+
+    def reset(self) -> None:
+        self.previous = None
+
+
+class IncrementalOcr:
+    """
+    Segment-level result reuse for crop-based pipelines
+
+    Keeps the previous frame's boxes and texts. A segment is re-OCR'd only if it
+    is new or overlaps a dirty rectangle; an identical frame returns the
+    previous results without segmenting at all.
+    """
+
+    def __init__(self, pixel_threshold: int = 0, cell_size: int = CELL_SIZE):
+        self.tracker = FrameTracker(pixel_threshold, cell_size)
+        self._boxes: List[Box] = []
+        self._texts: List[str] = []
+        self.stats: Counter = Counter()
+        self.last: Dict[str, int] = {}
+
+    def run(self,
+            frame: np.ndarray,
+            segment: Callable[[np.ndarray], List[Box]],
+            recognize: Callable[[List[Box]], List[str]]) -> Tuple[List[Box], List[str]]:
+        """
+        Process one frame
+
+        Args:
+            frame: The decoded frame
+            segment: Returns the frame's segment boxes, in output order
+            recognize: OCRs the given boxes of this frame, returning their texts
+
+        Returns:
+            (boxes, texts) for the whole frame
+        """
+        change = self.tracker.compare(frame)
+        self.stats["frames"] += 1
+
+        if change is not None and change.identical:
+            self.stats["identical_frames"] += 1
+            self.stats["segments_reused"] += len(self._boxes)
+            self.last = {"identical": 1, "reused": len(self._boxes), "ocr": 0}
+            return list(self._boxes), list(self._texts)
+
+        boxes = segment(frame)
+        previous = dict(zip(self._boxes, self._texts))
+
+        if change is None:
+            stale = np.ones(len(boxes), dtype=bool)
+        else:
+            stale = overlaps_any(boxes, change.dirty)
+
+        texts: List[Optional[str]] = []
+        todo: List[int] = []
+        for i, box in enumerate(boxes):
+            if not stale[i] and box in previous:
+                texts.append(previous[box])
+            else:
+                texts.append(None)
+                todo.append(i)
+
+        for i, text in zip(todo, recognize([boxes[i] for i in todo])):
+            texts[i] = text
+
+        self.tracker.update(frame)
+        self._boxes, self._texts = list(boxes), list(texts)
+
+        reused = len(boxes) - len(todo)
+        self.stats["segments_reused"] += reused
+        self.stats["segments_ocr"] += len(todo)
+        self.last = {"identical": 0, "reused": reused, "ocr": len(todo)}
+        return list(boxes), list(texts)
+
+    def reset(self) -> None:
+        self.tracker.reset()
+        self._boxes, self._texts = [], []
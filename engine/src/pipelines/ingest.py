@@ -0,0 +1,179 @@
+"""
+Getting frames into the pipelines without a file on disk
+
+A frame can arrive as:
+
+- encoded image bytes (PNG, JPEG, ...), decoded in memory
+- raw pixels, described by ``width``, ``height``, ``pixel_format`` (one of
+  PIXEL_FORMATS) and an optional row ``stride`` in bytes
+- a named shared-memory buffer (``shm``) holding raw pixels with the same
+  metadata. The producer owns the buffer; it is attached, copied out and
+  detached, never unlinked.
+- a path on disk, as before
+
+The same fields describe a frame in a worker job header and on the
+screenshot_pipeline.py command line. Every loader returns a contiguous
+uint8 array in the channel order the caller asks for (``"bgr"`` for the
+OpenCV pipelines, ``"rgb"`` for the PIL-based one), or a 2-D array for
+``"gray"``.
+"""
+
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import cv2
+import numpy as np
+
+# Channels per pixel for each raw pixel format
+PIXEL_FORMATS = {"gray": 1, "rgb": 3, "bgr": 3, "rgba": 4, "bgra": 4}
+
+# cv2.cvtColor codes from a raw pixel format to each output order
+_CONVERSIONS = {
+    ("gray", "bgr"): cv2.COLOR_GRAY2BGR,
+    ("gray", "rgb"): cv2.COLOR_GRAY2RGB,
+    ("rgb", "bgr"): cv2.COLOR_RGB2BGR,
+    ("rgb", "gray"): cv2.COLOR_RGB2GRAY,
+    ("bgr", "rgb"): cv2.COLOR_BGR2RGB,
+    ("bgr", "gray"): cv2.COLOR_BGR2GRAY,
+    ("rgba", "bgr"): cv2.COLOR_RGBA2BGR,
+    ("rgba", "rgb"): cv2.COLOR_RGBA2RGB,
+    ("rgba", "gray"): cv2.COLOR_RGBA2GRAY,
+    ("bgra", "bgr"): cv2.COLOR_BGRA2BGR,
+    ("bgra", "rgb"): cv2.COLOR_BGRA2RGB,
+    ("bgra", "gray"): cv2.COLOR_BGRA2GRAY,
+}
+
+FrameSource = Union[str, Path, bytes, bytearray, memoryview, np.ndarray]
+
+
+@dataclass(frozen=True)
+class RawFormat:
+    """Layout of a raw pixel buffer"""
+    width: int
+    height: int
+    pixel_format: str = "bgra"
+    stride: Optional[int] = None  # bytes per row; defaults to tightly packed
+
+    def __post_init__(self):
+        if self.pixel_format not in PIXEL_FORMATS:
+            raise ValueError(f"Unknown pixel format {self.pixel_format!r} "
+                             f"(expected one of {sorted(PIXEL_FORMATS)})")
+        if self.width <= 0 or self.height <= 0:
+            raise ValueError(f"Invalid frame size {self.width}x{self.height}")
+        if self.stride is not None and self.stride < self.row_bytes:
+            raise ValueError(f"Stride {self.stride} is shorter than a row ({self.row_bytes} bytes)")
+
+    @property
+    def channels(self) -> int:
+        return PIXEL_FORMATS[self.pixel_format]
+
+    @property
+    def row_bytes(self) -> int:
+        return self.width * self.channels
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes the buffer must hold (the last row needs no padding)"""
+        return (self.height - 1) * (self.stride or self.row_bytes) + self.row_bytes
+
+    @classmethod
+    def from_header(cls, header: Dict) -> Optional["RawFormat"]:
+        """The raw layout a job header describes, or None for encoded images"""
+        if header.get("width") is None:
+            return None
+        return cls(int(header["width"]), int(header["height"]),
+                   header.get("pixel_format", "bgra"),
+                   int(header["stride"]) if header.get("stride") else None)
+
+
+def raw_view(buffer, fmt: RawFormat) -> np.ndarray:
+    """Zero-copy (height, width[, channels]) view of a raw pixel buffer"""
+    data = memoryview(buffer).cast("B")
+    if len(data) < fmt.nbytes:
+        raise ValueError(f"Raw {fmt.width}x{fmt.height} {fmt.pixel_format} frame needs "
+                         f"{fmt.nbytes} bytes, got {len(data)}")
+    stride = fmt.stride or fmt.row_bytes
+    if fmt.channels == 1:
+        return np.ndarray((fmt.height, fmt.width), np.uint8, data, strides=(stride, 1))
+    return np.ndarray((fmt.height, fmt.width, fmt.channels), np.uint8, data,
+                      strides=(stride, fmt.channels, 1))
+
+
+def convert(pixels: np.ndarray, pixel_format: str, order: str) -> np.ndarray:
+    """A new contiguous array of `pixels` (in `pixel_format`) in `order`"""
+    if pixel_format == order:
+        return np.array(pixels, order="C")
+    return cv2.cvtColor(pixels, _CONVERSIONS[pixel_format, order])
+
+
+def from_raw(buffer, fmt: RawFormat, order: str = "bgr") -> np.ndarray:
+    return convert(raw_view(buffer, fmt), fmt.pixel_format, order)
+
+
+def decode(data, order: str = "bgr") -> np.ndarray:
+    """Decode encoded image bytes (PNG, JPEG, ...)"""
+    flag = cv2.IMREAD_GRAYSCALE if order == "gray" else cv2.IMREAD_COLOR
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), flag)
+    if image is None:
+        raise ValueError("Could not decode image bytes")
+    if order == "rgb":
+        cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=image)
+    return image
+
+
+def read_path(path: Union[str, Path], order: str = "bgr") -> np.ndarray:
+    flag = cv2.IMREAD_GRAYSCALE if order == "gray" else cv2.IMREAD_COLOR
+    image = cv2.imread(str(path), flag)
+    if image is None:
+        raise FileNotFoundError(f"Could not read {path}")
+    if order == "rgb":
+        cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=image)
+    return image
+
+
+def read_shared_memory(name: str, fmt: RawFormat, order: str = "bgr") -> np.ndarray:
+    """Copy a raw frame out of the named shared-memory buffer"""
+    from multiprocessing import shared_memory
+
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        if sys.version_info < (3, 13):
+            # Attaching registers the buffer with the resource tracker, which
+            # would unlink it (from under its producer) when this process exits
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        view = raw_view(shm.buf, fmt)
+        try:
+            return convert(view, fmt.pixel_format, order)
+        finally:
+            del view
+    finally:
+        shm.close()
+
+
+def load(source: FrameSource, order: str = "bgr") -> np.ndarray:
+    """A path, encoded bytes or an array already in `order`"""
+    if isinstance(source, np.ndarray):
+        return source
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return decode(source, order)
+    return read_path(source, order)
+
+
+def load_job(header: Dict, payload: bytes, order: str = "bgr") -> np.ndarray:
+    """
+    The frame a worker job carries: a shared-memory buffer (``shm``), a raw
+    or encoded payload, or an ``image_path``
+    """
+    fmt = RawFormat.from_header(header)
+    if header.get("shm"):
+        if fmt is None:
+            raise ValueError("Shared-memory frames need width, height and pixel_format")
+        return read_shared_memory(header["shm"], fmt, order)
+    if payload:
+        return from_raw(payload, fmt, order) if fmt is not None else decode(payload, order)
+    if header.get("image_path"):
+        return read_path(header["image_path"], order)
+    raise ValueError("Job needs an image_path, an image payload or a shared-memory frame")
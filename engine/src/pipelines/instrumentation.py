@@ -0,0 +1,177 @@
+"""
+Per-stage and per-segment timing for the vision pipelines
+
+Each stage records wall time, CPU time and, optionally, the peak bytes
+allocated while it ran. Stage CPU covers this process and the children it
+waited for, such as tesseract run by an in-process engine; OCR done in a
+ParallelOcrEngine pool worker is not included. Segment-level OCR timings come
+from ``OcrEngine.recognize_many_timed``, measured where the OCR ran, so a
+segment's cpu_ms does include pool work. Each segment also records
+``buffer_bytes``, the computed size of the pixel buffer OCR makes for it (not
+a measured allocation). Every record is also passed to the registered
+metrics hooks, so an external sink (statsd, Prometheus, logs) can pick them up
+as they happen. Each frame summary also carries the process's peak resident
+set size.
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+# A hook receives every record as a dict with a "type" of 'stage', 'segment' or 'frame'
+MetricsHook = Callable[[Dict], None]
+
+_global_hooks: List[MetricsHook] = []
+
+
+def add_metrics_hook(hook: MetricsHook) -> None:
+    """Send records from every pipeline run in this process to `hook`"""
+    _global_hooks.append(hook)
+
+
+def remove_metrics_hook(hook: MetricsHook) -> None:
+    if hook in _global_hooks:
+        _global_hooks.remove(hook)
+
+
+def cpu_seconds() -> float:
+    """
+    CPU time of this process plus the children it has waited for (e.g. a
+    tesseract run). Grandchildren, such as tesseract under a pool worker, are
+    not counted until their own parent exits and is waited for.
+    """
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def reset_peak_rss() -> bool:
+    """
+    Restart the peak-RSS high-water mark so the next reading covers one run
+
+    Only possible on Linux; returns False elsewhere, where the peak covers the
+    whole process lifetime.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process, since the last reset_peak_rss()"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+class Instrumentation:
+    """Collects timing records for one frame"""
+
+    def __init__(self,
+                 trace_allocations: bool = False,
+                 hooks: Sequence[MetricsHook] = ()):
+        """
+        Args:
+            trace_allocations: Record peak allocated bytes per stage via
+                tracemalloc (adds noticeable overhead)
+            hooks: Extra sinks for this frame's records, on top of the global ones
+        """
+        self.trace_allocations = trace_allocations
+        self.hooks = list(hooks)
+        self.stages: List[Dict] = []
+        self.segments: List[Dict] = []
+        self._started = time.perf_counter()
+        self._cpu_started = cpu_seconds()
+
+    def _emit(self, record: Dict) -> None:
+        for hook in [*_global_hooks, *self.hooks]:
+            hook(record)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as one stage"""
+        tracing = self.trace_allocations
+        started_tracing = tracing and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if tracing:
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+
+        wall, cpu = time.perf_counter(), cpu_seconds()
+        try:
+            yield
+        finally:
+            record = {
+                "type": "stage",
+                "name": name,
+                "wall_ms": _ms(time.perf_counter() - wall),
+                "cpu_ms": _ms(cpu_seconds() - cpu),
+                "alloc_bytes": None,
+            }
+            if tracing:
+                _, peak = tracemalloc.get_traced_memory()
+                record["alloc_bytes"] = max(peak - base, 0)
+                if started_tracing:
+                    tracemalloc.stop()
+
+            self.stages.append(record)
+            self._emit(record)
+
+    def segment(self, index: int, wall_ms: float, cpu_ms: float,
+                buffer_bytes: Optional[int] = None, **fields) -> None:
+        """
+        Record the OCR cost of one segment
+
+        `buffer_bytes` is the computed size of the image buffer made for
+        OCR-ing it: the crop as encoded for tesseract, or its part of the
+        masked frame in a frame pass. It is not measured: that copy is often
+        made in a pool process, out of tracemalloc's sight.
+        """
+        record = {"type": "segment", "index": index,
+                  "wall_ms": round(wall_ms, 3), "cpu_ms": round(cpu_ms, 3),
+                  "buffer_bytes": buffer_bytes, **fields}
+        self.segments.append(record)
+        self._emit(record)
+
+    def finish(self, **fields) -> Dict:
+        """Close the frame, emit its summary and return all records"""
+        summary = {
+            "type": "frame",
+            "wall_ms": _ms(time.perf_counter() - self._started),
+            "cpu_ms": _ms(cpu_seconds() - self._cpu_started),
+            "peak_rss_bytes": peak_rss_bytes(),
+            **fields,
+        }
+        self._emit(summary)
+        return self.to_dict(summary)
+
+    def to_dict(self, summary: Optional[Dict] = None) -> Dict:
+        summary = summary or {}
+        return {
+            "total_wall_ms": summary.get("wall_ms", _ms(time.perf_counter() - self._started)),
+            "total_cpu_ms": summary.get("cpu_ms", _ms(cpu_seconds() - self._cpu_started)),
+            "peak_rss_bytes": summary.get("peak_rss_bytes", peak_rss_bytes()),
+            "stages": [{k: v for k, v in s.items() if k != "type"} for s in self.stages],
+            "segments": [{k: v for k, v in s.items() if k != "type"} for s in self.segments],
+        }
@@ -0,0 +1,44 @@
+"""
+Deferred imports for heavy dependencies
+
+cv2, numpy and pytesseract take 50-150 ms each to import. Scripts that may
+exit early, or only hand a job to a warm process, bind these modules as lazy
+proxies. The real import happens on the first attribute access, for example
+``cv2.imread``, and later accesses go straight to the module.
+"""
+
+import importlib
+import sys
+from types import ModuleType
+
+
+class LazyModule(ModuleType):
+    """Stands in for a module until one of its attributes is used"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_module"] = None
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__["_module"]
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        # Only called for names not yet copied into this proxy
+        value = getattr(self._load(), attr)
+        self.__dict__[attr] = value
+        return value
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_import(name: str) -> ModuleType:
+    """The module if it is already imported, otherwise a proxy that imports it on first use"""
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
+
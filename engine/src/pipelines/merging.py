@@ -0,0 +1,160 @@
+"""
+Spatial-index region merging
+
+Boxes are bucketed into a uniform grid, so each box is only compared with the
+boxes in the cells it can reach, and linked pairs are clustered with
+union-find. Unlike a sorted single-predecessor pass this finds every neighbour
+(including across columns) in near-linear time.
+
+Boxes are ``(x, y, w, h)`` rows of an integer array, as in ``TextRegion.bbox``.
+"""
+
+from collections import defaultdict
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+# Vectorised predicate over candidate pairs: (boxes_a, boxes_b) -> bool mask
+LinkPredicate = Callable[[np.ndarray, np.ndarray], np.ndarray]
+
+
+class UnionFind:
+    """Disjoint sets over 0..n-1 with path halving and union by size"""
+
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+        self.size = [1] * n
+
+    def find(self, i: int) -> int:
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, a: int, b: int) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return
+        if self.size[ra] < self.size[rb]:
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        self.size[ra] += self.size[rb]
+
+    def groups(self) -> List[List[int]]:
+        members: Dict[int, List[int]] = defaultdict(list)
+        for i in range(len(self.parent)):
+            members[self.find(i)].append(i)
+        return list(members.values())
+
+
+def candidate_pairs(boxes: np.ndarray, reach: int,
+                    relative_reach: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Index pairs (i < j) whose grown boxes share a grid cell
+
+    Each box is grown by `reach` plus `relative_reach` times its own width
+    (horizontally) or height (vertically). The cell size follows the median
+    grown extent, so typical boxes touch only a few cells regardless of how
+    many boxes there are.
+    """
+    n = len(boxes)
+    empty = np.empty(0, dtype=np.intp)
+    if n < 2:
+        return empty, empty
+
+    pad_x = reach + np.ceil(relative_reach * boxes[:, 2]).astype(np.int64)
+    pad_y = reach + np.ceil(relative_reach * boxes[:, 3]).astype(np.int64)
+    x1 = boxes[:, 0] - pad_x
+    y1 = boxes[:, 1] - pad_y
+    x2 = boxes[:, 0] + boxes[:, 2] + pad_x
+    y2 = boxes[:, 1] + boxes[:, 3] + pad_y
+
+    cell = max(int(np.median(np.maximum(x2 - x1, y2 - y1))), 1)
+    cx1, cy1 = (x1 // cell).tolist(), (y1 // cell).tolist()
+    cx2, cy2 = (x2 // cell).tolist(), (y2 // cell).tolist()
+
+    grid: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+    for i in range(n):
+        for gx in range(cx1[i], cx2[i] + 1):
+            for gy in range(cy1[i], cy2[i] + 1):
+                grid[(gx, gy)].append(i)
+
+    pairs = set()
+    for members in grid.values():
+        for a in range(len(members)):
+            for b in range(a + 1, len(members)):
+                pairs.add((members[a], members[b]))
+
+    if not pairs:
+        return empty, empty
+
+    pair_array = np.array(sorted(pairs), dtype=np.intp)
+    return pair_array[:, 0], pair_array[:, 1]
+
+
+def gaps(a: np.ndarray, b: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Horizontal and vertical gaps between box pairs (negative when they overlap)"""
+    h_gap = np.maximum(b[:, 0] - (a[:, 0] + a[:, 2]), a[:, 0] - (b[:, 0] + b[:, 2]))
+    v_gap = np.maximum(b[:, 1] - (a[:, 1] + a[:, 3]), a[:, 1] - (b[:, 1] + b[:, 3]))
+    return h_gap, v_gap
+
+
+def cluster_boxes(boxes: np.ndarray, linked: LinkPredicate,
+                  reach: int, relative_reach: float = 0.0) -> List[List[int]]:
+    """
+    Group boxes into connected clusters
+
+    Args:
+        boxes: (n, 4) array of (x, y, w, h)
+        linked: Decides, for candidate pairs, which ones are actually linked
+        reach, relative_reach: Bound on the gap at which `linked` can still
+            accept a pair, as pixels plus a fraction of the larger box's size
+
+    Returns:
+        Clusters as lists of box indices, each in (y, x) order, with the clusters
+        ordered by their first box
+    """
+    boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+    n = len(boxes)
+    if n == 0:
+        return []
+
+    uf = UnionFind(n)
+    i, j = candidate_pairs(boxes, reach, relative_reach)
+    if len(i):
+        hit = linked(boxes[i], boxes[j])
+        for a, b in zip(i[hit].tolist(), j[hit].tolist()):
+            uf.union(a, b)
+
+    order = np.lexsort((boxes[:, 0], boxes[:, 1]))
+    rank = np.empty(n, dtype=np.intp)
+    rank[order] = np.arange(n)
+
+    groups = [sorted(g, key=lambda k: rank[k]) for g in uf.groups()]
+    groups.sort(key=lambda g: rank[g[0]])
+    return groups
+
+
+def text_line_linker(merge_threshold: int) -> LinkPredicate:
+    """
+    Link words on the same line or in the same column that are within
+    `merge_threshold` pixels of each other
+    """
+    def linked(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        h_gap, v_gap = gaps(a, b)
+        same_line = np.abs(a[:, 1] - b[:, 1]) < 0.5 * np.maximum(a[:, 3], b[:, 3])
+        same_column = np.abs(a[:, 0] - b[:, 0]) < 0.5 * np.maximum(a[:, 2], b[:, 2])
+        return (same_line & (h_gap < merge_threshold)) | \
+               (same_column & (v_gap < merge_threshold))
+
+    return linked
+
+
+def row_block_linker(max_dy: int, max_gap: int) -> LinkPredicate:
+    """Link blocks whose tops are within `max_dy` and that are under `max_gap` apart horizontally"""
+    def linked(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        h_gap, _ = gaps(a, b)
+        return (np.abs(a[:, 1] - b[:, 1]) < max_dy) & (h_gap < max_gap)
+
+    return linked
@@ -0,0 +1,295 @@
+"""
+Content-addressed OCR result cache
+
+Menus, toolbars and open documents come back pixel-identical across captures
+and restarts. Results are keyed by a hash of the pixels plus the OCR engine
+and settings, kept in a memory-bounded LRU tier, and optionally persisted to
+SQLite so they survive worker restarts.
+
+In 'frame' mode each word goes to the smallest box containing it, so the text
+of a box that overlaps another depends on the rest of the layout, not just
+its pixels. Such boxes are always read and never cached.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Collection, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from pipelines.boxes import overlapping_pairs
+from pipelines.ocr_engine import Box, ImageSource, OcrConfig, OcrEngine, TimedText
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+# Rough per-entry bookkeeping cost on top of the key and value strings
+ENTRY_OVERHEAD = 200
+
+
+def cache_namespace(engine_name: str, config: OcrConfig, frame: bool = False) -> str:
+    """
+    Key prefix for results of one engine with one config
+
+    Boxes read in a frame pass get their own namespace: they can come out
+    slightly differently from their crop.
+    """
+    namespace = f"{engine_name}|{config!r}"
+    return f"{namespace}|frame" if frame else namespace
+
+
+def overlapped(boxes: Sequence[Box]) -> Set[int]:
+    """Indices of the boxes that share pixels with another box"""
+    return {i for pair in overlapping_pairs(boxes) for i in pair}
+
+
+def content_key(image: ImageSource, namespace: str) -> str:
+    """
+    Hash of an image's pixels (or an image file's bytes) plus a settings namespace
+    """
+    h = hashlib.blake2b(digest_size=20)
+    h.update(namespace.encode("utf-8"))
+    if isinstance(image, np.ndarray):
+        h.update(f"|{image.shape}|{image.dtype}|".encode("utf-8"))
+        h.update(np.ascontiguousarray(image).data)
+    else:
+        h.update(b"|file|")
+        h.update(Path(image).read_bytes())
+    return h.hexdigest()
+
+
+class OcrCache:
+    """
+    Two-tier string cache: in-memory LRU bounded by size, plus optional SQLite
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, path: Optional[str] = None):
+        """
+        Args:
+            max_bytes: Approximate memory budget of the LRU tier
+            path: SQLite file for the persisted tier (None = memory only)
+        """
+        self.max_bytes = max_bytes
+        self.path = path
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def _size(key: str, value: str) -> int:
+        return len(key) + len(value) + ENTRY_OVERHEAD
+
+    def _remember(self, key: str, value: str) -> None:
+        if key in self._entries:
+            self._bytes -= self._size(key, self._entries.pop(key))
+        self._entries[key] = value
+        self._bytes += self._size(key, value)
+
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            old_key, old_value = self._entries.popitem(last=False)
+            self._bytes -= self._size(old_key, old_value)
+            self.evictions += 1
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value FROM ocr_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    self._remember(key, row[0])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def put_many(self, items: Dict[str, str]) -> None:
+        if not items:
+            return
+        with self._lock:
+            for key, value in items.items():
+                self._remember(key, value)
+            if self._db is not None:
+                now = time.time()
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO ocr_cache (key, value, created) VALUES (?, ?, ?)",
+                    [(key, value, now) for key, value in items.items()],
+                )
+                self._db.commit()
+
+    def put(self, key: str, value: str) -> None:
+        self.put_many({key: value})
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "evictions": self.evictions,
+        }
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class CachedOcrEngine(OcrEngine):
+    """Wraps an engine; only images the cache has not seen reach it"""
+
+    name = "cached"
+
+    def __init__(self, engine: OcrEngine, cache: OcrCache):
+        super().__init__(engine.config)
+        self.engine = engine
+        self.cache = cache
+        self.namespace = cache_namespace(engine.backend, engine.config)
+        self.region_namespace = cache_namespace(engine.backend, engine.config, frame=True)
+
+    @property
+    def backend(self) -> str:
+        return self.engine.backend
+
+    def recognize(self, image: ImageSource) -> str:
+        return self.recognize_many([image])[0]
+
+    def recognize_many(self, images: Sequence[ImageSource]) -> List[str]:
+        return [text for text, _, _ in self._lookup(images, timed=False)]
+
+    def recognize_many_timed(self, images: Sequence[ImageSource]) -> List[TimedText]:
+        """Cache hits cost (close to) nothing and are reported as 0 ms"""
+        return self._lookup(images, timed=True)
+
+    def iter_recognize_timed(self, images: Sequence[ImageSource]) -> Iterator[Tuple[int, TimedText]]:
+        """Cache hits first, then the misses as the wrapped engine finishes them"""
+        keys = [content_key(image, self.namespace) for image in images]
+        missing = []
+        for i, key in enumerate(keys):
+            text = self.cache.get(key)
+            if text is None:
+                missing.append(i)
+            else:
+                yield i, (text, 0.0, 0.0)
+
+        for j, result in self.engine.iter_recognize_timed([images[i] for i in missing]):
+            self.cache.put(keys[missing[j]], result[0])
+            yield missing[j], result
+
+    def recognize_regions(self, image: np.ndarray, boxes: Sequence[Box]) -> List[str]:
+        """
+        Boxes whose pixels the cache has seen are not part of the frame pass
+
+        Boxes that overlap another box are always part of it (see module docs).
+        """
+        return [text for text, _, _ in self._lookup_regions(image, boxes, timed=False)]
+
+    def recognize_regions_timed(self, image: np.ndarray, boxes: Sequence[Box]) -> List[TimedText]:
+        return self._lookup_regions(image, boxes, timed=True)
+
+    def _lookup_regions(self, image: np.ndarray, boxes: Sequence[Box], timed: bool) -> List[TimedText]:
+        def run(missing: List[int]) -> List[TimedText]:
+            batch = [boxes[i] for i in missing]
+            if timed:
+                return self.engine.recognize_regions_timed(image, batch)
+            return [(text, 0.0, 0.0) for text in self.engine.recognize_regions(image, batch)]
+
+        crops = [image[y1:y2, x1:x2] for x1, y1, x2, y2 in boxes]
+        return self._cached(crops, self.region_namespace, run, skip=overlapped(boxes))
+
+    def _lookup(self, images: Sequence[ImageSource], timed: bool) -> List[TimedText]:
+        def run(missing: List[int]) -> List[TimedText]:
+            batch = [images[i] for i in missing]
+            if timed:
+                return self.engine.recognize_many_timed(batch)
+            return [(text, 0.0, 0.0) for text in self.engine.recognize_many(batch)]
+
+        return self._cached(images, self.namespace, run)
+
+    def _cached(self, images: Sequence[ImageSource], namespace: str,
+                run: Callable[[List[int]], List[TimedText]],
+                skip: Collection[int] = ()) -> List[TimedText]:
+        """
+        Cached results for `images`, with run(indices of the misses) filling the gaps
+
+        Indices in `skip` are neither looked up nor stored: always run.
+        """
+        keys = [None if i in skip else content_key(image, namespace)
+                for i, image in enumerate(images)]
+        results: List[Optional[TimedText]] = []
+        for key in keys:
+            text = self.cache.get(key) if key is not None else None
+            results.append(None if text is None else (text, 0.0, 0.0))
+
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            fresh = run(missing)
+            for i, result in zip(missing, fresh):
+                results[i] = result
+            self.cache.put_many({keys[i]: result[0] for i, result in zip(missing, fresh)
+                                 if keys[i] is not None})
+
+        return results
+
+    def start(self) -> None:
+        self.engine.start()
+
+    def close(self) -> None:
+        self.engine.close()
+
+
+_cache: Optional[OcrCache] = None
+
+
+def get_ocr_cache() -> OcrCache:
+    """
+    Shared cache for this process
+
+    ``OCR_CACHE_MAX_BYTES`` sets the memory budget and ``OCR_CACHE_PATH`` enables
+    the persisted tier.
+    """
+    global _cache
+    if _cache is None:
+        max_bytes = int(os.environ.get("OCR_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+        _cache = OcrCache(max_bytes, os.environ.get("OCR_CACHE_PATH") or None)
+    return _cache
+
+
+def cache_enabled() -> bool:
+    """Caching is on unless ``OCR_CACHE=0``"""
+    return os.environ.get("OCR_CACHE", "1") != "0"
+
+
+def cached(engine: OcrEngine) -> OcrEngine:
+    """Put the shared cache in front of an engine, if caching is enabled"""
+    if not cache_enabled():
+        return engine
+    return CachedOcrEngine(engine, get_ocr_cache())
@@ -0,0 +1,423 @@
+"""
+OCR engines shared by the vision pipelines
+
+An engine is created once and reused for every segment of a frame and across
+frames, so the recognizer (and its language model) is only loaded once:
+
+- ``TesserocrEngine``: a persistent in-process Tesseract session (needs the
+  optional ``tesserocr`` package)
+- ``TesseractBatchEngine``: one ``tesseract`` invocation per batch, so the
+  model is loaded once per frame instead of once per segment
+- ``TesseractCliEngine``: the original one-process-per-image CLI call, kept as
+  the fallback
+
+Images may be paths or numpy arrays. Arrays never touch disk: they are handed
+to tesserocr as raw pixels or piped to the CLI on stdin as uncompressed
+PNM/TIFF.
+
+Segments of one frame can be OCR'd two ways (``OCR_MODE``):
+
+- ``crops``: every segment is cropped and recognised on its own (the default)
+- ``frame``: ``recognize_regions`` hands the engine the whole frame once and
+  restricts recognition to the segment rectangles. Tesserocr sets the image
+  once and moves a rectangle over it. The CLI engines run a single pass over
+  the frame with everything outside the segments blanked, and assign each
+  word to the segment that contains its centre.
+"""
+
+import io
+import os
+import subprocess
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from pipelines.instrumentation import cpu_seconds
+
+try:
+    import tesserocr
+except ImportError:  # optional dependency
+    tesserocr = None
+
+ImageSource = Union[str, Path, np.ndarray]
+
+# (x1, y1, x2, y2) in frame pixels
+Box = Tuple[int, int, int, int]
+
+# (text, wall ms, cpu ms) for one image
+TimedText = Tuple[str, float, float]
+
+# Tesseract's text renderer ends every page with a form feed
+PAGE_SEPARATOR = "\f"
+
+OCR_MODES = ("crops", "frame")
+
+# Columns of tesseract's TSV output, as returned by pytesseract.image_to_data
+TSV_INT_COLUMNS = ("level", "page_num", "block_num", "par_num", "line_num",
+                   "word_num", "left", "top", "width", "height")
+# TSV rows at this level are words
+WORD_LEVEL = 5
+
+
+def ocr_mode() -> str:
+    """How segments are OCR'd: ``OCR_MODE`` ('crops' or 'frame'), default 'crops'"""
+    mode = os.environ.get("OCR_MODE", "crops")
+    if mode not in OCR_MODES:
+        raise ValueError(f"Unknown OCR mode '{mode}', expected one of {list(OCR_MODES)}")
+    return mode
+
+
+@dataclass(frozen=True)
+class OcrConfig:
+    """Recognizer settings shared by all engines"""
+    lang: str = "eng"
+    psm: Optional[int] = None
+    oem: Optional[int] = None
+
+    def cli_args(self) -> List[str]:
+        args = ["-l", self.lang]
+        if self.psm is not None:
+            args += ["--psm", str(self.psm)]
+        if self.oem is not None:
+            args += ["--oem", str(self.oem)]
+        return args
+
+
+class OcrEngine:
+    """Base class: turn images (paths or arrays) into text"""
+
+    name = "base"
+
+    def __init__(self, config: Optional[OcrConfig] = None):
+        self.config = config or OcrConfig()
+
+    @property
+    def backend(self) -> str:
+        """Name of the engine that actually reads the pixels (wrappers report the wrapped one)"""
+        return self.name
+
+    def recognize(self, image: ImageSource) -> str:
+        raise NotImplementedError
+
+    def recognize_many(self, images: Sequence[ImageSource]) -> List[str]:
+        return [self.recognize(image) for image in images]
+
+    def recognize_many_timed(self, images: Sequence[ImageSource]) -> List[TimedText]:
+        """Like recognize_many, with the wall and CPU time spent on each image"""
+        results = []
+        for image in images:
+            wall, cpu = time.perf_counter(), cpu_seconds()
+            text = self.recognize(image)
+            results.append((text, (time.perf_counter() - wall) * 1000,
+                            (cpu_seconds() - cpu) * 1000))
+        return results
+
+    def iter_recognize_timed(self, images: Sequence[ImageSource]) -> Iterator[Tuple[int, TimedText]]:
+        """
+        (index, timed text) pairs, each yielded as soon as that image is done
+
+        Results may come out of order; use this when the first texts matter
+        more than the total time.
+        """
+        for i, image in enumerate(images):
+            yield i, self.recognize_many_timed([image])[0]
+
+    def recognize_regions(self, image: np.ndarray, boxes: Sequence[Box]) -> List[str]:
+        """
+        Text of each box of one frame, in the order given
+
+        This base version OCRs each box as its own crop. Engines that can
+        analyse the frame once and recognise only inside the boxes override it.
+        """
+        return self.recognize_many([image[y1:y2, x1:x2] for x1, y1, x2, y2 in boxes])
+
+    def recognize_regions_timed(self, image: np.ndarray, boxes: Sequence[Box]) -> List[TimedText]:
+        """recognize_regions, with the time of the whole call shared out by box area"""
+        wall, cpu = time.perf_counter(), cpu_seconds()
+        texts = self.recognize_regions(image, boxes)
+        return _share_time(texts, [(x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in boxes],
+                           (time.perf_counter() - wall) * 1000, (cpu_seconds() - cpu) * 1000)
+
+    def start(self) -> None:
+        """Load the recognizer ahead of the first image"""
+
+    def close(self) -> None:
+        pass
+
+
+def _run_tesseract(source: str, args: List[str], stdin: Optional[bytes] = None) -> str:
+    result = subprocess.run(
+        ["tesseract", source, "stdout", *args],
+        input=stdin,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        check=False,
+    )
+    if result.returncode != 0:
+        stderr = result.stderr.decode("utf-8", "replace").strip()
+        raise RuntimeError(f"tesseract failed on {source}: {stderr}")
+    return result.stdout.decode("utf-8", "replace")
+
+
+def _encode_pnm(image: np.ndarray) -> bytes:
+    ok, buf = cv2.imencode(".pnm", image)
+    if not ok:
+        raise ValueError(f"Could not encode image of shape {image.shape}")
+    return buf.tobytes()
+
+
+def _share_time(texts: Sequence[str], sizes: Sequence[int],
+                wall_ms: float, cpu_ms: float) -> List[TimedText]:
+    """Split the cost of one call that produced all of `texts` in proportion to `sizes`"""
+    total = sum(sizes) or 1
+    return [(text, wall_ms * size / total, cpu_ms * size / total)
+            for text, size in zip(texts, sizes)]
+
+
+def parse_tsv(tsv: str) -> Dict[str, list]:
+    """Tesseract TSV as the column dict ``pytesseract.Output.DICT`` gives"""
+    lines = tsv.splitlines()
+    if not lines:
+        return {}
+
+    columns = lines[0].split("\t")
+    data: Dict[str, list] = {name: [] for name in columns}
+    for line in lines[1:]:
+        values = line.split("\t")
+        if len(values) < len(columns):
+            values += [""] * (len(columns) - len(values))
+        for name, value in zip(columns, values):
+            if name in TSV_INT_COLUMNS:
+                data[name].append(int(value))
+            elif name == "conf":
+                data[name].append(float(value))
+            else:
+                data[name].append(value)
+    return data
+
+
+def masked_frame(image: np.ndarray, boxes: Sequence[Box]) -> np.ndarray:
+    """
+    Grayscale copy of a frame with everything outside `boxes` set to the
+    frame's background level, so a full-frame pass only finds text in them
+    """
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    background = int(np.median(gray[::8, ::8]))
+    masked = np.full_like(gray, background)
+    for x1, y1, x2, y2 in boxes:
+        masked[y1:y2, x1:x2] = gray[y1:y2, x1:x2]
+    return masked
+
+
+def texts_by_region(data: Dict[str, list], boxes: Sequence[Box]) -> List[str]:
+    """
+    Group the words of a full-frame TSV result by the box containing each
+    word's centre (the smallest one, where boxes nest): words joined by
+    spaces, tesseract's lines by newlines
+    """
+    lines: List[Dict[tuple, List[str]]] = [{} for _ in boxes]
+    words = [i for i, level in enumerate(data.get("level", ()))
+             if level == WORD_LEVEL and data["text"][i].strip()]
+    if words and len(boxes):
+        b = np.asarray(boxes)
+        cx = np.array([data["left"][i] + data["width"][i] // 2 for i in words])[:, None]
+        cy = np.array([data["top"][i] + data["height"][i] // 2 for i in words])[:, None]
+        inside = (b[:, 0] <= cx) & (cx < b[:, 2]) & (b[:, 1] <= cy) & (cy < b[:, 3])
+        area = np.where(inside, (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1]), np.inf)
+        owners = np.where(inside.any(axis=1), area.argmin(axis=1), -1)
+        for i, owner in zip(words, owners.tolist()):
+            if owner >= 0:
+                line = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+                lines[owner].setdefault(line, []).append(data["text"][i].strip())
+    return ["\n".join(" ".join(line) for line in region.values()) for region in lines]
+
+
+def _recognize_frame_pass(image: np.ndarray, boxes: Sequence[Box], config: OcrConfig) -> List[str]:
+    """One ``tesseract`` run over the masked frame, split back into the boxes"""
+    if not len(boxes):
+        return []
+    tsv = _run_tesseract("stdin", config.cli_args() + ["tsv"],
+                         _encode_pnm(masked_frame(image, boxes)))
+    return texts_by_region(parse_tsv(tsv), boxes)
+
+
+def _encode_multipage_tiff(images: Sequence[np.ndarray]) -> bytes:
+    pages = [Image.fromarray(np.ascontiguousarray(image)) for image in images]
+    out = io.BytesIO()
+    pages[0].save(out, format="TIFF", save_all=True, append_images=pages[1:])
+    return out.getvalue()
+
+
+class TesseractCliEngine(OcrEngine):
+    """One ``tesseract`` process per image (fallback)"""
+
+    name = "cli"
+
+    def recognize(self, image: ImageSource) -> str:
+        if isinstance(image, np.ndarray):
+            text = _run_tesseract("stdin", self.config.cli_args(), _encode_pnm(image))
+        else:
+            text = _run_tesseract(str(image), self.config.cli_args())
+        return text.strip()
+
+    def recognize_regions(self, image: np.ndarray, boxes: Sequence[Box]) -> List[str]:
+        return _recognize_frame_pass(image, boxes, self.config)
+
+
+class TesseractBatchEngine(OcrEngine):
+    """
+    One ``tesseract`` process per batch of images
+
+    Tesseract reads a batch as one multi-page document - a multi-page TIFF on
+    stdin for arrays, or a list file for paths - so the language model is
+    loaded once and each image comes back as one page.
+    """
+
+    name = "batch"
+
+    def recognize(self, image: ImageSource) -> str:
+        return self.recognize_many([image])[0]
+
+    def recognize_many(self, images: Sequence[ImageSource]) -> List[str]:
+        if not images:
+            return []
+
+        if all(isinstance(image, np.ndarray) for image in images):
+            output = _run_tesseract("stdin", self.config.cli_args(),
+                                    _encode_multipage_tiff(images))
+        else:
+            output = self._run_list_file(images)
+
+        pages = output.split(PAGE_SEPARATOR)
+        if len(pages) < len(images):
+            raise RuntimeError(
+                f"tesseract returned {len(pages)} pages for {len(images)} images"
+            )
+        return [page.strip() for page in pages[:len(images)]]
+
+    def recognize_many_timed(self, images: Sequence[ImageSource]) -> List[TimedText]:
+        """
+        One process serves the whole batch, so its cost is shared out by pixel count
+        """
+        wall, cpu = time.perf_counter(), cpu_seconds()
+        texts = self.recognize_many(images)
+        sizes = [image.shape[0] * image.shape[1] if isinstance(image, np.ndarray) else 1
+                 for image in images]
+        return _share_time(texts, sizes, (time.perf_counter() - wall) * 1000,
+                           (cpu_seconds() - cpu) * 1000)
+
+    def recognize_regions(self, image: np.ndarray, boxes: Sequence[Box]) -> List[str]:
+        return _recognize_frame_pass(image, boxes, self.config)
+
+    def _run_list_file(self, images: Sequence[ImageSource]) -> str:
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = []
+            for i, image in enumerate(images):
+                if isinstance(image, np.ndarray):
+                    path = os.path.join(tmp, f"{i:04}.pnm")
+                    Path(path).write_bytes(_encode_pnm(image))
+                else:
+                    path = str(Path(image).resolve())
+                paths.append(path)
+
+            list_path = os.path.join(tmp, "images.txt")
+            Path(list_path).write_text("\n".join(paths) + "\n", encoding="utf-8")
+            return _run_tesseract(list_path, self.config.cli_args())
+
+
+class TesserocrEngine(OcrEngine):
+    """Persistent in-process Tesseract session"""
+
+    name = "tesserocr"
+
+    def __init__(self, config: Optional[OcrConfig] = None):
+        super().__init__(config)
+        if tesserocr is None:
+            raise RuntimeError("tesserocr is not installed")
+
+        self._api = tesserocr.PyTessBaseAPI(lang=self.config.lang)
+        if self.config.psm is not None:
+            self._api.SetPageSegMode(self.config.psm)
+
+    def recognize(self, image: ImageSource) -> str:
+        if isinstance(image, np.ndarray):
+            self._set_array(image)
+        else:
+            self._api.SetImageFile(str(image))
+        return self._api.GetUTF8Text().strip()
+
+    def recognize_regions(self, image: np.ndarray, boxes: Sequence[Box]) -> List[str]:
+        """Set the frame once, then recognise inside one rectangle at a time"""
+        if not len(boxes):
+            return []
+        self._set_array(image)
+        texts = []
+        for x1, y1, x2, y2 in boxes:
+            self._api.SetRectangle(x1, y1, x2 - x1, y2 - y1)
+            texts.append(self._api.GetUTF8Text().strip())
+        return texts
+
+    def _set_array(self, image: np.ndarray) -> None:
+        image = np.ascontiguousarray(image)
+        height, width = image.shape[:2]
+        channels = 1 if image.ndim == 2 else image.shape[2]
+        self._api.SetImageBytes(image.tobytes(), width, height, channels, width * channels)
+
+    def close(self) -> None:
+        self._api.End()
+
+
+ENGINES = {
+    TesserocrEngine.name: TesserocrEngine,
+    TesseractBatchEngine.name: TesseractBatchEngine,
+    TesseractCliEngine.name: TesseractCliEngine,
+}
+
+_engines: Dict[tuple, OcrEngine] = {}
+
+
+def resolve_engine_name(name: Optional[str] = None) -> str:
+    """
+    Concrete engine name for `name`
+
+    None falls back to the ``OCR_ENGINE`` environment variable, then 'auto';
+    'auto' is tesserocr when installed, otherwise batch.
+    """
+    name = name or os.environ.get("OCR_ENGINE", "auto")
+    if name == "auto":
+        name = TesserocrEngine.name if tesserocr is not None else TesseractBatchEngine.name
+    if name not in ENGINES:
+        raise ValueError(f"Unknown OCR engine '{name}', expected one of {sorted(ENGINES)}")
+    return name
+
+
+def create_engine(name: str = "auto", config: Optional[OcrConfig] = None) -> OcrEngine:
+    """
+    Build a new engine
+
+    Args:
+        name: 'tesserocr', 'batch', 'cli', or 'auto' (tesserocr when installed,
+            otherwise batch)
+        config: Recognizer settings
+    """
+    return ENGINES[resolve_engine_name(name)](config)
+
+
+def get_engine(name: Optional[str] = None, config: Optional[OcrConfig] = None) -> OcrEngine:
+    """
+    Shared engine for this process, created on first use
+
+    The engine name defaults to the ``OCR_ENGINE`` environment variable, then 'auto'.
+    """
+    name = name or os.environ.get("OCR_ENGINE", "auto")
+    config = config or OcrConfig()
+    key = (name, config)
+    if key not in _engines:
+        _engines[key] = create_engine(name, config)
+    return _engines[key]
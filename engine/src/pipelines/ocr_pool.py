@@ -0,0 +1,203 @@
+"""
+Parallel OCR across a process pool
+
+Each pool process builds its own OCR engine once (see ``ocr_engine``) and keeps
+it for the life of the pool. Segments are split into contiguous chunks, so
+results come back in the order they were given - callers pass segments in
+reading order and get texts in reading order. In 'frame' mode each worker
+gets the band of the frame that covers its share of the segments.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from pipelines.ocr_engine import (
+    Box, ImageSource, OcrConfig, OcrEngine, TimedText, get_engine, resolve_engine_name,
+)
+
+# Chunks handed out per worker: more than one evens out dense vs sparse
+# segments, few enough that batch engines still load the model rarely.
+CHUNKS_PER_WORKER = 2
+
+
+def available_cores() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def resolve_max_workers(max_workers: Optional[int] = None) -> int:
+    """
+    Worker count: explicit value, else ``OCR_MAX_WORKERS``, else the core count
+    """
+    if max_workers is None:
+        env = os.environ.get("OCR_MAX_WORKERS")
+        max_workers = int(env) if env else available_cores()
+    return max(1, min(max_workers, available_cores()))
+
+
+def _init_worker(engine_name: Optional[str], config: OcrConfig) -> None:
+    get_engine(engine_name, config)
+
+
+def _recognize_chunk(engine_name: Optional[str], config: OcrConfig,
+                     images: Sequence[ImageSource]) -> List[str]:
+    return get_engine(engine_name, config).recognize_many(images)
+
+
+def _recognize_chunk_timed(engine_name: Optional[str], config: OcrConfig,
+                           images: Sequence[ImageSource]) -> List[TimedText]:
+    return get_engine(engine_name, config).recognize_many_timed(images)
+
+
+def _recognize_regions_chunk(engine_name: Optional[str], config: OcrConfig,
+                             image: np.ndarray, boxes: Sequence[Box]) -> List[str]:
+    return get_engine(engine_name, config).recognize_regions(image, boxes)
+
+
+def _split(items: Sequence, n_chunks: int) -> List[Sequence]:
+    size, extra = divmod(len(items), n_chunks)
+    chunks, start = [], 0
+    for i in range(n_chunks):
+        end = start + size + (1 if i < extra else 0)
+        chunks.append(items[start:end])
+        start = end
+    return chunks
+
+
+class ParallelOcrEngine(OcrEngine):
+    """
+    OCR engine that fans ``recognize_many`` out over a process pool
+
+    The pool starts on first use and is reused for every later frame.
+    """
+
+    name = "parallel"
+
+    def __init__(self,
+                 engine_name: Optional[str] = None,
+                 config: Optional[OcrConfig] = None,
+                 max_workers: Optional[int] = None):
+        super().__init__(config)
+        self.engine_name = engine_name
+        self.max_workers = resolve_max_workers(max_workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def backend(self) -> str:
+        return resolve_engine_name(self.engine_name)
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=(self.engine_name, self.config),
+            )
+        return self._executor
+
+    def start(self) -> None:
+        """Spawn every pool process and load its engine ahead of the first frame"""
+        pool = self._pool()
+        for future in [pool.submit(_init_worker, self.engine_name, self.config)
+                       for _ in range(self.max_workers)]:
+            future.result()
+
+    def recognize(self, image: ImageSource) -> str:
+        return get_engine(self.engine_name, self.config).recognize(image)
+
+    def recognize_many(self, images: Sequence[ImageSource]) -> List[str]:
+        images = list(images)
+        if self.max_workers == 1 or len(images) < 2:
+            return get_engine(self.engine_name, self.config).recognize_many(images)
+        return self._fan_out(_recognize_chunk, images)
+
+    def recognize_many_timed(self, images: Sequence[ImageSource]) -> List[TimedText]:
+        images = list(images)
+        if self.max_workers == 1 or len(images) < 2:
+            return get_engine(self.engine_name, self.config).recognize_many_timed(images)
+        return self._fan_out(_recognize_chunk_timed, images)
+
+    def iter_recognize_timed(self, images: Sequence[ImageSource]) -> Iterator[Tuple[int, TimedText]]:
+        """One image per task, so each text is yielded as soon as its worker finishes"""
+        images = list(images)
+        if self.max_workers == 1 or len(images) < 2:
+            yield from get_engine(self.engine_name, self.config).iter_recognize_timed(images)
+            return
+
+        futures = {
+            self._pool().submit(_recognize_chunk_timed, self.engine_name, self.config, [image]): i
+            for i, image in enumerate(images)
+        }
+        try:
+            for future in as_completed(futures):
+                yield futures[future], future.result()[0]
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def recognize_regions(self, image: np.ndarray, boxes: Sequence[Box]) -> List[str]:
+        """
+        One frame pass per worker, each over its share of the boxes
+
+        Only the part of the frame those boxes span is sent to the worker.
+        """
+        boxes = list(boxes)
+        if self.max_workers == 1 or len(boxes) < 2:
+            return get_engine(self.engine_name, self.config).recognize_regions(image, boxes)
+
+        futures = []
+        for chunk in _split(boxes, min(len(boxes), self.max_workers)):
+            x1, y1 = min(b[0] for b in chunk), min(b[1] for b in chunk)
+            x2, y2 = max(b[2] for b in chunk), max(b[3] for b in chunk)
+            shifted = [(bx1 - x1, by1 - y1, bx2 - x1, by2 - y1) for bx1, by1, bx2, by2 in chunk]
+            futures.append(self._pool().submit(_recognize_regions_chunk, self.engine_name,
+                                               self.config, image[y1:y2, x1:x2], shifted))
+
+        results = []
+        for future in futures:
+            results.extend(future.result())
+        return results
+
+    def _fan_out(self, fn, images: List[ImageSource]) -> list:
+        n_chunks = min(len(images), self.max_workers * CHUNKS_PER_WORKER)
+        chunks = _split(images, n_chunks)
+        futures = [
+            self._pool().submit(fn, self.engine_name, self.config, chunk)
+            for chunk in chunks
+        ]
+
+        results = []
+        for future in futures:
+            results.extend(future.result())
+        return results
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+_parallel_engines: Dict[tuple, ParallelOcrEngine] = {}
+
+
+def get_parallel_engine(max_workers: Optional[int] = None,
+                        engine_name: Optional[str] = None,
+                        config: Optional[OcrConfig] = None) -> OcrEngine:
+    """
+    Shared parallel engine for this process
+
+    With a single worker this is just the plain shared engine.
+    """
+    max_workers = resolve_max_workers(max_workers)
+    config = config or OcrConfig()
+    if max_workers == 1:
+        return get_engine(engine_name, config)
+
+    key = (max_workers, engine_name, config)
+    if key not in _parallel_engines:
+        _parallel_engines[key] = ParallelOcrEngine(engine_name, config, max_workers)
+    return _parallel_engines[key]
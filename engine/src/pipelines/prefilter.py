@@ -0,0 +1,136 @@
+"""
+Text-likelihood prefilter: skip OCR on segments that hold no text
+
+Segmentation keeps every large enough blob, so photos, video frames, icons and
+plain panels are sent to tesseract too, only to come back empty. This stage
+scores each segment from its pixels alone, far cheaper than OCR:
+
+- edge density: fraction of pixels on a strong (Canny) edge. Text has crisp,
+  high-contrast glyph outlines; gradients, flat panels and soft photos have
+  almost none.
+- foreground ratio: fraction of pixels that are not flat background. Rendered
+  text sits on a uniform (or gently shaded) background; photos and video are
+  textured almost everywhere.
+- stroke-width consistency: coefficient of variation of the stroke widths
+  measured on the ink mask. Glyphs are drawn with a pen of roughly constant
+  width; blobs and clutter are not.
+
+Each feature is mapped to [0, 1] and the score is their product, so any one
+clearly non-text feature rules a segment out. Segments scoring below the
+threshold (``OCR_TEXT_THRESHOLD``, default DEFAULT_THRESHOLD; 0 disables the
+prefilter) are skipped. Text printed inside photos is skipped along with the
+photo.
+
+Boxes are ``(x1, y1, x2, y2)`` in frame pixels, as in ``screenshot_pipeline``.
+"""
+
+import os
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+Box = Tuple[int, int, int, int]
+
+DEFAULT_THRESHOLD = 0.5
+
+# Canny hysteresis thresholds for "strong" edges
+EDGE_THRESHOLDS = (100, 200)
+# Local contrast (3x3 max - min) up to which a pixel counts as flat background
+FLAT_CONTRAST = 12
+# Adaptive (local mean) threshold for the ink mask stroke widths are measured on
+INK_BLOCK = 15
+INK_C = 9
+
+# (zero score, full score) for each feature
+EDGE_DENSITY_RANGE = (0.001, 0.005)
+FOREGROUND_RANGE = (0.7, 0.5)
+STROKE_CV_RANGE = (1.0, 0.6)
+
+_KERNEL = np.ones((3, 3), np.uint8)
+
+
+def default_threshold() -> float:
+    return float(os.environ.get("OCR_TEXT_THRESHOLD", DEFAULT_THRESHOLD))
+
+
+def _ramp(value: float, zero: float, full: float) -> float:
+    """0 at `zero`, 1 at `full`, linear in between (either direction)"""
+    return float(np.clip((value - zero) / (full - zero), 0.0, 1.0))
+
+
+def _edge_density(gray: np.ndarray) -> float:
+    return cv2.countNonZero(cv2.Canny(gray, *EDGE_THRESHOLDS)) / gray.size
+
+
+def _foreground_ratio(gray: np.ndarray) -> float:
+    contrast = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, _KERNEL)
+    return 1.0 - cv2.countNonZero(cv2.compare(contrast, FLAT_CONTRAST, cv2.CMP_LE)) / gray.size
+
+
+def _stroke_cv(gray: np.ndarray) -> float:
+    """Variation of half stroke widths (distance to the edge along each stroke's centre line)"""
+    ink = cv2.adaptiveThreshold(gray, 1, cv2.ADAPTIVE_THRESH_MEAN_C,
+                                cv2.THRESH_BINARY_INV, INK_BLOCK, INK_C)
+    dist = cv2.distanceTransform(ink, cv2.DIST_L2, 3)
+    widths = dist[(ink > 0) & (dist >= cv2.dilate(dist, _KERNEL))]
+    return float(widths.std() / widths.mean()) if widths.size else float("inf")
+
+
+@dataclass(frozen=True)
+class TextFeatures:
+    edge_density: float
+    foreground_ratio: float
+    stroke_cv: float  # inf when there is no ink at all
+
+    @property
+    def score(self) -> float:
+        return (_ramp(self.edge_density, *EDGE_DENSITY_RANGE)
+                * _ramp(self.foreground_ratio, *FOREGROUND_RANGE)
+                * _ramp(self.stroke_cv, *STROKE_CV_RANGE))
+
+
+def text_features(gray: np.ndarray) -> TextFeatures:
+    """Text-likelihood features of one grayscale segment"""
+    return TextFeatures(_edge_density(gray), _foreground_ratio(gray), _stroke_cv(gray))
+
+
+def text_score(gray: np.ndarray) -> float:
+    """text_features(gray).score, without measuring strokes once the score is 0"""
+    score = (_ramp(_edge_density(gray), *EDGE_DENSITY_RANGE)
+             * _ramp(_foreground_ratio(gray), *FOREGROUND_RANGE))
+    if score == 0.0:
+        return 0.0
+    return score * _ramp(_stroke_cv(gray), *STROKE_CV_RANGE)
+
+
+def _gray(image: np.ndarray) -> np.ndarray:
+    if image.ndim == 2:
+        return image
+    if image.shape[2] == 4:
+        return cv2.cvtColor(image, cv2.COLOR_BGRA2GRAY)
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+
+def text_scores(image: np.ndarray, boxes: Sequence[Box]) -> np.ndarray:
+    """Text-likelihood score in [0, 1] of each box of a frame (gray or BGR/RGB)"""
+    gray = _gray(image)
+    return np.array([text_score(gray[y1:y2, x1:x2])
+                     for x1, y1, x2, y2 in boxes], dtype=np.float64)
+
+
+def split_boxes(image: np.ndarray, boxes: Sequence[Box],
+                threshold: Optional[float] = None) -> Tuple[List[Box], List[Box]]:
+    """
+    (boxes worth OCR-ing, skipped boxes), each in their original order
+
+    `threshold` defaults to default_threshold(); 0 or less keeps every box
+    without scoring.
+    """
+    threshold = default_threshold() if threshold is None else threshold
+    if threshold <= 0 or not len(boxes):
+        return list(boxes), []
+    keep = text_scores(image, boxes) >= threshold
+    return ([b for b, k in zip(boxes, keep) if k],
+            [b for b, k in zip(boxes, keep) if not k])
@@ -0,0 +1,191 @@
+"""
+Columnar storage for word- and block-level text regions
+
+A frame can have thousands of words. Rather than one dataclass object per
+word, ``RegionTable`` keeps each field as a column: ``x``, ``y``, ``w``,
+``h`` (int32), ``confidence`` (float64), ``type_code`` (uint8, interned region
+type names) and ``text`` (object array). Filters, sorts and concatenation work
+on whole columns.
+
+Indexing a table with an int gives a ``RegionView``, which has the same
+attributes as ``vision_pipeline.TextRegion`` (``text``, ``bbox``,
+``confidence``, ``region_type``, ``center``), so code that iterates over
+regions keeps working. Indexing with a slice, mask or index array gives a new
+table.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple, Union
+
+import numpy as np
+
+# Interned region type names; a type's code is its index here
+_TYPE_NAMES: List[str] = []
+_TYPE_CODES: Dict[str, int] = {}
+
+
+def type_code(name: str) -> int:
+    """Code for a region type name, interning it on first use"""
+    code = _TYPE_CODES.get(name)
+    if code is None:
+        code = len(_TYPE_NAMES)
+        if code > np.iinfo(np.uint8).max:
+            raise ValueError("Too many distinct region types")
+        _TYPE_NAMES.append(name)
+        _TYPE_CODES[name] = code
+    return code
+
+
+def type_name(code: int) -> str:
+    return _TYPE_NAMES[code]
+
+
+def type_codes(names: Iterable[str]) -> np.ndarray:
+    return np.array([type_code(name) for name in names], dtype=np.uint8)
+
+
+class RegionView:
+    """One row of a RegionTable, with the TextRegion attributes"""
+
+    __slots__ = ("_table", "_i")
+
+    def __init__(self, table: "RegionTable", i: int):
+        self._table = table
+        self._i = i
+
+    @property
+    def text(self) -> str:
+        return self._table.text[self._i]
+
+    @text.setter
+    def text(self, value: str) -> None:
+        self._table.text[self._i] = value
+
+    @property
+    def bbox(self) -> Tuple[int, int, int, int]:
+        t, i = self._table, self._i
+        return (int(t.x[i]), int(t.y[i]), int(t.w[i]), int(t.h[i]))
+
+    @bbox.setter
+    def bbox(self, value: Tuple[int, int, int, int]) -> None:
+        t, i = self._table, self._i
+        t.x[i], t.y[i], t.w[i], t.h[i] = value
+
+    @property
+    def confidence(self) -> float:
+        return float(self._table.confidence[self._i])
+
+    @property
+    def region_type(self) -> str:
+        return _TYPE_NAMES[self._table.type_code[self._i]]
+
+    @property
+    def center(self) -> Tuple[int, int]:
+        x, y, w, h = self.bbox
+        return (x + w // 2, y + h // 2)
+
+    def __repr__(self) -> str:
+        return (f"RegionView(text={self.text!r}, bbox={self.bbox}, "
+                f"confidence={self.confidence}, region_type={self.region_type!r})")
+
+
+Index = Union[int, slice, np.ndarray, Sequence[int]]
+
+
+class RegionTable:
+    """A sequence of text regions stored column by column"""
+
+    __slots__ = ("text", "x", "y", "w", "h", "confidence", "type_code")
+
+    def __init__(self, text, x, y, w, h, confidence, type_code):
+        self.text = np.asarray(text, dtype=object).reshape(-1)
+        self.x = np.asarray(x, dtype=np.int32)
+        self.y = np.asarray(y, dtype=np.int32)
+        self.w = np.asarray(w, dtype=np.int32)
+        self.h = np.asarray(h, dtype=np.int32)
+        self.confidence = np.asarray(confidence, dtype=np.float64)
+        self.type_code = np.asarray(type_code, dtype=np.uint8)
+
+    @classmethod
+    def empty(cls) -> "RegionTable":
+        return cls([], [], [], [], [], [], [])
+
+    @classmethod
+    def from_regions(cls, regions: Iterable) -> "RegionTable":
+        """Build from TextRegion-like objects (or return a table unchanged)"""
+        if isinstance(regions, RegionTable):
+            return regions
+        regions = list(regions)
+        if not regions:
+            return cls.empty()
+        boxes = np.array([r.bbox for r in regions], dtype=np.int32).reshape(-1, 4)
+        return cls(
+            [r.text for r in regions],
+            boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3],
+            [r.confidence for r in regions],
+            type_codes(r.region_type for r in regions),
+        )
+
+    @classmethod
+    def concat(cls, tables: Sequence["RegionTable"]) -> "RegionTable":
+        tables = [t for t in tables if len(t)]
+        if not tables:
+            return cls.empty()
+        if len(tables) == 1:
+            return tables[0]
+        return cls(*(np.concatenate([getattr(t, name) for t in tables])
+                     for name in cls.__slots__))
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def __iter__(self) -> Iterator[RegionView]:
+        for i in range(len(self)):
+            yield RegionView(self, i)
+
+    def __getitem__(self, index: Index):
+        if isinstance(index, (int, np.integer)):
+            n = len(self)
+            if not -n <= index < n:
+                raise IndexError("region index out of range")
+            return RegionView(self, int(index) % n)
+        return self.take(index)
+
+    def __repr__(self) -> str:
+        return f"RegionTable({len(self)} regions)"
+
+    def take(self, index: Index) -> "RegionTable":
+        """Rows selected by a slice, boolean mask or index array, as a new table"""
+        if not isinstance(index, slice):
+            index = np.asarray(index)
+            if index.dtype != bool:
+                index = index.astype(np.intp)
+        return RegionTable(*(getattr(self, name)[index] for name in self.__slots__))
+
+    def boxes(self) -> np.ndarray:
+        """(n, 4) int64 array of (x, y, w, h)"""
+        return np.stack([self.x, self.y, self.w, self.h], axis=1).astype(np.int64)
+
+    def corners(self) -> np.ndarray:
+        """(n, 4) int64 array of (x1, y1, x2, y2)"""
+        x, y = self.x.astype(np.int64), self.y.astype(np.int64)
+        return np.stack([x, y, x + self.w, y + self.h], axis=1)
+
+    def shifted(self, dx: int, dy: int) -> "RegionTable":
+        """The same regions moved by (dx, dy)"""
+        return RegionTable(self.text, self.x + dx, self.y + dy, self.w, self.h,
+                           self.confidence, self.type_code)
+
+    def reading_order(self) -> np.ndarray:
+        """Indices sorting the regions by (y, x), ties kept in table order"""
+        return np.lexsort((self.x, self.y))
+
+    def of_type(self, *names: str) -> np.ndarray:
+        """Mask of regions whose type is one of `names`"""
+        codes = [_TYPE_CODES[name] for name in names if name in _TYPE_CODES]
+        return np.isin(self.type_code, codes)
+
+    def region_types(self) -> List[str]:
+        return [_TYPE_NAMES[code] for code in np.unique(self.type_code)]
+
+    def to_list(self) -> List[RegionView]:
+        return list(self)
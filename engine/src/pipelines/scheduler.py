@@ -0,0 +1,240 @@
+"""
+Continuous capture: an adaptive scheduler for a stream of frames
+
+Every pipeline processes one frame per call. In continuous mode a producer
+(a screen grabber, a socket reader) submits frames as often as it likes, and
+``ContinuousCapture`` decides which of them to actually process:
+
+- Interval: once a frame starts processing, the next one is due ``interval``
+  seconds later. A frame that is identical or nearly so (under
+  STATIC_FRACTION of its pixels changed) backs the interval off by BACKOFF.
+  A changed frame divides it by ``1 + changed fraction / CHANGE_UNIT``. The
+  interval stays between ``min_interval`` and ``max_interval``, and never
+  drops below the time the last frame took, so a slow pipeline is not asked
+  to go faster than it can.
+- Bounded backlog: at most ``max_pending`` frames wait. Submitting to a full
+  backlog drops the oldest waiting frame. When a frame falls due, older
+  frames still waiting are coalesced into it, and only the newest is
+  processed.
+- Identical frames (compared with the last processed one) are not processed
+  and reuse its result.
+
+Every submitted frame ends in exactly one FrameOutcome (processed, identical,
+coalesced, dropped or error), which is passed to ``on_outcome``. ``stats()``
+reports the counts, the current interval and latency percentiles, where
+latency runs from submit() to the outcome.
+"""
+
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from pipelines.incremental import FrameChange, FrameTracker
+
+# Default bounds on the time between processed frames, in seconds
+MIN_INTERVAL = 0.1
+MAX_INTERVAL = 5.0
+# Interval multiplier for each static frame
+BACKOFF = 2.0
+# Changed pixel fraction below which a frame counts as static (a blinking
+# cursor or a ticking clock)
+STATIC_FRACTION = 0.0005
+# Changed pixel fraction that halves the interval; a 1% change divides it by 11
+CHANGE_UNIT = 0.001
+# Frames allowed to wait for processing
+MAX_PENDING = 1
+# Recent frames the latency percentiles are computed over
+LATENCY_WINDOW = 256
+
+STATUSES = ("processed", "identical", "coalesced", "dropped", "error")
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def _percentiles(samples: Sequence[float]) -> Dict[str, Optional[float]]:
+    if not samples:
+        return {"p50": None, "p95": None, "max": None}
+    p50, p95 = np.percentile(samples, [50, 95])
+    return {"p50": round(float(p50), 3), "p95": round(float(p95), 3), "max": max(samples)}
+
+
+@dataclass
+class FrameOutcome:
+    """What became of one submitted frame"""
+    item: Any  # as given to submit()
+    status: str  # one of STATUSES
+    result: Any = None  # the process() result; the reused one for identical frames
+    error: Optional[str] = None
+    latency_ms: Optional[float] = None
+
+
+class AdaptiveInterval:
+    """Time between processed frames, following how much the screen changes"""
+
+    def __init__(self, min_interval: float = MIN_INTERVAL, max_interval: float = MAX_INTERVAL):
+        if not 0 < min_interval <= max_interval:
+            raise ValueError(f"Need 0 < min_interval <= max_interval, got {min_interval}, {max_interval}")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+
+    def update(self, change: Optional[FrameChange], elapsed: float) -> float:
+        """
+        The interval after a frame that changed by `change` (None: nothing to
+        compare it with, treated as a full change) and took `elapsed` seconds
+        """
+        fraction = 1.0 if change is None else change.dirty_fraction
+        if fraction < STATIC_FRACTION:
+            interval = self.interval * BACKOFF
+        else:
+            interval = self.interval / (1 + fraction / CHANGE_UNIT)
+        self.interval = min(max(interval, elapsed, self.min_interval), self.max_interval)
+        return self.interval
+
+
+class ContinuousCapture:
+    """Processes the newest of a stream of frames at an adaptive rate"""
+
+    def __init__(self,
+                 process: Callable[[np.ndarray], Any],
+                 on_outcome: Optional[Callable[[FrameOutcome], None]] = None,
+                 decode: Optional[Callable[[Any], np.ndarray]] = None,
+                 policy: Optional[AdaptiveInterval] = None,
+                 max_pending: int = MAX_PENDING,
+                 tracker: Optional[FrameTracker] = None):
+        """
+        Args:
+            process: Runs the pipeline on one decoded frame
+            on_outcome: Called once for every submitted frame, from the
+                processing thread or (for dropped frames) from submit()
+            decode: Turns a submitted item into a frame; only called for
+                frames that fall due, so dropped ones are never decoded
+                (default: items are frames already)
+            policy: Decides the interval (default: AdaptiveInterval())
+            max_pending: Frames allowed to wait; older ones are dropped
+            tracker: Compares each frame with the last processed one
+        """
+        if max_pending < 1:
+            raise ValueError("max_pending must be at least 1")
+        self.process = process
+        self.on_outcome = on_outcome or (lambda _: None)
+        self.decode = decode or (lambda item: item)
+        self.policy = policy or AdaptiveInterval()
+        self.max_pending = max_pending
+        self.tracker = tracker or FrameTracker()
+        self.counts: Counter = Counter()
+
+        self._pending: Deque[Tuple[Any, float]] = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._due = 0.0  # time.monotonic() at which the next frame may start
+        self._last_result: Any = None
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._process_times: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, item: Any) -> None:
+        """Queue a frame without blocking, dropping the oldest waiting one if full"""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("ContinuousCapture is closed")
+            self.counts["submitted"] += 1
+            dropped = self._pending.popleft() if len(self._pending) >= self.max_pending else None
+            self._pending.append((item, time.monotonic()))
+            self._cond.notify()
+        if dropped is not None:
+            self._finish(FrameOutcome(dropped[0], "dropped"))
+
+    def _finish(self, outcome: FrameOutcome) -> None:
+        with self._cond:
+            self.counts[outcome.status] += 1
+            if outcome.latency_ms is not None and outcome.status != "error":
+                self._latencies.append(outcome.latency_ms)
+        self.on_outcome(outcome)
+
+    def _next(self) -> Optional[Tuple[Any, float]]:
+        """The newest frame once it is due, or None once closed and drained"""
+        with self._cond:
+            while True:
+                if not self._pending:
+                    if self._closed:
+                        return None
+                    self._cond.wait()
+                    continue
+                wait = self._due - time.monotonic()
+                if wait > 0 and not self._closed:
+                    self._cond.wait(wait)
+                    continue
+                newest = self._pending.pop()
+                stale = list(self._pending)
+                self._pending.clear()
+                break
+        for item, _ in stale:
+            self._finish(FrameOutcome(item, "coalesced"))
+        return newest
+
+    def _handle(self, item: Any, submitted: float) -> None:
+        started = time.monotonic()
+        change = None
+        try:
+            frame = self.decode(item)
+            change = self.tracker.compare(frame)
+            if change is not None and change.identical:
+                outcome = FrameOutcome(item, "identical", self._last_result)
+            else:
+                self._last_result = self.process(frame)
+                self.tracker.update(frame)
+                outcome = FrameOutcome(item, "processed", self._last_result)
+        except Exception as e:
+            outcome = FrameOutcome(item, "error", error=f"{type(e).__name__}: {e}")
+
+        done = time.monotonic()
+        if outcome.status == "error":
+            interval = self.policy.interval
+        else:
+            interval = self.policy.update(change, done - started)
+        with self._cond:
+            self._due = started + interval
+            if outcome.status == "processed":
+                self._process_times.append(_ms(done - started))
+        outcome.latency_ms = _ms(done - submitted)
+        self._finish(outcome)
+
+    def run(self) -> None:
+        """Process frames on this thread until close(); the last frame submitted is always handled"""
+        while True:
+            entry = self._next()
+            if entry is None:
+                return
+            self._handle(*entry)
+
+    def start(self) -> "ContinuousCapture":
+        """Run the processing loop on a background thread"""
+        self._thread = threading.Thread(target=self.run, name="continuous-capture", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self, wait: bool = True) -> None:
+        """Stop taking frames; the newest waiting frame is still processed"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if wait and self._thread is not None:
+            self._thread.join()
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                "submitted": self.counts["submitted"],
+                **{status: self.counts[status] for status in STATUSES},
+                "pending": len(self._pending),
+                "interval_ms": _ms(self.policy.interval),
+                "latency_ms": _percentiles(list(self._latencies)),
+                "process_ms": _percentiles(list(self._process_times)),
+            }
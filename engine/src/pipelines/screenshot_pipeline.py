@@ -1,35 +1,84 @@
-import cv2
 from pathlib import Path
-import subprocess
+import argparse
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from functools import lru_cache
 from json import dumps
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pipelines.instrumentation import Instrumentation, reset_peak_rss
+from pipelines.lazy import lazy_import
+from pipelines.worker import (ProtocolError, read_frame, request_unix_socket, serve_stdio,
+                              serve_unix_socket, write_frame)
+
+# Imported on first use, so --help and --connect start without them
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+history = lazy_import("pipelines.history")
+incremental_ocr = lazy_import("pipelines.incremental")
+ingest = lazy_import("pipelines.ingest")
+ocr_cache = lazy_import("pipelines.ocr_cache")
+ocr_engine = lazy_import("pipelines.ocr_engine")
+ocr_pool = lazy_import("pipelines.ocr_pool")
+prefilter = lazy_import("pipelines.prefilter")
+scheduler = lazy_import("pipelines.scheduler")
+segment_boxes = lazy_import("pipelines.boxes")
+tiling = lazy_import("pipelines.tiling")
+
 INPUT_IMAGE = "src/screenshot.png"
 OUTPUT_DIR = Path("src/segments")
-OCR_DIR = Path("src/ocr")
 
 MIN_AREA = 5000
 KERNEL_SIZE = (25, 25)
 PADDING = 8
+THRESHOLD_BLOCK = 15
+
+# Tile large frames for preprocessing: 'auto' (4K and up), 'always' or 'never'
+TILED = "auto"
+# Reach of the threshold window plus the dilation kernel: with at least this much
+# overlap the stitched mask is identical to the full-frame one
+TILE_OVERLAP = THRESHOLD_BLOCK // 2 + max(KERNEL_SIZE) // 2 + 1
+
+# Write every crop to OUTPUT_DIR for inspection (off: crops never touch disk)
+DEBUG_SEGMENTS = False
+
+# Worker-mode result reuse across frames (set by --incremental)
+INCREMENTAL = None
+
+# Include per-stage and per-segment timings in the output (set by --metrics)
+METRICS = False
+
+# Skip OCR on segments whose text-likelihood score is below this (0 = OCR
+# everything, None = $OCR_TEXT_THRESHOLD or prefilter.DEFAULT_THRESHOLD)
+TEXT_THRESHOLD = None
+
+
+@lru_cache(maxsize=None)
+def kernel():
+    return cv2.getStructuringElement(cv2.MORPH_RECT, KERNEL_SIZE)
 
 
-def ensure_output_dirs():
+def ensure_output_dir():
     OUTPUT_DIR.mkdir(exist_ok=True)
-    OCR_DIR.mkdir(exist_ok=True)
 
 
-def clear_dirs():
-    for d in (OUTPUT_DIR, OCR_DIR):
-        if d.exists():
-            for file in d.iterdir():
-                if file.is_file():
-                    file.unlink()
+def clear_output_dir():
+    if OUTPUT_DIR.exists():
+        for file in OUTPUT_DIR.iterdir():
+            if file.is_file():
+                file.unlink()
 
 
 def load_image(path: str):
-    img = cv2.imread(path)
-    if img is None:
-        raise FileNotFoundError(f"Could not read {path}")
-    return img
+    return ingest.read_path(path)
+
+
+def decode_image(data: bytes):
+    return ingest.decode(data)
 
 
 def preprocess(img):
@@ -40,16 +89,25 @@ def preprocess(img):
         255,
         cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
         cv2.THRESH_BINARY_INV,
-        15,
+        THRESHOLD_BLOCK,
         9,
     )
 
-    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, KERNEL_SIZE)
-    dilated = cv2.dilate(thresh, kernel, iterations=1)
+    dilated = cv2.dilate(thresh, kernel(), iterations=1)
 
     return dilated
 
 
+def preprocess_tiled(img, tile_size=None, max_workers=None):
+    # Same mask as preprocess(), built from overlapping tiles in parallel
+    # (tile_size defaults to tiling.DEFAULT_TILE_SIZE)
+    h, w = img.shape[:2]
+    tiles = tiling.tile_grid(w, h, tile_size or tiling.DEFAULT_TILE_SIZE, TILE_OVERLAP)
+    masks = tiling.map_tiles(lambda crop, _: preprocess(crop), img, tiles,
+                             max_workers or ocr_pool.available_cores())
+    return tiling.stitch(masks, tiles, w, h)
+
+
 def find_segments(mask, original_img):
     contours, _ = cv2.findContours(
         mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
@@ -77,57 +135,529 @@ def sort_boxes_reading_order(boxes):
     return sorted(boxes, key=lambda b: (b[1], b[0]))
 
 
-def save_segments(img, boxes):
-    paths = []
-
-    for i, (x1, y1, x2, y2) in enumerate(boxes, start=1):
-        crop = img[y1:y2, x1:x2]
-        out_path = OUTPUT_DIR / f"{i:03}.png"
-        cv2.imwrite(str(out_path), crop)
-        paths.append(out_path)
-
-    return paths
-
-
-def run_tesseract(image_paths):
-    results = []
-
-    for img_path in image_paths:
-        out_base = OCR_DIR / img_path.stem
-
-        subprocess.run(
-            ["tesseract", str(img_path), str(out_base)],
-            check=True,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        )
-
-        txt_path = out_base.with_suffix(".txt")
-        text = txt_path.read_text(encoding="utf-8").strip()
-        results.append((img_path.name, text))
-
-    return results
-
-
-def main():
-    ensure_output_dirs()
-    clear_dirs()
-
-    img = load_image(INPUT_IMAGE)
-    mask = preprocess(img)
-    boxes = sort_boxes_reading_order(find_segments(mask, img))
-
-    segment_paths = save_segments(img, boxes)
-    ocr_results = run_tesseract(segment_paths)
+def crop_segments(img, boxes):
+    # Views into the frame: no copies, no encode
+    return [img[y1:y2, x1:x2] for x1, y1, x2, y2 in boxes]
+
+
+def save_segments(crops):
+    ensure_output_dir()
+    clear_output_dir()
+
+    for i, crop in enumerate(crops, start=1):
+        cv2.imwrite(str(OUTPUT_DIR / f"{i:03}.png"), crop)
+
+
+def run_ocr(crops, engine=None, instrumentation=None):
+    engine = engine or ocr_cache.cached(ocr_pool.get_parallel_engine())
+    if instrumentation is None:
+        return engine.recognize_many(crops)
+
+    texts = []
+    for i, (text, wall_ms, cpu_ms) in enumerate(engine.recognize_many_timed(crops)):
+        h, w = crops[i].shape[:2]
+        instrumentation.segment(i, wall_ms, cpu_ms, crops[i].nbytes, width=w, height=h)
+        texts.append(text)
+    return texts
+
+
+def run_ocr_regions(img, boxes, engine=None, instrumentation=None):
+    # One pass over the frame, restricted to the boxes ('frame' OCR mode)
+    engine = engine or ocr_cache.cached(ocr_pool.get_parallel_engine())
+    if instrumentation is None:
+        return engine.recognize_regions(img, boxes)
+
+    texts = []
+    for i, (text, wall_ms, cpu_ms) in enumerate(engine.recognize_regions_timed(img, boxes)):
+        x1, y1, x2, y2 = boxes[i]
+        # The frame pass reads a grayscale copy of the frame: one byte per pixel
+        instrumentation.segment(i, wall_ms, cpu_ms, (x2 - x1) * (y2 - y1),
+                                width=x2 - x1, height=y2 - y1)
+        texts.append(text)
+    return texts
+
+
+def process_image(img, debug_segments=False, incremental=None, instrumentation=None,
+                  on_segment=None, text_threshold=None, stats=None, tiled=None):
+    # on_segment(index, box, text, wall_ms, cpu_ms, reused) is called for every
+    # segment as soon as its text is known, in completion order. stats, if
+    # given, gets the number of segments the prefilter kept away from OCR and
+    # the pixels of duplicate OCR work saved by merging overlapping boxes.
+    inst = instrumentation
+    reading_order = {}
+    emitted = set()
+    skipped = 0
+    saved_pixels = 0
+    if text_threshold is None:
+        text_threshold = TEXT_THRESHOLD
+    tiled = tiled or TILED
+
+    def stage(name):
+        return inst.stage(name) if inst is not None else nullcontext()
+
+    def segment(frame):
+        nonlocal skipped, saved_pixels
+        h, w = frame.shape[:2]
+        with stage("preprocess"):
+            if tiling.should_tile(w, h, tiled):
+                mask = preprocess_tiled(frame)
+            else:
+                mask = preprocess(frame)
+        with stage("find_segments"):
+            boxes = find_segments(mask, frame)
+        with stage("dedupe"):
+            # Padded boxes overlapping by boxes.MIN_OVERLAP of the smaller one
+            # are merged; contained boxes are always dropped
+            boxes, saved = segment_boxes.dedupe(boxes)
+            boxes = sort_boxes_reading_order(boxes)
+        saved_pixels += saved
+        with stage("prefilter"):
+            boxes, dropped = prefilter.split_boxes(frame, boxes, text_threshold)
+        skipped += len(dropped)
+        if debug_segments:
+            save_segments(crop_segments(frame, boxes))
+        reading_order.update((box, i) for i, box in enumerate(boxes))
+        return boxes
+
+    def recognize(boxes):
+        frame_pass = ocr_engine.ocr_mode() == "frame"
+        with stage("ocr"):
+            if on_segment is None:
+                if frame_pass:
+                    return run_ocr_regions(img, boxes, instrumentation=inst)
+                return run_ocr(crop_segments(img, boxes), instrumentation=inst)
+
+            texts = [None] * len(boxes)
+            engine = ocr_cache.cached(ocr_pool.get_parallel_engine())
+            if frame_pass:
+                # One pass yields every segment at once, in reading order
+                results = enumerate(engine.recognize_regions_timed(img, boxes))
+                sizes = [(x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in boxes]
+            else:
+                crops = crop_segments(img, boxes)
+                results = engine.iter_recognize_timed(crops)
+                sizes = [crop.nbytes for crop in crops]
+            for i, (text, wall_ms, cpu_ms) in results:
+                texts[i] = text
+                index = reading_order.get(boxes[i], i)
+                if inst is not None:
+                    inst.segment(index, wall_ms, cpu_ms, sizes[i])
+                emitted.add(boxes[i])
+                on_segment(index, boxes[i], text, wall_ms, cpu_ms, False)
+            return texts
+
+    if incremental is not None:
+        boxes, texts = incremental.run(img, segment, recognize)
+        if on_segment is not None:
+            # Unchanged segments kept their previous text without any OCR
+            for i, (box, text) in enumerate(zip(boxes, texts)):
+                if box not in emitted:
+                    on_segment(i, box, text, 0.0, 0.0, True)
+    else:
+        boxes = segment(img)
+        texts = recognize(boxes)
+    record_history(img, boxes, texts)
+    if stats is not None:
+        stats["skipped"] = skipped
+        stats["saved_pixels"] = saved_pixels
 
     data = []
 
-    for _, text in ocr_results:
+    for text in texts:
         if len(text.strip()) == 0:
             continue
         data.append(text)
 
+    return data
+
+
+def record_history(img, boxes, texts):
+    # Into the history store, if $OCR_HISTORY_PATH (or --history) enables it
+    store = history.get_history_store()
+    if store is not None:
+        h, w = img.shape[:2]
+        store.add_frame([((x1, y1, x2 - x1, y2 - y1), text) for (x1, y1, x2, y2), text in zip(boxes, texts)],
+                        source="screenshot_pipeline", size=(w, h))
+
+
+def search_history(query, since=None, until=None, limit=None):
+    # History hits as JSON-ready dicts, newest first
+    store = history.get_history_store()
+    if store is None:
+        raise RuntimeError("No history store (set OCR_HISTORY_PATH or pass --history)")
+    hits = store.search(query, since, until, limit=limit or history.DEFAULT_LIMIT)
+    return [{"frame_id": hit.frame_id, "first_seen": hit.first_seen, "last_seen": hit.last_seen,
+             "bbox": list(hit.bbox), "text": hit.text, "snippet": hit.snippet} for hit in hits]
+
+
+def process_image_with_metrics(img, debug_segments=False, incremental=None, hooks=(),
+                               text_threshold=None, tiled=None):
+    reset_peak_rss()
+    inst = Instrumentation(hooks=hooks)
+    stats = {}
+    data = process_image(img, debug_segments, incremental, inst,
+                         text_threshold=text_threshold, stats=stats, tiled=tiled)
+    metrics = inst.finish(segments=len(data), **stats)
+    return {"segments": data, "metrics": {**metrics, **stats}}
+
+
+def stream_image(img, emit, debug_segments=False, incremental=None, text_threshold=None,
+                 tiled=None):
+    # emit() gets one record per non-empty segment as soon as it is OCR'd;
+    # the returned summary has every text in reading order
+    started = time.perf_counter()
+    counts = {"segments": 0, "empty": 0, "reused": 0}
+
+    def on_segment(index, box, text, wall_ms, cpu_ms, reused):
+        counts["segments"] += 1
+        counts["reused"] += reused
+        if not text.strip():
+            counts["empty"] += 1
+            return
+        x1, y1, x2, y2 = box
+        emit({
+            "type": "segment",
+            "index": index,
+            "bbox": [x1, y1, x2 - x1, y2 - y1],
+            "text": text,
+            "wall_ms": round(wall_ms, 3),
+            "cpu_ms": round(cpu_ms, 3),
+            "reused": reused,
+        })
+
+    stats = {}
+    data = process_image(img, debug_segments, incremental, on_segment=on_segment,
+                         text_threshold=text_threshold, stats=stats, tiled=tiled)
+    return {
+        "type": "summary",
+        "texts": data,
+        **counts,
+        **stats,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+
+
+def handle_job_flushed(header, payload, emit):
+    # Forked zygote children leave through os._exit(), which skips atexit, so
+    # no history may stay buffered past the job
+    try:
+        return handle_job(header, payload, emit)
+    finally:
+        store = history.get_history_store()
+        if store is not None:
+            store.flush()
+
+
+def run_frame(img):
+    # One frame with the module-level options, as a one-shot run would
+    if METRICS:
+        return process_image_with_metrics(img, DEBUG_SEGMENTS, INCREMENTAL, text_threshold=TEXT_THRESHOLD)
+    return process_image(img, DEBUG_SEGMENTS, INCREMENTAL, text_threshold=TEXT_THRESHOLD)
+
+
+def handle_job(header, payload, emit):
+    if header.get("op") == "stats":
+        store = history.get_history_store()
+        return {
+            "incremental": dict(INCREMENTAL.stats) if INCREMENTAL is not None else {},
+            "cache": ocr_cache.get_ocr_cache().stats(),
+            "history": store.stats() if store is not None else {},
+        }
+    if header.get("op") == "history":
+        return search_history(header["query"], header.get("since"), header.get("until"),
+                              header.get("limit"))
+
+    # Shared memory, raw or encoded payload, or a path (see pipelines/ingest.py)
+    img = ingest.load_job(header, payload)
+
+    debug_segments = header.get("debug_segments", DEBUG_SEGMENTS)
+    text_threshold = header.get("text_threshold", TEXT_THRESHOLD)
+    tiled = header.get("tiled", TILED)
+    if header.get("stream"):
+        # Segment records go out as partial frames; the summary is the reply
+        return stream_image(img, emit, debug_segments, INCREMENTAL, text_threshold, tiled)
+    if header.get("metrics", METRICS):
+        return process_image_with_metrics(img, debug_segments, INCREMENTAL,
+                                          text_threshold=text_threshold, tiled=tiled)
+    return process_image(img, debug_segments, INCREMENTAL, text_threshold=text_threshold,
+                         tiled=tiled)
+
+
+def serve_continuous(min_interval, max_interval, max_pending):
+    # Frames arrive on stdin as worker jobs, as fast as the producer likes.
+    # The scheduler processes the newest one at an adaptive rate, and every
+    # frame gets exactly one reply, in completion order, whose "status" says
+    # whether it was processed, identical to the last one (previous result),
+    # coalesced into a newer frame or dropped (no result). {"op": "stats"}
+    # is answered at once with the scheduler's counts and latencies.
+    reader, writer = sys.stdin.buffer, sys.stdout.buffer
+    sys.stdout = sys.stderr
+    lock = threading.Lock()
+
+    def reply(header):
+        with lock:
+            write_frame(writer, header)
+
+    def on_outcome(outcome):
+        header, _ = outcome.item
+        record = {"id": header.get("id"), "ok": outcome.status != "error",
+                  "status": outcome.status, "latency_ms": outcome.latency_ms}
+        if outcome.error is not None:
+            record["error"] = outcome.error
+        else:
+            record["result"] = outcome.result
+        reply(record)
+
+    capture = scheduler.ContinuousCapture(
+        run_frame, on_outcome, decode=lambda job: ingest.load_job(*job),
+        policy=scheduler.AdaptiveInterval(min_interval, max_interval),
+        max_pending=max_pending,
+    ).start()
+    try:
+        while True:
+            try:
+                frame = read_frame(reader)
+            except (ProtocolError, ValueError) as e:
+                reply({"id": None, "ok": False, "error": f"ProtocolError: {e}"})
+                break
+            if frame is None:
+                break
+
+            header, payload = frame
+            op = header.get("op", "process")
+            if op == "ping":
+                reply({"id": header.get("id"), "ok": True, "result": "pong"})
+            elif op == "stats":
+                stats = handle_job(header, payload, None)
+                reply({"id": header.get("id"), "ok": True,
+                       "result": {"scheduler": capture.stats(), **stats}})
+            elif op == "shutdown":
+                reply({"id": header.get("id"), "ok": True, "result": None})
+                break
+            else:
+                capture.submit((header, payload))
+    finally:
+        capture.close()
+
+
+def warm_up():
+    # First calls into OpenCV initialise its thread pool and dispatch
+    # tables; pay for that before the first real job arrives.
+    blank = np.full((64, 64, 3), 255, dtype=np.uint8)
+    find_segments(preprocess(blank), blank)
+    ocr_pool.get_parallel_engine().start()
+
+
+def preload():
+    # Import the whole processing stack without starting any threads or OCR
+    # processes, which would not survive a fork. Each child therefore builds
+    # its own OCR pool and in-memory cache on its first job. The parent never
+    # OCRs, so it has no warm results to hand down; children share results
+    # through the persisted cache tier (--cache-path) instead.
+    for module in (cv2, np, history, incremental_ocr, ingest, ocr_cache, ocr_engine, ocr_pool, prefilter,
+                   scheduler, segment_boxes, tiling):
+        getattr(module, "__file__", None)  # first attribute access imports it
+    kernel()
+
+
+def input_frame(args):
+    # (job header fields, payload) describing the frame given on the command
+    # line, in the form ingest.load_job() and worker jobs use
+    header = {}
+    if args.width:
+        header.update(width=args.width, height=args.height,
+                      pixel_format=args.pixel_format, stride=args.stride)
+    if args.shm:
+        return dict(header, shm=args.shm), b""
+    if args.image == "-":
+        return header, sys.stdin.buffer.read()
+    return dict(header, image_path=str(Path(args.image).resolve())), b""
+
+
+def run_via_zygote(socket_path, args, frame_header, payload):
+    # Returns False if no zygote is listening, so the caller can run locally
+    header = {
+        "id": 1,
+        **frame_header,
+        "debug_segments": args.debug_segments,
+        "stream": args.stream,
+        "metrics": args.metrics,
+    }
+    if args.text_threshold is not None:
+        header["text_threshold"] = args.text_threshold
+    if args.tiled is not None:
+        header["tiled"] = args.tiled
+
+    def on_partial(record):
+        print(dumps(record), flush=True)
+
+    try:
+        reply = request_unix_socket(socket_path, header, payload, on_partial=on_partial)
+    except (FileNotFoundError, ConnectionRefusedError):
+        return False
+
+    if not reply.get("ok"):
+        sys.exit(reply.get("error"))
+    print(dumps(reply["result"]))
+    return True
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Segment a screenshot and OCR each segment")
+    parser.add_argument("image", nargs="?", default=INPUT_IMAGE,
+                        help="image file, or - to read the frame from stdin")
+    parser.add_argument("--shm", metavar="NAME",
+                        help="read raw pixels from this named shared-memory buffer")
+    parser.add_argument("--width", type=int, help="raw frame width (stdin or --shm)")
+    parser.add_argument("--height", type=int, help="raw frame height (stdin or --shm)")
+    parser.add_argument("--pixel-format", choices=["bgra", "rgba", "bgr", "rgb", "gray"], default="bgra",
+                        help="raw frame pixel layout (default: bgra)")
+    parser.add_argument("--stride", type=int,
+                        help="raw frame bytes per row (default: tightly packed)")
+    parser.add_argument("--worker", action="store_true",
+                        help="stay resident and take framed jobs on stdin/stdout")
+    parser.add_argument("--socket", metavar="PATH",
+                        help="stay resident and take framed jobs on a Unix socket")
+    parser.add_argument("--zygote", metavar="PATH",
+                        help="stay resident on a Unix socket and fork a pre-imported child per connection")
+    parser.add_argument("--connect", metavar="PATH",
+                        help="hand the image to the zygote on this socket (runs locally if none is listening)")
+    parser.add_argument("--continuous", action="store_true",
+                        help="take a stream of framed frames on stdin and process the newest at an "
+                             "adaptive rate, one reply per frame")
+    # Defaults come from pipelines.scheduler, which is only imported in continuous mode
+    parser.add_argument("--min-interval", type=float, metavar="SECONDS",
+                        help="continuous mode: shortest time between processed frames "
+                             "(default: scheduler.MIN_INTERVAL)")
+    parser.add_argument("--max-interval", type=float, metavar="SECONDS",
+                        help="continuous mode: longest time between processed frames while the "
+                             "screen is static (default: scheduler.MAX_INTERVAL)")
+    parser.add_argument("--max-pending", type=int, metavar="N",
+                        help="continuous mode: frames allowed to wait before the oldest is dropped "
+                             "(default: scheduler.MAX_PENDING)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="in worker or continuous mode, only re-OCR segments that changed since the last frame")
+    parser.add_argument("--max-workers", type=int,
+                        help="OCR processes to run in parallel (default: $OCR_MAX_WORKERS or all cores)")
+    parser.add_argument("--cache-path", metavar="PATH",
+                        help="persist OCR results in this SQLite file (default: $OCR_CACHE_PATH, memory only)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="disable the OCR result cache")
+    parser.add_argument("--history", metavar="PATH",
+                        help="record every frame's text in this SQLite history store (default: $OCR_HISTORY_PATH, off)")
+    parser.add_argument("--search", metavar="QUERY",
+                        help="print the history regions containing every word of QUERY, newest first, and exit")
+    parser.add_argument("--since", type=float, metavar="EPOCH",
+                        help="with --search: only frames seen at or after this Unix time")
+    parser.add_argument("--until", type=float, metavar="EPOCH",
+                        help="with --search: only frames seen at or before this Unix time")
+    parser.add_argument("--debug-segments", action="store_true",
+                        help=f"also write each segment crop to {OUTPUT_DIR}/")
+    parser.add_argument("--tiled", choices=["auto", "always", "never"],
+                        help=f"preprocess in parallel overlapping tiles (auto: 4K frames and up; "
+                             f"default: {TILED})")
+    parser.add_argument("--stream", action="store_true",
+                        help="print one JSON line per segment as soon as it is OCR'd, then a summary line")
+    parser.add_argument("--metrics", action="store_true",
+                        help='output {"segments": [...], "metrics": {...}} with per-stage timings')
+    parser.add_argument("--text-threshold", type=float, metavar="SCORE",
+                        help="skip OCR on segments scoring below this text likelihood, 0-1 "
+                             "(default: $OCR_TEXT_THRESHOLD or 0.5; 0 OCRs every segment)")
+    parser.add_argument("--ocr-engine", choices=["auto", "tesserocr", "batch", "cli"],
+                        help="OCR backend (default: $OCR_ENGINE or auto)")
+    parser.add_argument("--ocr-mode", choices=["crops", "frame"],
+                        help="OCR each segment crop separately, or the whole frame once restricted "
+                             "to the segments (default: $OCR_MODE or crops)")
+    args = parser.parse_args()
+    if bool(args.width) != bool(args.height):
+        parser.error("--width and --height go together")
+    if args.shm and not args.width:
+        parser.error("--shm needs --width and --height")
+    if args.continuous and (args.worker or args.socket or args.zygote or args.connect):
+        parser.error("--continuous reads frames from stdin and cannot be combined with another serving mode")
+    if args.continuous:
+        for name in ("min_interval", "max_interval", "max_pending"):
+            if getattr(args, name) is None:
+                setattr(args, name, getattr(scheduler, name.upper()))
+        if not 0 < args.min_interval <= args.max_interval:
+            parser.error("need 0 < --min-interval <= --max-interval")
+        if args.max_pending < 1:
+            parser.error("--max-pending must be at least 1")
+    if args.search and (args.worker or args.socket or args.zygote or args.connect or args.continuous):
+        parser.error("--search answers from the history store and cannot be combined with a serving mode")
+    if args.zygote and args.incremental:
+        parser.error("--incremental keeps state between frames and cannot be used with --zygote")
+    if args.connect:
+        # These configure the OCR stack of the process that runs the job; a
+        # zygote was configured when it started, so they would be ignored
+        process_flags = {"--ocr-engine": args.ocr_engine, "--ocr-mode": args.ocr_mode,
+                         "--max-workers": args.max_workers, "--cache-path": args.cache_path,
+                         "--no-cache": args.no_cache, "--history": args.history}
+        given = [flag for flag, value in process_flags.items() if value]
+        if given:
+            parser.error(f"{', '.join(given)} cannot be used with --connect; "
+                         f"pass them when starting the --zygote instead")
+    return args
+
+
+def main():
+    global DEBUG_SEGMENTS, INCREMENTAL, METRICS, TEXT_THRESHOLD, TILED
+
+    args = parse_args()
+    serving = args.worker or args.socket or args.zygote or args.continuous
+    frame_header, payload = (None, b"") if serving or args.search else input_frame(args)
+    if args.connect and run_via_zygote(args.connect, args, frame_header, payload):
+        return
+
+    DEBUG_SEGMENTS = args.debug_segments
+    METRICS = args.metrics
+    TEXT_THRESHOLD = args.text_threshold
+    TILED = args.tiled or TILED
+
+    if args.ocr_engine:
+        os.environ["OCR_ENGINE"] = args.ocr_engine
+    if args.ocr_mode:
+        os.environ["OCR_MODE"] = args.ocr_mode
+    if args.max_workers:
+        os.environ["OCR_MAX_WORKERS"] = str(args.max_workers)
+    if args.cache_path:
+        os.environ["OCR_CACHE_PATH"] = args.cache_path
+    if args.history:
+        os.environ["OCR_HISTORY_PATH"] = args.history
+    if args.no_cache:
+        os.environ["OCR_CACHE"] = "0"
+
+    if args.search:
+        print(dumps(search_history(args.search, args.since, args.until)))
+        return
+
+    if args.zygote:
+        preload()
+        serve_unix_socket(handle_job_flushed, args.zygote, fork=True)
+        return
+
+    if args.worker or args.socket or args.continuous:
+        if args.incremental:
+            INCREMENTAL = incremental_ocr.IncrementalOcr()
+        warm_up()
+        if args.continuous:
+            serve_continuous(args.min_interval, args.max_interval, args.max_pending)
+        elif args.socket:
+            serve_unix_socket(handle_job, args.socket)
+        else:
+            serve_stdio(handle_job)
+        return
+
+    img = ingest.load_job(frame_header, payload)
+    if args.stream:
+        def emit(record):
+            print(dumps(record), flush=True)
+
+        emit(stream_image(img, emit, DEBUG_SEGMENTS))
+        return
     # stdout
-    print(dumps(data))
+    print(dumps(run_frame(img)))
+
 
-main()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Tiled execution for large (4K/5K, Retina) frames
+
+The frame is split into a grid of core tiles that partition it. Each core is
+grown by an overlap margin into the tile's outer rectangle, which is what
+actually gets processed. Each pixel (or region) belongs to exactly one core,
+so per-tile results are stitched by keeping only what the core owns:
+
+- Pixel maps (masks): copy each tile's core back. When the overlap covers the
+  filters' reach, the result is identical to processing the whole frame.
+- Regions (OCR words): keep the ones whose centre is in the core, then drop
+  fragments that a larger region on the other side of the seam covers.
+
+Tiles run on a thread pool. OpenCV and the tesseract subprocesses release the
+GIL, so tiles are processed in parallel without pickling pixels between
+processes.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, Tuple, TypeVar
+
+import numpy as np
+
+from pipelines.merging import candidate_pairs
+from pipelines.ocr_pool import available_cores
+
+Box = Tuple[int, int, int, int]
+T = TypeVar("T")
+
+DEFAULT_TILE_SIZE = 1024
+
+# Frames with at least this many pixels (4K) are tiled when tiling is "auto"
+AUTO_TILE_PIXELS = 3840 * 2160
+
+
+@dataclass(frozen=True)
+class Tile:
+    """`core` partitions the frame; `outer` is the core plus overlap (both x1, y1, x2, y2)"""
+    core: Box
+    outer: Box
+
+    def crop(self, image: np.ndarray) -> np.ndarray:
+        x1, y1, x2, y2 = self.outer
+        return image[y1:y2, x1:x2]
+
+    def core_in_outer(self) -> Tuple[slice, slice]:
+        """Slices selecting the core out of an array covering `outer`"""
+        ox, oy = self.outer[0], self.outer[1]
+        x1, y1, x2, y2 = self.core
+        return slice(y1 - oy, y2 - oy), slice(x1 - ox, x2 - ox)
+
+
+def should_tile(width: int, height: int, mode: str = "auto") -> bool:
+    """`mode` is 'auto' (large frames, with cores to spread them over), 'always' or 'never'"""
+    if mode == "always":
+        return True
+    if mode == "never":
+        return False
+    if mode != "auto":
+        raise ValueError(f"Unknown tiling mode {mode!r}")
+    return width * height >= AUTO_TILE_PIXELS and available_cores() > 1
+
+
+def tile_grid(width: int, height: int,
+              tile_size: int = DEFAULT_TILE_SIZE, overlap: int = 32) -> List[Tile]:
+    """Tiles in row-major order; cores are evenly sized and at most `tile_size`"""
+    cols = max(-(-width // tile_size), 1)
+    rows = max(-(-height // tile_size), 1)
+    xs = np.linspace(0, width, cols + 1).round().astype(int).tolist()
+    ys = np.linspace(0, height, rows + 1).round().astype(int).tolist()
+
+    tiles = []
+    for y1, y2 in zip(ys, ys[1:]):
+        for x1, x2 in zip(xs, xs[1:]):
+            tiles.append(Tile(
+                core=(x1, y1, x2, y2),
+                outer=(max(x1 - overlap, 0), max(y1 - overlap, 0),
+                       min(x2 + overlap, width), min(y2 + overlap, height)),
+            ))
+    return tiles
+
+
+def map_tiles(fn: Callable[[np.ndarray, Tile], T],
+              image: np.ndarray,
+              tiles: Sequence[Tile],
+              max_workers: Optional[int] = None) -> List[T]:
+    """Run `fn(crop, tile)` for every tile in parallel; results in tile order"""
+    if len(tiles) == 1 or max_workers == 1:
+        return [fn(tile.crop(image), tile) for tile in tiles]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda tile: fn(tile.crop(image), tile), tiles))
+
+
+def stitch(outputs: Sequence[np.ndarray], tiles: Sequence[Tile],
+           width: int, height: int) -> np.ndarray:
+    """Assemble a full-frame array from per-tile outputs covering each tile's `outer`"""
+    first = outputs[0]
+    out = np.empty((height, width) + first.shape[2:], dtype=first.dtype)
+    for tile, output in zip(tiles, outputs):
+        x1, y1, x2, y2 = tile.core
+        out[y1:y2, x1:x2] = output[tile.core_in_outer()]
+    return out
+
+
+def owned(boxes: np.ndarray, tile: Tile) -> np.ndarray:
+    """Mask of (x, y, w, h) boxes, in frame coordinates, whose centre lies in the tile's core"""
+    boxes = np.asarray(boxes).reshape(-1, 4)
+    cx = boxes[:, 0] + boxes[:, 2] / 2
+    cy = boxes[:, 1] + boxes[:, 3] / 2
+    x1, y1, x2, y2 = tile.core
+    return (cx >= x1) & (cx < x2) & (cy >= y1) & (cy < y2)
+
+
+def drop_seam_fragments(boxes: np.ndarray, tile_ids: Sequence[int],
+                        min_cover: float = 0.6) -> np.ndarray:
+    """
+    Keep-mask over (x, y, w, h) boxes that removes fragments of regions cut by a seam
+
+    A box is dropped when a larger box from a different tile covers at least
+    `min_cover` of its area: the part of a long word seen by one tile, next
+    to the whole word seen by its neighbour.
+    """
+    boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+    tile_ids = np.asarray(tile_ids)
+    keep = np.ones(len(boxes), dtype=bool)
+    i, j = candidate_pairs(boxes, reach=0)
+    across = tile_ids[i] != tile_ids[j]
+    i, j = i[across], j[across]
+    if not len(i):
+        return keep
+
+    a, b = boxes[i], boxes[j]
+    ix = np.minimum(a[:, 0] + a[:, 2], b[:, 0] + b[:, 2]) - np.maximum(a[:, 0], b[:, 0])
+    iy = np.minimum(a[:, 1] + a[:, 3], b[:, 1] + b[:, 3]) - np.maximum(a[:, 1], b[:, 1])
+    inter = np.clip(ix, 0, None) * np.clip(iy, 0, None)
+    area_a, area_b = a[:, 2] * a[:, 3], b[:, 2] * b[:, 3]
+
+    smaller = np.where(area_a <= area_b, i, j)
+    cover = inter / np.maximum(np.minimum(area_a, area_b), 1)
+    keep[smaller[cover >= min_cover]] = False
+    return keep
@@ -0,0 +1,268 @@
+"""
+Resident worker loop for the vision pipelines
+
+Jobs and replies are exchanged as length-prefixed frames:
+
+    [4-byte big-endian header length][UTF-8 JSON header][payload bytes]
+
+The payload is optional; when present its size is given by the header's
+``payload_size`` field. A job either names an image on disk
+(``{"id": 1, "image_path": "/tmp/shot.png"}``) or carries the encoded image
+bytes as the payload (``{"id": 2, "payload_size": 48213}``). Raw pixels are
+sent as the payload with ``width``, ``height``, ``pixel_format`` and
+optionally ``stride``. With ``shm`` naming a shared-memory buffer, the same
+fields describe the pixels in that buffer (see pipelines/ingest.py). Control
+jobs use ``op``: ``"ping"`` and ``"shutdown"``.
+
+A job may send partial results before its reply, as frames of the form
+``{"id": 1, "ok": true, "partial": ...}``. The reply (with ``result`` or
+``error``) is always the job's last frame.
+
+With ``fork=True`` the Unix socket server acts as a zygote. It imports and
+warms up once, then forks a child for every connection. Each child starts
+with everything already imported, so a one-shot client gets its first
+result without paying for interpreter and library startup.
+"""
+
+import json
+import os
+import signal
+import socket
+import struct
+import sys
+import time
+from typing import BinaryIO, Callable, Dict, Optional, Tuple
+
+HEADER_SIZE = struct.Struct(">I")
+MAX_HEADER_BYTES = 16 * 1024 * 1024
+
+# Exit status of a forked child whose peer asked the zygote to shut down
+SHUTDOWN_STATUS = 3
+
+# Sends one partial result for the job being handled
+Emit = Callable[[object], None]
+
+# (header, payload, emit) -> result
+JobHandler = Callable[[Dict, bytes, Emit], object]
+
+
+class ProtocolError(Exception):
+    """Raised when a peer sends a malformed frame"""
+
+
+def _read_exact(stream: BinaryIO, size: int) -> Optional[bytes]:
+    chunks = []
+    remaining = size
+    while remaining:
+        chunk = stream.read(remaining)
+        if not chunk:
+            if remaining == size:
+                return None
+            raise ProtocolError(f"Stream closed with {remaining} bytes outstanding")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def read_frame(stream: BinaryIO) -> Optional[Tuple[Dict, bytes]]:
+    """
+    Read one frame from the stream
+
+    Returns:
+        (header, payload), or None on a clean end of stream
+    """
+    prefix = _read_exact(stream, HEADER_SIZE.size)
+    if prefix is None:
+        return None
+
+    (length,) = HEADER_SIZE.unpack(prefix)
+    if length > MAX_HEADER_BYTES:
+        raise ProtocolError(f"Header of {length} bytes exceeds limit")
+
+    raw = _read_exact(stream, length)
+    if raw is None:
+        raise ProtocolError("Stream closed before header")
+    header = json.loads(raw.decode("utf-8"))
+    if not isinstance(header, dict):
+        raise ProtocolError("Header must be a JSON object")
+
+    payload = b""
+    payload_size = int(header.get("payload_size") or 0)
+    if payload_size:
+        payload = _read_exact(stream, payload_size)
+        if payload is None:
+            raise ProtocolError("Stream closed before payload")
+
+    return header, payload
+
+
+def write_frame(stream: BinaryIO, header: Dict, payload: bytes = b"") -> None:
+    """Write one frame and flush it to the peer"""
+    if payload:
+        header = dict(header, payload_size=len(payload))
+    raw = json.dumps(header).encode("utf-8")
+    stream.write(HEADER_SIZE.pack(len(raw)) + raw + payload)
+    stream.flush()
+
+
+def handle_frame(handler: JobHandler, header: Dict, payload: bytes,
+                 emit: Optional[Emit] = None) -> Dict:
+    """Run a single job and build its reply header"""
+    job_id = header.get("id")
+    started = time.perf_counter()
+
+    try:
+        result = handler(header, payload, emit or (lambda _: None))
+    except Exception as e:
+        return {"id": job_id, "ok": False, "error": f"{type(e).__name__}: {e}"}
+
+    return {
+        "id": job_id,
+        "ok": True,
+        "result": result,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+def serve_stream(handler: JobHandler, reader: BinaryIO, writer: BinaryIO) -> bool:
+    """
+    Answer jobs from one stream until it closes
+
+    Returns:
+        True if the peer asked the worker to shut down
+    """
+    while True:
+        try:
+            frame = read_frame(reader)
+        except (ProtocolError, ValueError) as e:
+            write_frame(writer, {"id": None, "ok": False, "error": f"ProtocolError: {e}"})
+            return False
+
+        if frame is None:
+            return False
+
+        header, payload = frame
+        op = header.get("op", "process")
+
+        if op == "ping":
+            write_frame(writer, {"id": header.get("id"), "ok": True, "result": "pong"})
+        elif op == "shutdown":
+            write_frame(writer, {"id": header.get("id"), "ok": True, "result": None})
+            return True
+        else:
+            job_id = header.get("id")
+
+            def emit(partial, job_id=job_id):
+                write_frame(writer, {"id": job_id, "ok": True, "partial": partial})
+
+            write_frame(writer, handle_frame(handler, header, payload, emit))
+
+
+def serve_stdio(handler: JobHandler) -> None:
+    """
+    Serve jobs over stdin/stdout
+
+    Anything else printed while a job runs is sent to stderr so it cannot
+    corrupt the framed stream.
+    """
+    reader = sys.stdin.buffer
+    writer = sys.stdout.buffer
+    sys.stdout = sys.stderr
+    serve_stream(handler, reader, writer)
+
+
+def _bind_unix_socket(socket_path: str) -> socket.socket:
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen()
+    return server
+
+
+def _serve_connection(handler: JobHandler, conn: socket.socket) -> bool:
+    with conn, conn.makefile("rb") as reader, conn.makefile("wb") as writer:
+        return serve_stream(handler, reader, writer)
+
+
+def _reap_children() -> bool:
+    """Collect exited children; True if one of them was told to shut down"""
+    shutdown = False
+    while True:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return shutdown
+        if pid == 0:
+            return shutdown
+        if os.WIFEXITED(status) and os.WEXITSTATUS(status) == SHUTDOWN_STATUS:
+            shutdown = True
+
+
+def serve_unix_socket(handler: JobHandler, socket_path: str, fork: bool = False) -> None:
+    """
+    Serve jobs over a Unix domain socket
+
+    Connections are served one at a time, or with `fork` each in its own
+    child forked from this (already warm) process.
+    """
+    server = _bind_unix_socket(socket_path)
+    if fork:
+        # Wake up from accept() now and then to reap finished children
+        server.settimeout(0.5)
+
+    try:
+        while True:
+            if fork and _reap_children():
+                break
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                continue
+
+            if not fork:
+                if _serve_connection(handler, conn):
+                    break
+                continue
+
+            conn.settimeout(None)
+            pid = os.fork()
+            if pid == 0:
+                status = 1
+                try:
+                    server.close()
+                    signal.signal(signal.SIGINT, signal.SIG_DFL)
+                    status = SHUTDOWN_STATUS if _serve_connection(handler, conn) else 0
+                finally:
+                    sys.stdout.flush()
+                    os._exit(status)
+            conn.close()
+    finally:
+        server.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def request_unix_socket(socket_path: str, header: Dict, payload: bytes = b"",
+                        on_partial: Optional[Emit] = None) -> Dict:
+    """
+    Send one job to a worker listening on a Unix socket and wait for its reply
+
+    Partial results are passed to `on_partial` as they arrive. Raises OSError
+    if nothing is listening on the socket.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.connect(socket_path)
+        with conn.makefile("rb") as reader, conn.makefile("wb") as writer:
+            write_frame(writer, header, payload)
+            while True:
+                frame = read_frame(reader)
+                if frame is None:
+                    raise ProtocolError("Worker closed the connection without replying")
+                reply, _ = frame
+                if "partial" in reply:
+                    if on_partial is not None:
+                        on_partial(reply["partial"])
+                    continue
+                return reply
@@ -1,8 +1,12 @@
-import cv2
-import numpy as np
-from PIL import Image
+import sys
 from pathlib import Path
 
+from pipelines.boxes import dedupe
+from pipelines.lazy import lazy_import
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
 INPUT_IMAGE = "screenshot.png"
 OUTPUT_DIR = Path("segments")
 
@@ -10,6 +14,7 @@ OUTPUT_DIR = Path("segments")
 MIN_AREA = 5000          # ignore tiny noise regions
 KERNEL_SIZE = (25, 25)   # text block grouping
 PADDING = 8              # padding around crops
+MIN_OVERLAP = 0.5        # merge boxes overlapping this much of the smaller one
 
 
 def ensure_output_dir():
@@ -49,7 +54,9 @@ def preprocess(img):
     return dilated
 
 
-def find_segments(mask, original_img):
+def find_segments(mask, original_img, stats=None):
+    # stats, if given, gets the pixels that overlapping boxes covered more
+    # than once before they were merged ("saved_pixels")
     contours, _ = cv2.findContours(
         mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
     )
@@ -72,6 +79,10 @@ def find_segments(mask, original_img):
 
         boxes.append((x1, y1, x2, y2))
 
+    # Padding makes neighbours overlap; drop contained boxes, merge the rest
+    boxes, saved = dedupe(boxes, MIN_OVERLAP)
+    if stats is not None:
+        stats["saved_pixels"] = saved
     return boxes
 
 
@@ -92,8 +103,12 @@ def main():
     clear_output_dir()
     img = load_image(INPUT_IMAGE)
     mask = preprocess(img)
-    boxes = find_segments(mask, img)
+    stats = {}
+    boxes = find_segments(mask, img, stats)
     boxes = sort_boxes_reading_order(boxes)
+    if stats["saved_pixels"]:
+        print(f"Merged overlapping segments: {stats['saved_pixels']} duplicate pixels removed",
+              file=sys.stderr)
     print(boxes)
     save_segments(img, boxes)
 
@@ -1,13 +1,9 @@
 import { Effect, pipe, Schema, Data, Console, Schedule } from "effect";
 import { planningAgent } from "agents/planning";
 import sd from 'screenshot-desktop';
-import { writeFile } from "node:fs/promises";
 import { resolve } from "node:path";
-import { exec } from "node:child_process";
-import { promisify } from "node:util";
 import { tool } from "langchain";
-
-const execAsync = promisify(exec);
+import { getVisionWorker, type VisionSegment } from "utils/vision_worker";
 
 class AgentInvocationError extends Data.TaggedError("AgentInvocationError")<{
   readonly cause: unknown;
@@ -17,11 +13,6 @@ class ScreenshotError extends Data.TaggedError("ScreenshotError")<{
   readonly cause: unknown;
 }> {}
 
-class FileWriteError extends Data.TaggedError("FileWriteError")<{
-  readonly cause: unknown;
-  readonly path: string;
-}> {}
-
 class PythonPipelineError extends Data.TaggedError("PythonPipelineError")<{
   readonly cause: unknown;
   readonly stderr?: string;
@@ -89,39 +80,45 @@ const acceptMacOsUac = Effect.gen(function* () {
 });
 
 /**
- * Write screenshot to disk
+ * Run the Python vision pipeline on a resident worker, so the interpreter and
+ * its OpenCV imports are paid for once rather than on every capture.
+ * An in-memory capture is sent as the job's payload, so nothing touches disk
+ * and concurrent captures cannot overwrite each other.
+ * With `onSegment`, each segment's text is delivered as soon as it is OCR'd.
  */
-const saveScreenshot = (path: string, img: Buffer) =>
+const runVisionPipeline = (
+  scriptPath: string,
+  image: string | Buffer,
+  onSegment?: (segment: VisionSegment) => void
+) =>
   Effect.gen(function* () {
-    yield* Effect.logInfo(`Writing screenshot to ${path}...`);
-    
-    yield* Effect.tryPromise({
-      try: () => writeFile(path, img),
-      catch: (cause) => new FileWriteError({ cause, path }),
-    });
-
-    yield* Effect.logInfo("Screenshot saved successfully");
-    return path;
-  });
+    const label = typeof image === "string" ? image : `${image.length} byte frame`;
+    yield* Effect.logInfo(`Sending ${label} to vision worker: ${scriptPath}`);
 
-/**
- * Run the Python vision pipeline
- */
-const runVisionPipeline = (scriptPath: string) =>
-  Effect.gen(function* () {
-    yield* Effect.logInfo(`Executing Python pipeline: ${scriptPath}`);
-    
-    const { stdout, stderr } = yield* Effect.tryPromise({
-      try: () => execAsync(`python3 ${scriptPath}`),
+    const stream = onSegment !== undefined;
+    const reply = yield* Effect.tryPromise({
+      try: () =>
+        getVisionWorker(scriptPath).request(
+          typeof image === "string" ? { image_path: image, stream } : { stream },
+          typeof image === "string" ? undefined : image,
+          onSegment && ((partial) => onSegment(partial as VisionSegment))
+        ),
       catch: (cause) => new PythonPipelineError({ cause }),
     });
 
-    if (stderr) {
-      yield* Effect.logWarning(`Python stderr: ${stderr}`);
+    if (!reply.ok) {
+      return yield* Effect.fail(
+        new PythonPipelineError({ cause: reply.error, stderr: reply.error })
+      );
     }
 
-    yield* Effect.logInfo("Python pipeline completed");
-    return stdout;
+    yield* Effect.logInfo(`Python pipeline completed in ${reply.elapsed_ms}ms`);
+
+    // Streamed jobs end with a summary that carries the texts in reading order
+    const result = onSegment
+      ? (reply.result as { texts: unknown }).texts
+      : reply.result;
+    return JSON.stringify(result);
   });
 
 /**
@@ -176,13 +173,9 @@ const screenshotPipeline = Effect.gen(function* () {
   // Wait 10 seconds
   yield* Effect.sleep("5 seconds");
 
-  // Save to disk
-  const screenshotPath = resolve(__dirname, "../screenshot.png");
-  yield* saveScreenshot(screenshotPath, img);
-
-  // Run vision pipeline
+  // Run vision pipeline on the PNG bytes, without a round trip through disk
   const scriptPath = resolve(__dirname, "../pipelines/screenshot_pipeline.py");
-  const rawOutput = yield* runVisionPipeline(scriptPath);
+  const rawOutput = yield* runVisionPipeline(scriptPath, img);
 
   // Parse and validate output
   const visionResult = yield* parseVisionOutput(rawOutput);
@@ -195,14 +188,11 @@ const screenshotPipeline = Effect.gen(function* () {
 const screenshotPipelinePipe = pipe(
   takeScreenshot,
   Effect.flatMap((img) =>
-    pipe(
-      saveScreenshot(resolve(__dirname, "../screenshot.png"), img),
-      Effect.as(img)
+    runVisionPipeline(
+      resolve(__dirname, "../pipelines/screenshot_pipeline.py"),
+      img
     )
   ),
-  Effect.flatMap(() =>
-    runVisionPipeline(resolve(__dirname, "screenshot_pipeline.py"))
-  ),
   Effect.flatMap(parseVisionOutput),
   Effect.tap((result) =>
     Effect.logInfo(`Found ${result.length} detections`)
@@ -0,0 +1,155 @@
+import { spawn, type ChildProcessWithoutNullStreams } from "node:child_process";
+
+/**
+ * Client for the resident Python vision worker (`screenshot_pipeline.py --worker`).
+ *
+ * Frames on the wire are `[u32 big-endian header length][JSON header][payload]`,
+ * where the payload length is given by the header's `payload_size` field.
+ * A job may be answered by any number of `partial` frames before its reply.
+ */
+
+export type VisionJob = {
+  readonly image_path?: string;
+  readonly [key: string]: unknown;
+};
+
+export type VisionReply = {
+  readonly id: number | null;
+  readonly ok: boolean;
+  readonly result?: unknown;
+  readonly partial?: unknown;
+  readonly error?: string;
+  readonly elapsed_ms?: number;
+};
+
+/** One OCR'd segment, sent ahead of the reply for `stream: true` jobs */
+export type VisionSegment = {
+  readonly type: "segment";
+  readonly index: number;
+  readonly bbox: readonly [number, number, number, number];
+  readonly text: string;
+  readonly wall_ms: number;
+  readonly cpu_ms: number;
+  readonly reused: boolean;
+};
+
+type Pending = {
+  resolve: (reply: VisionReply) => void;
+  reject: (cause: unknown) => void;
+  onPartial?: (partial: unknown) => void;
+};
+
+const encodeFrame = (header: Record<string, unknown>, payload?: Buffer) => {
+  const body = Buffer.from(
+    JSON.stringify(payload ? { ...header, payload_size: payload.length } : header),
+    "utf-8"
+  );
+  const prefix = Buffer.alloc(4);
+  prefix.writeUInt32BE(body.length, 0);
+  return payload ? Buffer.concat([prefix, body, payload]) : Buffer.concat([prefix, body]);
+};
+
+export class VisionWorker {
+  private readonly proc: ChildProcessWithoutNullStreams;
+  private readonly pending = new Map<number, Pending>();
+  private buffer = Buffer.alloc(0);
+  private nextId = 1;
+  private exited = false;
+
+  constructor(scriptPath: string) {
+    this.proc = spawn("python3", [scriptPath, "--worker"]);
+    this.proc.stdout.on("data", (chunk: Buffer) => this.onData(chunk));
+    this.proc.stderr.on("data", (chunk: Buffer) => {
+      console.warn(`[vision worker] ${chunk.toString().trimEnd()}`);
+    });
+    this.proc.on("exit", (code) => {
+      this.exited = true;
+      this.rejectAll(new Error(`Vision worker exited with code ${code}`));
+    });
+    this.proc.on("error", (cause) => {
+      this.exited = true;
+      this.rejectAll(cause);
+    });
+  }
+
+  get alive() {
+    return !this.exited;
+  }
+
+  request(
+    job: VisionJob,
+    payload?: Buffer,
+    onPartial?: (partial: unknown) => void
+  ): Promise<VisionReply> {
+    if (this.exited) {
+      return Promise.reject(new Error("Vision worker is not running"));
+    }
+
+    const id = this.nextId++;
+    return new Promise((resolve, reject) => {
+      this.pending.set(id, { resolve, reject, onPartial });
+      this.proc.stdin.write(encodeFrame({ ...job, id }, payload));
+    });
+  }
+
+  stop() {
+    if (!this.exited) {
+      this.proc.stdin.write(encodeFrame({ op: "shutdown" }));
+      this.proc.stdin.end();
+    }
+  }
+
+  private onData(chunk: Buffer) {
+    this.buffer = Buffer.concat([this.buffer, chunk]);
+
+    while (this.buffer.length >= 4) {
+      const headerLength = this.buffer.readUInt32BE(0);
+      if (this.buffer.length < 4 + headerLength) return;
+
+      const reply = JSON.parse(
+        this.buffer.subarray(4, 4 + headerLength).toString("utf-8")
+      ) as VisionReply & { payload_size?: number };
+      const frameLength = 4 + headerLength + (reply.payload_size ?? 0);
+      if (this.buffer.length < frameLength) return;
+
+      this.buffer = this.buffer.subarray(frameLength);
+      this.settle(reply);
+    }
+  }
+
+  private settle(reply: VisionReply) {
+    if (reply.id === null) {
+      // Protocol errors are not tied to a job; the worker has dropped the stream.
+      this.rejectAll(new Error(reply.error ?? "Vision worker protocol error"));
+      return;
+    }
+
+    const pending = this.pending.get(reply.id);
+    if (!pending) return;
+    if (reply.partial !== undefined) {
+      pending.onPartial?.(reply.partial);
+      return;
+    }
+    this.pending.delete(reply.id);
+    pending.resolve(reply);
+  }
+
+  private rejectAll(cause: unknown) {
+    for (const { reject } of this.pending.values()) {
+      reject(cause);
+    }
+    this.pending.clear();
+  }
+}
+
+let worker: VisionWorker | undefined;
+
+/**
+ * Shared worker for the given script, respawned if the previous one died.
+ */
+export const getVisionWorker = (scriptPath: string) => {
+  if (!worker || !worker.alive) {
+    worker = new VisionWorker(scriptPath);
+  }
+  return worker;
+};
@@ -3,14 +3,38 @@ Screenshot Segmentation and OCR Pipeline for LLM Context
 Segments screenshots into meaningful regions and extracts text with spatial context
 """
 
-import pytesseract
 from PIL import Image, ImageDraw, ImageFilter
 import numpy as np
-from dataclasses import dataclass
-from typing import List, Dict, Tuple, Optional
+from dataclasses import dataclass, field
+from typing import List, Dict, Tuple, Optional, Sequence, Iterable, Iterator, Union
 import cv2
+import asyncio
+import copy
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Executor, ThreadPoolExecutor, wait
 from pathlib import Path
 
+from pipelines.aio import image_to_data_async
+from pipelines.boxes import area, bounding_box, duplicate_area, group_overlapping
+from pipelines.frame import Frame
+from pipelines.history import HistoryStore, get_history_store
+from pipelines.lazy import lazy_import
+from pipelines.ocr_cache import OcrCache, cache_enabled, content_key, get_ocr_cache
+from pipelines.incremental import FrameTracker, grow_rects, overlaps_any
+from pipelines.classifier import RegionClassifier
+from pipelines.merging import cluster_boxes, text_line_linker
+from pipelines.region_table import RegionTable
+from pipelines.instrumentation import Instrumentation, MetricsHook, cpu_seconds, reset_peak_rss
+from pipelines.preprocessing import DEFAULT_PROFILE, PROFILES, binarize
+from pipelines.ocr_pool import available_cores
+from pipelines.tiling import DEFAULT_TILE_SIZE, drop_seam_fragments, map_tiles, owned, should_tile, tile_grid
+
+# Imported when first used: pytesseract alone takes ~150 ms to import
+pytesseract = lazy_import("pytesseract")
+
 
 @dataclass
 class TextRegion:
@@ -25,6 +49,14 @@ class TextRegion:
         x, y, w, h = self.bbox
         return (x + w // 2, y + h // 2)
 
+    @classmethod
+    def from_table(cls, table: RegionTable) -> List['TextRegion']:
+        return [cls(r.text, r.bbox, r.confidence, r.region_type) for r in table]
+
+
+# A screenshot as a file path, encoded image bytes, a PIL image, an RGB array or a Frame
+ImageInput = Union[str, Path, bytes, Image.Image, np.ndarray, Frame]
+
 
 @dataclass
 class ScreenshotContext:
@@ -34,6 +66,12 @@ class ScreenshotContext:
     full_text: str
     llm_prompt: str
     metadata: Dict
+    # The same regions column by column (built from text_regions when not given)
+    region_table: Optional[RegionTable] = field(default=None, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.region_table is None:
+            self.region_table = RegionTable.from_regions(self.text_regions)
 
 
 class ScreenshotSegmentationPipeline:
@@ -41,10 +79,33 @@ class ScreenshotSegmentationPipeline:
     Pipeline for processing screenshots to extract contextual information for LLMs
     """
     
+    # Incremental mode re-OCRs only changed areas while they cover less than
+    # this fraction of the frame; beyond that a full pass is cheaper
+    MAX_DIRTY_AREA = 0.5
+    # Context kept around each changed area so words at its edge are re-read whole
+    DIRTY_MARGIN = 8
+    # Overlap between OCR tiles: wider than most words, so a word cut by one
+    # tile's edge is read whole by its neighbour
+    TILE_OVERLAP = 96
+    # segment_layout() merges boxes whose intersection covers this fraction
+    # of the smaller one, and drops boxes nested in another, across buckets
+    LAYOUT_MIN_OVERLAP = 0.5
+    # Reset the peak-RSS mark at the start of each process() call
+    _measure_peak_rss = True
+
     def __init__(self, 
                  min_confidence: float = 60.0,
                  merge_threshold: int = 20,
-                 enable_preprocessing: bool = True):
+                 enable_preprocessing: bool = True,
+                 incremental: bool = False,
+                 ocr_cache: Optional[OcrCache] = None,
+                 history: Optional[HistoryStore] = None,
+                 metrics_hooks: Sequence[MetricsHook] = (),
+                 trace_allocations: bool = False,
+                 preprocess_profile: Optional[str] = None,
+                 tiled: str = 'never',
+                 tile_size: int = DEFAULT_TILE_SIZE,
+                 classifier: Optional[RegionClassifier] = None):
         """
         Initialize the pipeline
         
@@ -52,40 +113,75 @@ class ScreenshotSegmentationPipeline:
             min_confidence: Minimum OCR confidence threshold (0-100)
             merge_threshold: Pixel distance for merging nearby text regions
             enable_preprocessing: Whether to apply image preprocessing
+            incremental: Reuse results from the previous process() call for
+                parts of the screenshot that did not change
+            ocr_cache: Cache for OCR output keyed by image content (defaults to
+                the shared process cache; disable with OCR_CACHE=0)
+            history: Store every processed screenshot's regions for later
+                search (defaults to the shared store when $OCR_HISTORY_PATH is set)
+            metrics_hooks: Callbacks that receive every stage/segment timing record
+            trace_allocations: Also record peak allocated bytes per stage
+            preprocess_profile: 'quality' (denoise everything), 'fast' (no
+                denoising) or 'adaptive' (denoise only noisy tiles); defaults
+                to $PREPROCESS_PROFILE or 'quality'
+            tiled: Preprocess and OCR overlapping tiles in parallel: 'auto'
+                (4K frames and up), 'always' or 'never'
+            tile_size: Tile edge length in pixels when tiling
+            classifier: Labels words by type (defaults to the built-in
+                keywords, overridable through $REGION_KEYWORDS_PATH)
         """
         self.min_confidence = min_confidence
         self.merge_threshold = merge_threshold
         self.enable_preprocessing = enable_preprocessing
+        self.incremental = incremental
+        self._tracker = FrameTracker() if incremental else None
+        self._last_words = RegionTable.empty()
+        self._last_context: Optional['ScreenshotContext'] = None
+        if ocr_cache is None and cache_enabled():
+            ocr_cache = get_ocr_cache()
+        self.ocr_cache = ocr_cache
+        self.history = history if history is not None else get_history_store()
+        self.metrics_hooks = list(metrics_hooks)
+        self.trace_allocations = trace_allocations
+        self.preprocess_profile = preprocess_profile or os.environ.get('PREPROCESS_PROFILE', DEFAULT_PROFILE)
+        if self.preprocess_profile not in PROFILES:
+            raise ValueError(f"Unknown preprocessing profile {self.preprocess_profile!r}")
+        # Tiles seen / denoised by the adaptive profile during the current process() call
+        self._preprocess_tiles: Counter = Counter()
+        should_tile(1, 1, tiled)  # validate the mode
+        self.tiled = tiled
+        self.tile_size = tile_size
+        self.classifier = classifier or RegionClassifier.from_env()
+        # Pixels the last segment_layout() call no longer covers twice
+        self.layout_saved_pixels = 0
 
     def preprocess_image(self, image: Image.Image) -> Image.Image:
         """
         Preprocess image to improve OCR accuracy
         """
-        if not self.enable_preprocessing:
-            return image.convert('RGB')  # Ensure RGB mode
-            
-        # Convert to numpy array for OpenCV processing
-        img_array = np.array(image)
+        # Convert back to PIL Image in RGB mode for pytesseract compatibility
+        return Image.fromarray(self.preprocess_frame(Frame.load(image))).convert('RGB')
+    
+    def preprocess_frame(self, frame: Frame) -> np.ndarray:
+        """
+        The plane of a frame to OCR: binarised grayscale, or the RGB pixels
+        when preprocessing is disabled
         
-        # Convert to grayscale
-        if len(img_array.shape) == 3:
-            gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
-        else:
-            gray = img_array
-            
-        # Apply adaptive thresholding for better text contrast
-        # This works well for screenshots with varying backgrounds
-        thresh = cv2.adaptiveThreshold(
-            gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-            cv2.THRESH_BINARY, 11, 2
-        )
+        The binarised plane is single-channel; tesseract reads it exactly as
+        it read the RGB copy preprocess_image makes of it.
+        """
+        if not self.enable_preprocessing:
+            return frame.rgb
         
-        # Denoise
-        denoised = cv2.fastNlMeansDenoising(thresh)
+        def compute() -> np.ndarray:
+            # Apply adaptive thresholding for better text contrast, then denoise
+            # as much as the profile asks for
+            binary, report = binarize(frame.gray, self.preprocess_profile)
+            if 'tiles' in report:
+                self._preprocess_tiles.update(tiles=report['tiles'], denoised_tiles=report['denoised_tiles'])
+            return binary
         
-        # Convert back to PIL Image in RGB mode for pytesseract compatibility
-        pil_image = Image.fromarray(denoised)
-        return pil_image.convert('RGB')
+        return frame.plane(('binary', self.preprocess_profile), compute)
         
     # def preprocess_image(self, image: Image.Image) -> Image.Image:
     #     """
@@ -115,14 +211,17 @@ class ScreenshotSegmentationPipeline:
         
     #     return Image.fromarray(denoised)
     
-    def segment_layout(self, image: Image.Image) -> Dict[str, List[Tuple[int, int, int, int]]]:
+    def segment_layout(self, image: ImageInput) -> Dict[str, List[Tuple[int, int, int, int]]]:
         """
         Segment the screenshot into logical regions using contour detection
         
+        Overlapping and nested boxes are collapsed across all region types;
+        a merged box is filed under the type of its largest member.
+
         Returns:
             Dictionary mapping region types to bounding boxes
         """
-        img_array = np.array(image.convert('L'))
+        img_array = Frame.load(image).gray
         
         # Edge detection to find UI elements
         edges = cv2.Canny(img_array, 50, 150)
@@ -145,6 +244,7 @@ class ScreenshotSegmentationPipeline:
             'footer': [],
             'other': []
         }
+        labelled = []
         
         for contour in contours:
             x, y, w, h = cv2.boundingRect(contour)
@@ -155,15 +255,24 @@ class ScreenshotSegmentationPipeline:
                 
             # Classify based on position
             if y < height * 0.15 and w > width * 0.5:
-                regions['header'].append((x, y, w, h))
+                labelled.append(('header', (x, y, x + w, y + h)))
             elif y > height * 0.85 and w > width * 0.5:
-                regions['footer'].append((x, y, w, h))
+                labelled.append(('footer', (x, y, x + w, y + h)))
             elif x < width * 0.25 and h > height * 0.3:
-                regions['sidebar'].append((x, y, w, h))
+                labelled.append(('sidebar', (x, y, x + w, y + h)))
             elif w > width * 0.3 and h > height * 0.3:
-                regions['main'].append((x, y, w, h))
+                labelled.append(('main', (x, y, x + w, y + h)))
             else:
-                regions['other'].append((x, y, w, h))
+                labelled.append(('other', (x, y, x + w, y + h)))
+
+        boxes = [box for _, box in labelled]
+        self.layout_saved_pixels = 0
+        for group in group_overlapping(boxes, self.LAYOUT_MIN_OVERLAP):
+            label = labelled[max(group, key=lambda i: area(boxes[i]))][0]
+            members = [boxes[i] for i in group]
+            x1, y1, x2, y2 = bounding_box(members)
+            regions[label].append((x1, y1, x2 - x1, y2 - y1))
+            self.layout_saved_pixels += duplicate_area(members)
                 
         return regions
     
@@ -209,193 +318,166 @@ class ScreenshotSegmentationPipeline:
         
     #     return text_regions
 
-    def extract_text_regions(self, image: Image.Image) -> List[TextRegion]:
+    def extract_text_regions(self, image: Union[Image.Image, np.ndarray]) -> RegionTable:
         """
         Extract text from image with bounding boxes and confidence scores
+        
+        Arrays (a frame's RGB pixels or preprocessed plane) are OCR'd as they are.
         """
         # Ensure image is in RGB mode and make a copy to avoid issues
-        if image.mode != 'RGB':
+        if isinstance(image, Image.Image) and image.mode != 'RGB':
             image = image.convert('RGB')
         
-        # Use pytesseract to get detailed data
-        try:
-            ocr_data = pytesseract.image_to_data(
-                image, 
-                output_type=pytesseract.Output.DICT,
-            )
-        except Exception as e:
-            print(f"OCR Error: {e}")
-        
-        text_regions = []
-        n_boxes = len(ocr_data['text'])
+        # Identical pixels give identical OCR output, so check the cache first
+        cache_key, ocr_data = self._cached_ocr_data(image)
         
-        for i in range(n_boxes):
-            # Filter by confidence
-            conf = float(ocr_data['conf'][i])
-            if conf < self.min_confidence:
-                continue
-                
-            text = ocr_data['text'][i].strip()
-            if not text:
-                continue
-                
-            # Extract bounding box
-            x = ocr_data['left'][i]
-            y = ocr_data['top'][i]
-            w = ocr_data['width'][i]
-            h = ocr_data['height'][i]
-            
-            # Determine region type based on text characteristics
-            region_type = self._classify_text_region(text, w, h)
-            
-            text_regions.append(TextRegion(
-                text=text,
-                bbox=(x, y, w, h),
-                confidence=conf,
-                region_type=region_type
-            ))
+        if ocr_data is None:
+            # Use pytesseract to get detailed data
+            try:
+                ocr_data = pytesseract.image_to_data(
+                    image, 
+                    output_type=pytesseract.Output.DICT,
+                )
+                self._store_ocr_data(cache_key, ocr_data)
+            except Exception as e:
+                print(f"OCR Error: {e}")
+                return RegionTable.empty()
         
-        return text_regions
+        return self._regions_from_ocr_data(ocr_data)
     
-    def _classify_text_region(self, text: str, width: int, height: int) -> str:
+    async def extract_text_regions_async(self, image: Union[Image.Image, np.ndarray]) -> RegionTable:
         """
-        Classify text region based on content and size
+        extract_text_regions with tesseract awaited as an asyncio subprocess
+        (OCR errors are raised rather than printed)
         """
-        text_lower = text.lower()
-        
-        # Button indicators
-        if len(text) < 20 and any(word in text_lower for word in 
-                                   ['submit', 'ok', 'cancel', 'save', 'delete', 'add']):
-            return 'button'
+        if isinstance(image, Image.Image) and image.mode != 'RGB':
+            image = image.convert('RGB')
         
-        # Navigation/menu items
-        if len(text) < 30 and any(word in text_lower for word in 
-                                   ['home', 'settings', 'profile', 'menu', 'help']):
-            return 'navigation'
+        cache_key, ocr_data = self._cached_ocr_data(image)
+        if ocr_data is None:
+            ocr_data = await image_to_data_async(image)
+            self._store_ocr_data(cache_key, ocr_data)
         
-        # Headers (short, possibly all caps)
-        if len(text) < 50 and (text.isupper() or height > 20):
-            return 'header'
+        return self._regions_from_ocr_data(ocr_data)
+    
+    def _cached_ocr_data(self, image: Union[Image.Image, np.ndarray]) -> Tuple[Optional[str], Optional[Dict]]:
+        """(cache key, cached image_to_data output or None)"""
+        if self.ocr_cache is None:
+            return None, None
+        cache_key = content_key(np.asarray(image), 'image_to_data')
+        cached_data = self.ocr_cache.get(cache_key)
+        return cache_key, json.loads(cached_data) if cached_data is not None else None
+    
+    def _store_ocr_data(self, cache_key: Optional[str], ocr_data: Dict) -> None:
+        if cache_key is not None:
+            self.ocr_cache.put(cache_key, json.dumps(ocr_data))
+    
+    def _regions_from_ocr_data(self, ocr_data: Dict) -> RegionTable:
+        """Confident, non-empty words of an image_to_data result"""
+        texts = np.array([str(t).strip() for t in ocr_data['text']], dtype=object)
+        conf = np.asarray(ocr_data['conf'], dtype=np.float64)
+        keep = np.flatnonzero((conf >= self.min_confidence) & (texts != ''))
         
-        # Labels (short text near form elements)
-        if len(text) < 30 and ':' in text:
-            return 'label'
+        texts = texts[keep]
+        x, y, w, h = (np.asarray(ocr_data[k], dtype=np.int32)[keep]
+                      for k in ('left', 'top', 'width', 'height'))
         
-        # Body text (longer content)
-        if len(text) > 50:
-            return 'body'
+        # Determine region type based on text characteristics
+        codes = self.classifier.classify(texts, h)
         
-        return 'text'
+        return RegionTable(texts, x, y, w, h, conf[keep], codes)
     
-    def merge_nearby_regions(self, regions: List[TextRegion]) -> List[TextRegion]:
+    def merge_nearby_regions(self, regions) -> RegionTable:
         """
         Merge text regions that are close together
-        """
-        if not regions:
-            return regions
         
-        # Sort by position (top to bottom, left to right)
-        sorted_regions = sorted(regions, key=lambda r: (r.bbox[1], r.bbox[0]))
-        
-        merged = []
-        current_group = [sorted_regions[0]]
-        
-        for region in sorted_regions[1:]:
-            last = current_group[-1]
-            
-            # Check if regions are close enough to merge
-            x1, y1, w1, h1 = last.bbox
-            x2, y2, w2, h2 = region.bbox
-            
-            # Calculate distance between regions
-            horizontal_gap = x2 - (x1 + w1)
-            vertical_gap = y2 - (y1 + h1)
-            
-            # Merge if on same line or very close
-            if (abs(y1 - y2) < h1 * 0.5 and horizontal_gap < self.merge_threshold) or \
-               (abs(x1 - x2) < w1 * 0.5 and vertical_gap < self.merge_threshold):
-                current_group.append(region)
-            else:
-                # Create merged region from group
-                if current_group:
-                    merged.append(self._merge_region_group(current_group))
-                current_group = [region]
-        
-        # Don't forget the last group
-        if current_group:
-            merged.append(self._merge_region_group(current_group))
-        
-        return merged
+        Every pair of words on the same line or in the same column within
+        merge_threshold pixels is linked (found through a grid index), and
+        each connected group becomes one region.
+        """
+        table = RegionTable.from_regions(regions)
+        if not len(table):
+            return table
+        
+        groups = cluster_boxes(
+            table.boxes(),
+            text_line_linker(self.merge_threshold),
+            reach=self.merge_threshold,
+            relative_reach=0.5,
+        )
+        return self._merge_region_groups(table, groups)
     
-    def _merge_region_group(self, group: List[TextRegion]) -> TextRegion:
+    def _merge_region_groups(self, table: RegionTable, groups: List[List[int]]) -> RegionTable:
         """
-        Merge a group of text regions into one
+        Merge each group of regions (in reading order) into one: the union of
+        their boxes, texts joined with spaces, mean confidence and the most
+        common region type (the earliest one on ties)
         """
-        if len(group) == 1:
-            return group[0]
-        
-        # Combine text
-        combined_text = ' '.join(r.text for r in group)
-        
-        # Calculate combined bounding box
-        min_x = min(r.bbox[0] for r in group)
-        min_y = min(r.bbox[1] for r in group)
-        max_x = max(r.bbox[0] + r.bbox[2] for r in group)
-        max_y = max(r.bbox[1] + r.bbox[3] for r in group)
-        
-        # Average confidence
-        avg_conf = sum(r.confidence for r in group) / len(group)
-        
-        # Use most common region type
-        region_types = [r.region_type for r in group]
-        most_common_type = max(set(region_types), key=region_types.count)
-        
-        return TextRegion(
-            text=combined_text,
-            bbox=(min_x, min_y, max_x - min_x, max_y - min_y),
-            confidence=avg_conf,
-            region_type=most_common_type
-        )
+        sizes = np.array([len(g) for g in groups])
+        starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        order = np.concatenate([np.asarray(g, dtype=np.intp) for g in groups])
+        
+        corners = table.corners()[order]
+        x1 = np.minimum.reduceat(corners[:, 0], starts)
+        y1 = np.minimum.reduceat(corners[:, 1], starts)
+        x2 = np.maximum.reduceat(corners[:, 2], starts)
+        y2 = np.maximum.reduceat(corners[:, 3], starts)
+        confidence = np.add.reduceat(table.confidence[order], starts) / sizes
+        
+        # Majority type per group, ties going to the type seen first
+        labels = np.repeat(np.arange(len(groups)), sizes)
+        codes = table.type_code[order].astype(np.intp)
+        counts = np.zeros((len(groups), codes.max() + 1), dtype=np.int64)
+        np.add.at(counts, (labels, codes), 1)
+        first = np.full(counts.shape, len(order), dtype=np.int64)
+        np.minimum.at(first, (labels, codes), np.arange(len(order)))
+        is_max = counts == counts.max(axis=1, keepdims=True)
+        majority = np.where(is_max, first, len(order) + 1).argmin(axis=1)
+        
+        texts = [' '.join(table.text[g]) for g in groups]
+        return RegionTable(texts, x1, y1, x2 - x1, y2 - y1, confidence, majority)
     
     def generate_layout_description(self, 
-                                    text_regions: List[TextRegion],
+                                    text_regions,
                                     image_size: Tuple[int, int]) -> str:
         """
         Generate natural language description of the layout
         """
         width, height = image_size
+        table = RegionTable.from_regions(text_regions)
         
         # Group regions by vertical position
-        top_regions = [r for r in text_regions if r.bbox[1] < height * 0.2]
-        middle_regions = [r for r in text_regions if height * 0.2 <= r.bbox[1] < height * 0.8]
-        bottom_regions = [r for r in text_regions if r.bbox[1] >= height * 0.8]
+        y = table.y
+        top = y < height * 0.2
+        middle = (height * 0.2 <= y) & (y < height * 0.8)
+        bottom = y >= height * 0.8
         
         # Build description
         description_parts = []
         
-        if top_regions:
-            headers = [r for r in top_regions if r.region_type in ['header', 'navigation']]
-            if headers:
+        if top.any():
+            headers = np.flatnonzero(top & table.of_type('header', 'navigation'))
+            if len(headers):
                 description_parts.append(
-                    f"Top section contains: {', '.join(r.text for r in headers[:3])}"
+                    f"Top section contains: {', '.join(table.text[headers[:3]])}"
                 )
         
-        if middle_regions:
-            main_content = [r for r in middle_regions if r.region_type == 'body']
+        if middle.any():
+            main_content = np.count_nonzero(middle & table.of_type('body'))
             if main_content:
                 description_parts.append(
-                    f"Main content area with {len(main_content)} text blocks"
+                    f"Main content area with {main_content} text blocks"
                 )
             
-            buttons = [r for r in middle_regions if r.region_type == 'button']
-            if buttons:
+            buttons = np.flatnonzero(middle & table.of_type('button'))
+            if len(buttons):
                 description_parts.append(
-                    f"Interactive elements: {', '.join(r.text for r in buttons)}"
+                    f"Interactive elements: {', '.join(table.text[buttons])}"
                 )
         
-        if bottom_regions:
+        if bottom.any():
             description_parts.append(
-                f"Bottom section contains: {', '.join(r.text for r in bottom_regions[:2])}"
+                f"Bottom section contains: {', '.join(table.text[np.flatnonzero(bottom)[:2]])}"
             )
         
         return '. '.join(description_parts) + '.'
@@ -413,72 +495,372 @@ Extracted Text by Region:
 """
         
         # Group by region type
-        by_type = {}
-        for region in context.text_regions:
-            if region.region_type not in by_type:
-                by_type[region.region_type] = []
-            by_type[region.region_type].append(region)
+        table = context.region_table
         
         # Add each region type
-        for region_type, regions in sorted(by_type.items()):
+        for region_type in sorted(table.region_types()):
             prompt += f"\n{region_type.upper()}:\n"
-            for region in regions[:5]:  # Limit to avoid overwhelming
-                prompt += f"  - {region.text}\n"
+            first = np.flatnonzero(table.of_type(region_type))[:5]  # Limit to avoid overwhelming
+            for text in table.text[first]:
+                prompt += f"  - {text}\n"
         
         prompt += f"\nFull Text Content:\n{context.full_text[:1000]}"  # Truncate if very long
         
         return prompt
     
-    def process(self, image_path: str) -> ScreenshotContext:
+    def process(self, image_path: ImageInput) -> ScreenshotContext:
         """
         Main pipeline method to process a screenshot
         
         Args:
-            image_path: Path to screenshot image
+            image_path: Path to screenshot image, encoded image bytes, an
+                already decoded PIL image / RGB array, or a Frame (see
+                Frame.from_raw / Frame.from_shared_memory for raw pixels)
             
         Returns:
-            ScreenshotContext with all extracted information
+            ScreenshotContext with all extracted information; per-stage timings
+            and the peak RSS of the call are in metadata['timings']
         """
-        # Load image
-        image = Image.open(image_path)
-        original_size = image.size
+        if self._measure_peak_rss:
+            reset_peak_rss()
+        inst = Instrumentation(self.trace_allocations, self.metrics_hooks)
+        self._preprocess_tiles = Counter()
+        
+        # Decode once; every stage works on this buffer and planes derived from it
+        with inst.stage('load'):
+            frame = Frame.load(image_path)
+        original_size = frame.size
+        
+        # Compare with the previous screenshot in incremental mode
+        change = None
+        if self._tracker is not None:
+            with inst.stage('compare'):
+                change = self._tracker.compare(frame.rgb)
+            if change is not None and change.identical and self._last_context is not None:
+                # Same regions as last time, with this call's own metadata
+                context = copy.copy(self._last_context)
+                context.metadata = {**context.metadata,
+                                    'incremental': {'identical': True, 'reocr_areas': 0}}
+                # Still on screen: extends the stored frame's last_seen
+                self._record_history(context)
+                context.metadata['timings'] = inst.finish(identical=True)
+                return context
+        
+        dirty_area = 0.0
+        if change is not None:
+            width, height = original_size
+            dirty_area = sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in change.dirty) / (width * height)
+        
+        if change is not None and dirty_area < self.MAX_DIRTY_AREA:
+            # Re-OCR only what changed
+            with inst.stage('ocr'):
+                text_regions, reocr_areas = self._extract_changed_regions(frame, change.dirty, inst)
+        elif should_tile(*original_size, self.tiled):
+            # Preprocess and extract text tile by tile, in parallel
+            with inst.stage('tiled_ocr'):
+                text_regions = self._extract_tiled(frame, inst)
+            reocr_areas = None
+        else:
+            # Preprocess
+            with inst.stage('preprocess'):
+                processed = self.preprocess_frame(frame)
+            
+            # Extract text regions
+            with inst.stage('ocr'):
+                text_regions = self.extract_text_regions(processed)
+            reocr_areas = None
+        
+        if self._tracker is not None:
+            self._tracker.update(frame.rgb)
+            self._last_words = text_regions
+        
+        context = self._build_context(text_regions, original_size, inst, reocr_areas)
+        self._last_context = context
+        return context
+    
+    async def process_async(self,
+                            image_path: ImageInput,
+                            timeout: Optional[float] = None,
+                            executor: Optional[Executor] = None) -> ScreenshotContext:
+        """
+        process() for asyncio services
         
-        # Preprocess
-        processed_image = self.preprocess_image(image)
+        Decoding, preprocessing and context building run in `executor` (the
+        loop's default when None); tesseract is awaited as a subprocess, so
+        one event loop can run many of these concurrently. Each call works on
+        its own frame like process_many: incremental state is not used.
         
-        # Extract text regions
-        text_regions = self.extract_text_regions(processed_image)
+        Args:
+            image_path: Path, encoded bytes, PIL image, RGB array or Frame
+            timeout: Seconds before the request is cancelled (None = no limit)
+            executor: Where CPU-bound stages run
+            
+        Raises:
+            asyncio.TimeoutError: When `timeout` expires. As with any
+                cancellation, running tesseract processes are killed,
+                tiled frames included.
+        """
+        return await asyncio.wait_for(
+            self._batch_worker()._process_async(image_path, executor), timeout)
+    
+    async def _process_async(self, image_path: ImageInput,
+                             executor: Optional[Executor]) -> ScreenshotContext:
+        loop = asyncio.get_running_loop()
+        inst = Instrumentation(self.trace_allocations, self.metrics_hooks)
+        
+        with inst.stage('load'):
+            frame = await loop.run_in_executor(executor, Frame.load, image_path)
+        original_size = frame.size
+        
+        if should_tile(*original_size, self.tiled):
+            with inst.stage('tiled_ocr'):
+                text_regions = await self._extract_tiled_async(frame, executor, inst)
+        else:
+            with inst.stage('preprocess'):
+                processed = await loop.run_in_executor(executor, self.preprocess_frame, frame)
+            with inst.stage('ocr'):
+                text_regions = await self.extract_text_regions_async(processed)
         
+        return await loop.run_in_executor(
+            executor, self._build_context, text_regions, original_size, inst, None)
+    
+    def _build_context(self,
+                       text_regions: RegionTable,
+                       original_size: Tuple[int, int],
+                       inst: Instrumentation,
+                       reocr_areas: Optional[int]) -> ScreenshotContext:
+        """Merge, describe and prompt from word-level regions"""
         # Merge nearby regions
-        merged_regions = self.merge_nearby_regions(text_regions)
+        with inst.stage('merge'):
+            merged_regions = self.merge_nearby_regions(text_regions)
         
         # Generate layout description
-        layout_desc = self.generate_layout_description(merged_regions, original_size)
+        with inst.stage('layout'):
+            layout_desc = self.generate_layout_description(merged_regions, original_size)
         
         # Combine all text
-        full_text = '\n'.join(r.text for r in sorted(
-            merged_regions, 
-            key=lambda r: (r.bbox[1], r.bbox[0])
-        ))
+        full_text = '\n'.join(merged_regions.text[merged_regions.reading_order()])
         
         # Create context object
         context = ScreenshotContext(
-            text_regions=merged_regions,
+            text_regions=TextRegion.from_table(merged_regions),
             layout_description=layout_desc,
             full_text=full_text,
             llm_prompt='',  # Will be filled next
             metadata={
                 'image_size': original_size,
                 'num_regions': len(merged_regions),
-                'region_types': list(set(r.region_type for r in merged_regions))
-            }
+                'region_types': merged_regions.region_types(),
+                'preprocess_profile': self.preprocess_profile if self.enable_preprocessing else None,
+            },
+            region_table=merged_regions,
         )
+        if self._preprocess_tiles:
+            context.metadata['preprocess_tiles'] = dict(self._preprocess_tiles)
+        
+        if self.incremental:
+            context.metadata['incremental'] = {'identical': False, 'reocr_areas': reocr_areas}
         
         # Generate LLM prompt
-        context.llm_prompt = self.create_llm_prompt(context)
+        with inst.stage('prompt'):
+            context.llm_prompt = self.create_llm_prompt(context)
+        
+        with inst.stage('history'):
+            self._record_history(context)
         
+        context.metadata['timings'] = inst.finish(num_regions=len(merged_regions))
         return context
     
+    def _record_history(self, context: 'ScreenshotContext') -> None:
+        if self.history is None:
+            return
+        regions = context.region_table
+        order = regions.reading_order()
+        self.history.add_frame(
+            [(r.bbox, r.text, r.region_type) for r in regions.take(order)],
+            source='vision_pipeline',
+            size=context.metadata['image_size'],
+        )
+    
+    def process_many(self,
+                     images: Iterable[ImageInput],
+                     max_workers: Optional[int] = None,
+                     ordered: bool = False) -> Iterator[ScreenshotContext]:
+        """
+        Process many screenshots concurrently, yielding each context as it finishes
+        
+        Decoding, preprocessing and OCR of different screenshots overlap on a
+        thread pool (OpenCV and the tesseract subprocesses release the GIL).
+        Only a few screenshots per worker are read ahead, so `images` can be
+        a lazy iterable over thousands of files. Frames are independent:
+        incremental mode does not apply here.
+        
+        Args:
+            images: Paths, encoded bytes, PIL images, RGB arrays or Frames
+            max_workers: Screenshots in flight (default: all cores)
+            ordered: Yield in input order instead of completion order
+            
+        Yields:
+            ScreenshotContext per input; metadata['batch_index'] is its
+            position in `images`. An error processing any screenshot is
+            raised from the generator when that screenshot finishes.
+        """
+        workers = max_workers or available_cores()
+        window = workers * 2
+        items = enumerate(images)
+        
+        def run(index: int, image: ImageInput) -> Tuple[int, ScreenshotContext]:
+            context = self._batch_worker().process(image)
+            context.metadata['batch_index'] = index
+            return index, context
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = set()
+            finished: Dict[int, ScreenshotContext] = {}
+            next_index = 0
+            exhausted = False
+            
+            try:
+                while True:
+                    # Ordered results wait in `finished`, so they count against the window
+                    while not exhausted and len(pending) + len(finished) < window:
+                        item = next(items, None)
+                        if item is None:
+                            exhausted = True
+                        else:
+                            pending.add(executor.submit(run, *item))
+                    if not pending:
+                        break
+                    
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        index, context = future.result()
+                        if not ordered:
+                            yield context
+                            continue
+                        finished[index] = context
+                        while next_index in finished:
+                            yield finished.pop(next_index)
+                            next_index += 1
+            finally:
+                for future in pending:
+                    future.cancel()
+    
+    def _batch_worker(self) -> 'ScreenshotSegmentationPipeline':
+        """A copy that shares settings and the OCR cache but no per-frame state"""
+        worker = copy.copy(self)
+        worker.incremental = False
+        worker._tracker = None
+        worker._last_words = RegionTable.empty()
+        worker._last_context = None
+        worker._preprocess_tiles = Counter()
+        # Runs overlap, so only the process-wide peak RSS is meaningful
+        worker._measure_peak_rss = False
+        return worker
+    
+    def _extract_changed_regions(self,
+                                 frame: Frame,
+                                 dirty: List[Tuple[int, int, int, int]],
+                                 instrumentation: Optional[Instrumentation] = None
+                                 ) -> Tuple[RegionTable, int]:
+        """
+        Re-OCR the changed areas of a screenshot and keep the previous words elsewhere
+        
+        Returns:
+            (word-level text regions for the whole frame, number of areas re-OCR'd)
+        """
+        width, height = frame.size
+        previous = self._last_words.corners()
+        
+        # Grow each changed area over any word it cuts through
+        areas = grow_rects(dirty, [tuple(b) for b in previous.tolist()],
+                           self.DIRTY_MARGIN, width, height)
+        stale = overlaps_any(previous, areas)
+        tables = [self._last_words.take(~stale)]
+        
+        for i, (x1, y1, x2, y2) in enumerate(areas):
+            wall, cpu = time.perf_counter(), cpu_seconds()
+            crop = self.preprocess_frame(frame.crop(x1, y1, x2, y2))
+            words = self.extract_text_regions(crop).shifted(x1, y1)
+            tables.append(words)
+            
+            if instrumentation is not None:
+                instrumentation.segment(i, (time.perf_counter() - wall) * 1000,
+                                        (cpu_seconds() - cpu) * 1000, crop.nbytes,
+                                        bbox=[x1, y1, x2 - x1, y2 - y1], words=len(words))
+        
+        return RegionTable.concat(tables), len(areas)
+    
+    def _extract_tiled(self,
+                       frame: Frame,
+                       instrumentation: Optional[Instrumentation] = None) -> RegionTable:
+        """
+        Word-level text regions for the whole frame, OCR'd as overlapping tiles
+        
+        Each tile keeps the words centred in its core; fragments of words cut
+        by a seam are dropped in favour of the whole word from the next tile.
+        """
+        width, height = frame.size
+        tiles = tile_grid(width, height, self.tile_size, self.TILE_OVERLAP)
+        
+        def run(_: np.ndarray, tile) -> Tuple[RegionTable, float, float, int]:
+            wall, cpu = time.perf_counter(), time.thread_time()
+            # A view of the frame, so planes it already has (gray, rgb) are sliced, not redone
+            plane = self.preprocess_frame(frame.crop(*tile.outer))
+            words = self.extract_text_regions(plane).shifted(tile.outer[0], tile.outer[1])
+            words = words.take(owned(words.boxes(), tile))
+            return (words, (time.perf_counter() - wall) * 1000, (time.thread_time() - cpu) * 1000,
+                    plane.nbytes)
+        
+        results = map_tiles(run, frame.pixels, tiles, available_cores())
+        return self._stitch_tiles(tiles, results, instrumentation)
+    
+    async def _extract_tiled_async(self,
+                                   frame: Frame,
+                                   executor: Optional[Executor],
+                                   instrumentation: Optional[Instrumentation] = None) -> RegionTable:
+        """
+        _extract_tiled with each tile's tesseract awaited as a subprocess, so
+        cancelling the call kills the running ones. Tiles are preprocessed in
+        `executor`; a tile's cpu_ms covers its preprocessing only.
+        """
+        loop = asyncio.get_running_loop()
+        width, height = frame.size
+        tiles = tile_grid(width, height, self.tile_size, self.TILE_OVERLAP)
+        limit = asyncio.Semaphore(available_cores())
+        
+        def preprocess(tile) -> Tuple[np.ndarray, float]:
+            cpu = time.thread_time()
+            plane = self.preprocess_frame(frame.crop(*tile.outer))
+            return plane, (time.thread_time() - cpu) * 1000
+        
+        async def run(tile) -> Tuple[RegionTable, float, float, int]:
+            async with limit:
+                wall = time.perf_counter()
+                plane, cpu_ms = await loop.run_in_executor(executor, preprocess, tile)
+                words = await self.extract_text_regions_async(plane)
+            words = words.shifted(tile.outer[0], tile.outer[1])
+            words = words.take(owned(words.boxes(), tile))
+            return words, (time.perf_counter() - wall) * 1000, cpu_ms, plane.nbytes
+        
+        results = await asyncio.gather(*(run(tile) for tile in tiles))
+        return self._stitch_tiles(tiles, results, instrumentation)
+    
+    def _stitch_tiles(self,
+                      tiles: Sequence,
+                      results: Sequence[Tuple[RegionTable, float, float, int]],
+                      instrumentation: Optional[Instrumentation]) -> RegionTable:
+        """Record each tile's OCR cost and join their words, minus seam fragments"""
+        for i, (tile, (words, wall_ms, cpu_ms, nbytes)) in enumerate(zip(tiles, results)):
+            if instrumentation is not None:
+                x1, y1, x2, y2 = tile.outer
+                instrumentation.segment(i, wall_ms, cpu_ms, nbytes,
+                                        bbox=[x1, y1, x2 - x1, y2 - y1], words=len(words))
+        
+        text_regions = RegionTable.concat([words for words, *_ in results])
+        tile_ids = np.repeat(np.arange(len(tiles)), [len(words) for words, *_ in results])
+        return text_regions.take(drop_seam_fragments(text_regions.boxes(), tile_ids))
+    
     def visualize_regions(self, 
                          image_path: str, 
                          context: ScreenshotContext,
@@ -0,0 +1,98 @@
+import os
+import stat
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# The pipelines import each other as `pipelines.x`, from engine/src
+ENGINE = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ENGINE / "src"))
+sys.path.insert(1, str(ENGINE / "benchmarks"))
+
+# Stands in for the tesseract CLI: each page reads as "ink <dark pixel count>",
+# each dark blob as a word "w<x>_<y>" in TSV mode, and an all-white page fails
+STUB_TESSERACT = '''\
+import io
+import sys
+
+import cv2
+import numpy as np
+from PIL import Image, ImageSequence
+
+args = sys.argv[1:]
+if args[0] == "--version":
+    print("tesseract 5.0.0 (stub)")
+    sys.exit(0)
+
+source, output = args[0], args[1]
+if source == "stdin":
+    files = [io.BytesIO(sys.stdin.buffer.read())]
+elif source.endswith(".txt"):
+    files = [line.strip() for line in open(source) if line.strip()]
+else:
+    files = [source]
+pages = [np.array(page.convert("L")) for f in files for page in ImageSequence.Iterator(Image.open(f))]
+
+if any((page == 255).all() for page in pages):
+    sys.stderr.write("stub: blank page")
+    sys.exit(1)
+
+# The CLI engines ask for "tsv"; pytesseract.image_to_data sets the variable
+tsv = "tsv" in args or "tessedit_create_tsv=1" in args
+if tsv:
+    rows = ["level\\tpage_num\\tblock_num\\tpar_num\\tline_num\\tword_num\\tleft\\ttop\\twidth\\theight\\tconf\\ttext"]
+    for p, page in enumerate(pages, 1):
+        n, _, blobs, _ = cv2.connectedComponentsWithStats((page < 128).astype(np.uint8))
+        for k, (x, y, w, h, _) in enumerate(blobs[1:], 1):
+            rows.append(f"5\\t{p}\\t1\\t1\\t1\\t{k}\\t{x}\\t{y}\\t{w}\\t{h}\\t95\\tw{x}_{y}")
+    text = "\\n".join(rows) + "\\n"
+else:
+    text = "".join(f"ink {int((page < 128).sum())}\\n\\f" for page in pages)
+
+if output == "stdout":
+    sys.stdout.write(text)
+else:
+    open(output + (".tsv" if tsv else ".txt"), "w").write(text)
+'''
+
+
+@pytest.fixture
+def stub_tesseract(tmp_path, monkeypatch):
+    """Put the stub ``tesseract`` first on PATH, with the OCR cache off"""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    script = bin_dir / "tesseract"
+    script.write_text(f"#!{sys.executable}\n{STUB_TESSERACT}")
+    script.chmod(script.stat().st_mode | stat.S_IXUSR)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("OCR_CACHE", "0")
+    monkeypatch.delenv("OCR_MODE", raising=False)
+    return script
+
+
+@pytest.fixture
+def ocr(stub_tesseract, monkeypatch, tmp_path):
+    """The stub behind one batch engine process, run from `tmp_path`, history off"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("OCR_ENGINE", "batch")
+    monkeypatch.setenv("OCR_MAX_WORKERS", "1")
+    monkeypatch.delenv("OCR_HISTORY_PATH", raising=False)
+
+
+@pytest.fixture
+def blocks():
+    """Four separate segments of text-like stripes, each with its own ink count (BGR)"""
+    image = np.full((300, 500, 3), 255, dtype=np.uint8)
+    for i, (x, y) in enumerate([(20, 20), (300, 20), (20, 200), (300, 200)]):
+        image[y:y + 30:6, x:x + 90 + 10 * i:3] = 0
+        image[y:y + 30:6, x + 1:x + 90 + 10 * i:3] = 0
+    return image
+
+
+@pytest.fixture(scope="session")
+def screenshot():
+    """Synthetic UI frames (BGR), as drawn for the benchmarks"""
+    from synthetic import make_screenshot
+    return make_screenshot
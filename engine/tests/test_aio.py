@@ -0,0 +1,101 @@
+import asyncio
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+import pipeline
+from pipelines.aio import image_to_data_async, recognize_async, recognize_regions_async
+from pipelines.ocr_engine import TesseractCliEngine
+from vision_pipeline import ScreenshotSegmentationPipeline
+
+
+@pytest.fixture
+def hanging_tesseract(tmp_path, monkeypatch):
+    """A ``tesseract`` that records its pid and never answers"""
+    bin_dir = tmp_path / "hang"
+    bin_dir.mkdir()
+    pid_file = tmp_path / "tesseract.pid"
+    script = bin_dir / "tesseract"
+    script.write_text(f"#!{sys.executable}\nimport os, time\n"
+                      f"open({str(pid_file)!r}, 'w').write(str(os.getpid()))\ntime.sleep(60)\n")
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return pid_file
+
+
+def words(count):
+    image = np.full((40, 200), 255, dtype=np.uint8)
+    for i in range(count):
+        image[10:20, 10 + 20 * i:20 + 20 * i] = 0
+    return image
+
+
+def test_recognize_async(ocr):
+    assert asyncio.run(recognize_async(words(3))) == "ink 300"
+    with pytest.raises(RuntimeError, match="blank page"):
+        asyncio.run(recognize_async(np.full((8, 8), 255, dtype=np.uint8)))
+
+
+def test_regions_match_the_synchronous_frame_pass(ocr):
+    image = cv2.cvtColor(words(6), cv2.COLOR_GRAY2BGR)
+    boxes = [(0, 0, 45, 40), (45, 0, 200, 40)]
+    texts = asyncio.run(recognize_regions_async(image, boxes))
+    assert texts == TesseractCliEngine().recognize_regions(image, boxes)
+    assert texts == ["w10_10 w30_10", "w50_10 w70_10 w90_10 w110_10"]
+    assert asyncio.run(recognize_regions_async(image, [])) == []
+
+
+def test_image_to_data_async(ocr):
+    data = asyncio.run(image_to_data_async(words(2)))
+    assert data["text"] == ["w10_10", "w30_10"] and data["left"] == [10, 30]
+
+
+def test_timeouts_kill_tesseract(hanging_tesseract):
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(recognize_async(words(1)), 0.5)
+
+    asyncio.run(run())
+    pid = int(hanging_tesseract.read_text())
+    with pytest.raises(ProcessLookupError):
+        os.kill(pid, 0)
+
+
+def test_build_llm_context_async_matches_sync(ocr, screenshot):
+    image = screenshot(800, 480, seed=4)
+    expected = pipeline.build_llm_context(image)
+    context = asyncio.run(pipeline.build_llm_context_async(image, timeout=60))
+    assert context["regions"] == expected["regions"]
+    assert context["num_regions"] == expected["num_regions"]
+    assert context["regions"] and all(r["text"].startswith("ink ") for r in context["regions"])
+
+
+def test_process_async_matches_process(ocr, screenshot):
+    image = cv2.cvtColor(screenshot(640, 360, seed=1), cv2.COLOR_BGR2RGB)
+    vp = ScreenshotSegmentationPipeline(ocr_cache=None)
+    expected = vp.process(image)
+    context = asyncio.run(vp.process_async(image, timeout=60))
+    assert context.full_text == expected.full_text and context.full_text
+    assert context.text_regions == expected.text_regions
+
+
+def test_tiled_process_async_matches_process(ocr, screenshot):
+    image = cv2.cvtColor(screenshot(640, 360, density=0.9, seed=2), cv2.COLOR_BGR2RGB)
+    vp = ScreenshotSegmentationPipeline(ocr_cache=None, tiled="always", tile_size=256)
+    expected = vp.process(image)
+    context = asyncio.run(vp.process_async(image, timeout=60))
+    assert context.full_text == expected.full_text and context.full_text
+    assert len(context.metadata["timings"]["segments"]) == len(expected.metadata["timings"]["segments"])
+
+
+def test_tiled_timeouts_kill_tesseract(hanging_tesseract, screenshot):
+    image = cv2.cvtColor(screenshot(640, 360, density=0.9, seed=2), cv2.COLOR_BGR2RGB)
+    vp = ScreenshotSegmentationPipeline(ocr_cache=None, tiled="always", tile_size=256)
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(vp.process_async(image, timeout=1))
+    pid = int(hanging_tesseract.read_text())
+    with pytest.raises(ProcessLookupError):
+        os.kill(pid, 0)
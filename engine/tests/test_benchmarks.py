@@ -0,0 +1,73 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from synthetic import make_screenshot
+
+RUN_BENCHMARKS = Path(__file__).resolve().parent.parent / "benchmarks" / "run_benchmarks.py"
+
+
+@pytest.fixture
+def bench(monkeypatch):
+    # Importing the suite turns the OCR cache off for the whole process
+    monkeypatch.setenv("OCR_CACHE", "0")
+    import run_benchmarks
+    return run_benchmarks
+
+
+def test_synthetic_frames_are_reproducible():
+    frame = make_screenshot(640, 360, density=0.5, seed=3)
+    assert frame.shape == (360, 640, 3) and frame.dtype == np.uint8
+    assert np.array_equal(frame, make_screenshot(640, 360, density=0.5, seed=3))
+    assert not np.array_equal(frame, make_screenshot(640, 360, density=0.5, seed=4))
+    # Denser frames carry more ink
+    ink = [(make_screenshot(640, 360, density=d) < 128).sum() for d in (0.2, 0.9)]
+    assert ink[0] < ink[1]
+
+
+def test_measure(bench):
+    calls = []
+    result = bench.measure(lambda: calls.append(1), warmup=2, repeat=3)
+    assert len(calls) == 2 + 3 + 1  # warmup, timed runs, one traced run
+    assert result["runs"] == 3 and result["min_ms"] <= result["p50_ms"] <= result["max_ms"]
+    assert result["peak_alloc_bytes"] >= 0
+
+
+def entry(stage, p50=None, resolution="1080p"):
+    result = {"pipeline": "segmentor", "stage": stage, "resolution": resolution, "density": "sparse"}
+    return {**result, "p50_ms": p50} if p50 is not None else {**result, "skipped": "--no-ocr"}
+
+
+def test_compare_reports_only_slowdowns_past_the_tolerance(bench):
+    baseline = {"results": [entry("preprocess", 10.0), entry("total", 20.0), entry("find", 0.0),
+                            entry("ocr")]}
+    current = {"results": [entry("preprocess", 10.9), entry("total", 25.0), entry("find", 3.0),
+                           entry("ocr", 500.0), entry("preprocess", 99.0, "4k")]}
+    regressions = bench.compare(current, baseline, tolerance=0.1)
+    assert [(r["stage"], r["ratio"]) for r in regressions] == [("total", 1.25)]
+
+
+def test_suite_smoke_run(tmp_path):
+    output = tmp_path / "results.json"
+    args = ["--resolutions", "1080p", "--densities", "sparse", "--pipelines", "segmentor",
+            "--repeat", "1", "--warmup", "0", "--no-ocr"]
+    # Progress goes to stderr: stdout is the JSON report alone
+    result = subprocess.run([sys.executable, str(RUN_BENCHMARKS), *args],
+                            check=True, capture_output=True)
+    report = json.loads(result.stdout)
+    assert {e["stage"] for e in report["results"]} == {"preprocess", "find_segments", "total"}
+    assert all(e["runs"] == 1 and e["pipeline"] == "segmentor" for e in report["results"])
+
+    # Against a baseline that was much faster, every stage regressed
+    for e in report["results"]:
+        e["p50_ms"] /= 100
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(report))
+    result = subprocess.run([sys.executable, str(RUN_BENCHMARKS), *args, "--output", str(output),
+                             "--compare", str(baseline)], capture_output=True)
+    assert result.returncode == 1
+    assert len(json.loads(output.read_text())["regressions"]) == 3
@@ -0,0 +1,100 @@
+import random
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from pipelines.boxes import (
+    MIN_OVERLAP,
+    area,
+    dedupe,
+    duplicate_area,
+    group_overlapping,
+    intersection,
+    overlapping_pairs,
+    union_area,
+)
+
+
+def random_boxes(rng, n, size=100):
+    boxes = []
+    for _ in range(n):
+        x1, y1 = rng.randrange(size), rng.randrange(size)
+        boxes.append((x1, y1, x1 + rng.randint(1, 40), y1 + rng.randint(1, 40)))
+    return boxes
+
+
+def coverage(boxes, size=200):
+    mask = np.zeros((size, size), dtype=np.int32)
+    for x1, y1, x2, y2 in boxes:
+        mask[y1:y2, x1:x2] += 1
+    return mask
+
+
+def brute_force_pairs(boxes):
+    return {(i, j) for i, j in combinations(range(len(boxes)), 2)
+            if intersection(boxes[i], boxes[j])}
+
+
+def test_contained_and_duplicate_boxes_are_dropped():
+    boxes = [(0, 0, 100, 50), (10, 10, 40, 30), (0, 0, 100, 50), (200, 0, 220, 20)]
+    kept, saved = dedupe(boxes)
+    assert sorted(kept) == [(0, 0, 100, 50), (200, 0, 220, 20)]
+    assert saved == 30 * 20 + 100 * 50
+
+
+def test_slight_overlap_is_kept_apart():
+    boxes = [(0, 0, 100, 10), (90, 0, 190, 10)]
+    kept, saved = dedupe(boxes)
+    assert sorted(kept) == boxes
+    assert saved == 0
+
+
+def test_saved_pixels_are_not_negative_when_a_merge_adds_area():
+    boxes = [(1, 24, 29, 63), (48, 49, 49, 78), (17, 46, 32, 84), (6, 20, 8, 22), (1, 41, 36, 42)]
+    kept, saved = dedupe(boxes)
+    assert saved >= 0
+    assert sum(map(area, kept)) > union_area(boxes)  # the merged bbox covers new pixels
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_dedupe_matches_brute_force(seed):
+    rng = random.Random(seed)
+    boxes = random_boxes(rng, rng.randint(1, 30))
+
+    assert {tuple(sorted(p)) for p in overlapping_pairs(boxes)} == brute_force_pairs(boxes)
+
+    kept, saved = dedupe(boxes)
+    expected = 0
+    for group in group_overlapping(boxes):
+        mask = coverage([boxes[i] for i in group])
+        expected += int(mask.sum() - np.count_nonzero(mask))
+    assert saved == expected >= 0
+
+    for a, b in combinations(kept, 2):
+        assert intersection(a, b) < MIN_OVERLAP * min(area(a), area(b))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_union_area_matches_mask(seed):
+    boxes = random_boxes(random.Random(seed), 12)
+    assert union_area(boxes) == np.count_nonzero(coverage(boxes))
+    assert duplicate_area(boxes) == sum(map(area, boxes)) - union_area(boxes)
+    assert union_area([]) == 0
+    assert duplicate_area(boxes[:1]) == 0
+
+
+def test_segmentor_reports_saved_pixels_without_printing(capsys):
+    import segmentor
+
+    image = np.full((200, 300, 3), 255, dtype=np.uint8)
+    # An L-shaped block, and a separate one inside its bounding box
+    image[20:60:4, 20:280] = 0
+    image[20:180:4, 20:60] = 0
+    image[120:170:4, 150:230] = 0
+    mask = segmentor.preprocess(image)
+    stats = {}
+    boxes = segmentor.find_segments(mask, image, stats)
+    assert len(boxes) == 1 and stats["saved_pixels"] > 0
+    assert boxes == segmentor.find_segments(mask, image)
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,82 @@
+import json
+import random
+
+import numpy as np
+import pytest
+
+from pipelines.classifier import RegionClassifier
+from pipelines.region_table import type_name
+
+
+def classify_reference(text, height):
+    # ScreenshotSegmentationPipeline._classify_text_region before the classifier
+    text_lower = text.lower()
+    if len(text) < 20 and any(word in text_lower for word in
+                               ['submit', 'ok', 'cancel', 'save', 'delete', 'add']):
+        return 'button'
+    if len(text) < 30 and any(word in text_lower for word in
+                               ['home', 'settings', 'profile', 'menu', 'help']):
+        return 'navigation'
+    if len(text) < 50 and (text.isupper() or height > 20):
+        return 'header'
+    if len(text) < 30 and ':' in text:
+        return 'label'
+    if len(text) > 50:
+        return 'body'
+    return 'text'
+
+
+PIECES = ["submit", "OK", "Cancel", "save", "delete", "ADD", "home", "Settings", "profile",
+          "menu", "help", "Name:", "TOTAL", "lorem", "ipsum", "dolor", "x", "42", ":", "Ünïcode",
+          "İstanbul", "straße", "oka", "hom", "e", " "]
+
+
+def random_words(seed, n=400):
+    rng = random.Random(seed)
+    texts = ["".join(rng.choice(PIECES) for _ in range(rng.randint(1, 14))).strip() or "a"
+             for _ in range(n)]
+    heights = [rng.randint(5, 40) for _ in range(n)]
+    return texts, heights
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_matches_the_per_word_rules(seed):
+    texts, heights = random_words(seed)
+    codes = RegionClassifier().classify(texts, heights)
+    assert [type_name(int(c)) for c in codes] == [classify_reference(t, h) for t, h in zip(texts, heights)]
+
+
+def test_rule_order_and_edges():
+    classifier = RegionClassifier()
+    assert classifier.classify_one("Save", 10) == "button"
+    assert classifier.classify_one("Save settings", 10) == "button"
+    assert classifier.classify_one("Open settings now", 10) == "navigation"
+    assert classifier.classify_one("OVERVIEW", 10) == "header"
+    assert classifier.classify_one("Overview", 30) == "header"
+    assert classifier.classify_one("Email:", 10) == "label"
+    assert classifier.classify_one("z" * 51, 10) == "body"
+    assert classifier.classify_one("z" * 50, 10) == "text"
+    assert classifier.classify([], []).tolist() == []
+
+
+def test_custom_keywords():
+    classifier = RegionClassifier({"button": ["Apply"]})
+    assert classifier.classify_one("apply", 10) == "button"
+    assert classifier.classify_one("submit", 10) == "text"
+    assert classifier.classify_one("help", 10) == "navigation"
+    assert RegionClassifier({"button": []}).classify_one("ok", 10) == "text"
+    with pytest.raises(ValueError, match="Unknown keyword labels"):
+        RegionClassifier({"link": ["here"]})
+    with pytest.raises(ValueError, match="newlines"):
+        RegionClassifier({"button": ["a\nb"]})
+
+
+def test_keywords_from_env(tmp_path, monkeypatch):
+    monkeypatch.delenv("REGION_KEYWORDS_PATH", raising=False)
+    assert RegionClassifier.from_env().keywords["button"][0] == "submit"
+    path = tmp_path / "keywords.json"
+    path.write_text(json.dumps({"navigation": ["inbox"]}))
+    monkeypatch.setenv("REGION_KEYWORDS_PATH", str(path))
+    classifier = RegionClassifier.from_env()
+    codes = classifier.classify(["Inbox", "home"], np.array([10, 10]))
+    assert [type_name(int(c)) for c in codes] == ["navigation", "text"]
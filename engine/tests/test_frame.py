@@ -0,0 +1,75 @@
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from pipelines.frame import Frame
+
+
+@pytest.fixture
+def rgb(screenshot):
+    return cv2.cvtColor(screenshot(320, 200, seed=5), cv2.COLOR_BGR2RGB)
+
+
+def test_arrays_are_wrapped_without_copies(rgb):
+    frame = Frame.load(rgb)
+    assert frame.pixels is rgb and frame.rgb is rgb and Frame.load(frame) is frame
+    assert frame.size == (320, 200)
+
+    rgba = np.dstack([rgb, np.full(rgb.shape[:2], 255, dtype=np.uint8)])
+    frame = Frame.load(rgba)
+    assert frame.pixels.shape == rgb.shape and np.shares_memory(frame.pixels, rgba)
+
+
+def test_encoded_sources_decode_to_rgb(rgb, tmp_path):
+    path = tmp_path / "shot.png"
+    Image.fromarray(rgb).save(path)
+    assert np.array_equal(Frame.load(path).pixels, rgb)
+    assert np.array_equal(Frame.load(str(path)).pixels, rgb)
+    assert np.array_equal(Frame.load(path.read_bytes()).pixels, rgb)
+    assert np.array_equal(Frame.load(Image.fromarray(rgb)).pixels, rgb)
+    assert np.array_equal(Frame.load(Image.fromarray(rgb).convert("RGBA")).pixels, rgb)
+
+    gray = Frame.load(Image.fromarray(rgb).convert("L"))
+    assert gray.pixels.ndim == 2 and gray.rgb.shape == rgb.shape
+
+
+def test_formats_opencv_can_not_read_go_through_pil(rgb, tmp_path):
+    path = tmp_path / "icon.ico"
+    Image.fromarray(rgb[:32, :32]).save(path, sizes=[(32, 32)])
+    with Image.open(path) as expected:
+        assert np.array_equal(Frame.load(path).pixels, np.asarray(expected.convert("RGB")))
+    with pytest.raises(FileNotFoundError):
+        Frame.load(tmp_path / "missing.png")
+
+
+def test_planes_are_computed_once(rgb):
+    frame = Frame(rgb)
+    assert frame.nbytes == rgb.nbytes
+    gray = frame.gray
+    assert frame.gray is gray
+    assert np.array_equal(gray, cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY))
+    assert frame.nbytes == rgb.nbytes + gray.nbytes
+
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return gray // 2
+
+    assert frame.plane("half", compute) is frame.plane("half", compute)
+    assert len(calls) == 1
+
+
+def test_crops_share_pixels_and_per_pixel_planes(rgb):
+    frame = Frame(rgb)
+    frame.gray
+    frame.plane("binary", lambda: np.zeros_like(frame.gray))
+    crop = frame.crop(10, 20, 110, 70)
+
+    assert crop.size == (100, 50)
+    assert np.shares_memory(crop.pixels, rgb) and np.shares_memory(crop.gray, frame.gray)
+    assert np.array_equal(crop.gray, cv2.cvtColor(rgb[20:70, 10:110], cv2.COLOR_RGB2GRAY))
+    # Filtered planes depend on the neighbourhood, so a crop computes its own
+    assert crop.plane("binary", lambda: "recomputed") == "recomputed"
+    assert np.array_equal(np.asarray(crop.to_pil()), rgb[20:70, 10:110])
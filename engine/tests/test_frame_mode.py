@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+import pipeline
+from pipelines.ocr_engine import (
+    TesseractBatchEngine,
+    TesseractCliEngine,
+    masked_frame,
+    texts_by_region,
+)
+from pipelines.ocr_pool import ParallelOcrEngine
+
+
+def tsv(*words):
+    """parse_tsv-style columns for (left, top, width, height, line, text) words"""
+    rows = [(5, 1, 1, line, left, top, width, height, text)
+            for left, top, width, height, line, text in words]
+    rows.insert(0, (1, 0, 0, 0, 0, 0, 500, 500, ""))  # page level
+    keys = ("level", "block_num", "par_num", "line_num", "left", "top", "width", "height", "text")
+    return {key: [row[i] for row in rows] for i, key in enumerate(keys)}
+
+
+def test_masked_frame_keeps_only_the_boxes():
+    image = np.full((40, 60, 3), 240, dtype=np.uint8)
+    image[5:10, 5:10] = 0
+    image[30:35, 40:50] = 0
+    masked = masked_frame(image, [(0, 0, 20, 20)])
+    assert masked.shape == (40, 60) and masked.dtype == np.uint8
+    assert (masked[5:10, 5:10] == 0).all()
+    assert (masked[30:35, 40:50] == 240).all()  # outside: background level
+    assert image[30, 40, 0] == 0  # the frame is left alone
+    assert np.array_equal(masked_frame(image[..., 0], []), np.full((40, 60), 240))
+
+
+def test_words_go_to_the_smallest_box_containing_their_centre():
+    boxes = [(0, 0, 200, 100), (10, 10, 90, 40), (300, 0, 400, 100)]
+    data = tsv((12, 12, 20, 10, 1, "Save"), (40, 12, 30, 10, 1, "draft"),
+               (12, 60, 30, 10, 2, "Body"), (50, 60, 30, 10, 2, "text"),
+               (80, 30, 30, 10, 3, "edge"),  # centre (95, 35) is outside the small box
+               (250, 50, 10, 10, 4, "gap"), (320, 10, 10, 10, 5, "  "))
+    assert texts_by_region(data, boxes) == ["Body text\nedge", "Save draft", ""]
+    assert texts_by_region(data, []) == []
+    assert texts_by_region({}, boxes) == ["", "", ""]
+
+
+def words_frame():
+    image = np.full((60, 300, 3), 255, dtype=np.uint8)
+    for x in (10, 40, 120, 150, 250):
+        image[20:30, x:x + 10] = 0
+    return image
+
+
+BOXES = [(0, 0, 100, 60), (100, 0, 200, 60)]
+
+
+@pytest.mark.parametrize("engine_class", [TesseractCliEngine, TesseractBatchEngine])
+def test_one_pass_reads_only_inside_the_boxes(stub_tesseract, engine_class):
+    texts = engine_class().recognize_regions(words_frame(), BOXES)
+    # The blob at x=250 is masked out, so the stub never sees it
+    assert texts == ["w10_20 w40_20", "w120_20 w150_20"]
+    assert engine_class().recognize_regions(words_frame(), []) == []
+
+
+def test_parallel_engine_frame_pass(stub_tesseract):
+    engine = ParallelOcrEngine(TesseractBatchEngine.name, max_workers=1)
+    try:
+        timed = engine.recognize_regions_timed(words_frame(), BOXES)
+        assert [text for text, _, _ in timed] == ["w10_20 w40_20", "w120_20 w150_20"]
+    finally:
+        engine.close()
+
+
+def test_ocr_regions_follows_the_mode(stub_tesseract, monkeypatch):
+    regions = [{"x": x1, "y": y1, "w": x2 - x1, "h": y2 - y1} for x1, y1, x2, y2 in BOXES]
+    engine = ParallelOcrEngine(TesseractBatchEngine.name, max_workers=1)
+    try:
+        assert pipeline.ocr_regions(words_frame(), regions, engine) == ["ink 200", "ink 200"]
+        monkeypatch.setenv("OCR_MODE", "frame")
+        assert pipeline.ocr_regions(words_frame(), regions, engine) == ["w10_20 w40_20", "w120_20 w150_20"]
+    finally:
+        engine.close()
@@ -0,0 +1,155 @@
+import sqlite3
+import time
+
+import pytest
+
+from pipelines.history import HistoryStore, match_query
+
+BASE = 1_700_000_000.0
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"), retention_days=1, batch_frames=4)
+    yield store
+    store.close()
+
+
+def committed_frames(path):
+    with sqlite3.connect(path) as db:
+        return db.execute("SELECT count(*) FROM frames").fetchone()[0]
+
+
+def test_match_query_quotes_every_word():
+    assert match_query('invoice "due, friday') == '"invoice" AND "due" AND "friday"'
+    assert match_query("  ,. ") == ""
+
+
+def test_identical_frames_extend_last_seen(store):
+    regions = [((0, 0, 10, 10), "Invoice 1234 due Friday", "text")]
+    store.add_frame(regions, BASE, "a", (100, 100))
+    store.add_frame(regions, BASE + 5, "a", (100, 100))
+    store.flush()
+    store.add_frame(regions, BASE + 9, "a", (100, 100))  # already written: an update
+
+    frames = store.frames()
+    assert len(frames) == 1
+    assert (frames[0].first_seen, frames[0].last_seen) == (BASE, BASE + 9)
+    assert store.stats()["frames_merged"] == 2
+
+
+def test_frames_are_merged_per_source_and_size(store):
+    regions = [((0, 0, 10, 10), "same text")]
+    store.add_frame(regions, BASE, "a", (100, 100))
+    store.add_frame(regions, BASE + 1, "b", (100, 100))
+    store.add_frame(regions, BASE + 2, "a", (200, 100))
+    assert len(store.frames()) == 3
+
+
+def test_repeats_merge_across_restarts(tmp_path):
+    path = str(tmp_path / "history.db")
+    regions = [((0, 0, 10, 10), "still on screen")]
+    first = HistoryStore(path)
+    first.add_frame(regions, BASE, "a")
+    first.close()
+
+    second = HistoryStore(path)
+    second.add_frame(regions, BASE + 60, "a")
+    frames = second.frames()
+    second.close()
+    assert [(f.first_seen, f.last_seen) for f in frames] == [(BASE, BASE + 60)]
+
+
+def test_empty_regions_are_left_out(store):
+    store.add_frame([((0, 0, 5, 5), "  "), ((0, 10, 5, 5), "kept")], BASE)
+    frame, = store.frames()
+    assert frame.regions == 1
+    assert store.frame_text(frame.id) == "kept"
+
+
+def test_search_matches_every_word_newest_first(store):
+    store.add_frame([((0, 0, 10, 10), "Quarterly roadmap review", "text")], BASE, "a")
+    store.add_frame([((5, 5, 20, 10), "Roadmap draft"), ((0, 30, 10, 10), "quarterly numbers")],
+                    BASE + 100, "a", (1920, 1080))
+
+    hits = store.search("roadmap")
+    assert [h.text for h in hits] == ["Roadmap draft", "Quarterly roadmap review"]
+    assert hits[0].bbox == (5, 5, 20, 10)
+    assert hits[1].kind == "text"
+    assert "[roadmap]" in hits[1].snippet
+
+    # All words must be in the same region
+    assert [h.text for h in store.search("quarterly roadmap")] == ["Quarterly roadmap review"]
+    assert store.search("nothing here") == []
+    assert store.search("") == []
+
+
+def test_search_time_range_and_source(store):
+    store.add_frame([((0, 0, 1, 1), "budget v1")], BASE, "a")
+    store.add_frame([((0, 0, 1, 1), "budget v2")], BASE + 100, "b")
+    store.add_frame([((0, 0, 1, 1), "budget v3")], BASE + 200, "a")
+
+    def texts(**kwargs):
+        return [h.text for h in store.search("budget", **kwargs)]
+
+    assert texts() == ["budget v3", "budget v2", "budget v1"]
+    assert texts(since=BASE + 50) == ["budget v3", "budget v2"]
+    assert texts(until=BASE + 150) == ["budget v2", "budget v1"]
+    assert texts(since=BASE + 50, until=BASE + 150) == ["budget v2"]
+    assert texts(source="a") == ["budget v3", "budget v1"]
+    assert texts(limit=1) == ["budget v3"]
+
+
+def test_time_range_covers_the_whole_time_a_frame_was_seen(store):
+    regions = [((0, 0, 1, 1), "long lived")]
+    store.add_frame(regions, BASE, "a")
+    store.add_frame(regions, BASE + 1000, "a")
+    assert len(store.search("long", since=BASE + 500, until=BASE + 600)) == 1
+    assert [f.id for f in store.frames(since=BASE + 500, until=BASE + 600)] == [1]
+
+
+def test_compact_deletes_frames_past_retention(store):
+    day = 86400
+    store.add_frame([((0, 0, 1, 1), "old report")], BASE - 3 * day, "a")
+    store.add_frame([((0, 0, 1, 1), "new report")], BASE, "a")
+
+    assert store.compact(now=BASE + day / 2) == 1
+    assert [h.text for h in store.search("report")] == ["new report"]
+    assert store.stats()["regions"] == 1
+    assert store.compact(now=BASE + day / 2) == 0
+
+
+def test_retention_zero_keeps_everything(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"), retention_days=0)
+    store.add_frame([((0, 0, 1, 1), "ancient")], 0.0)
+    assert store.compact() == 0
+    assert len(store.search("ancient")) == 1
+    store.close()
+
+
+def test_full_batch_is_committed_at_once(store):
+    for i in range(4):
+        store.add_frame([((0, 0, 1, 1), f"frame {i}")], BASE + i)
+    assert committed_frames(store.path) == 4
+
+
+def test_partial_batch_is_committed_by_the_timer(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"), flush_interval=0.1)
+    store.add_frame([((0, 0, 1, 1), "idle worker")], BASE)
+    assert committed_frames(store.path) == 0
+
+    deadline = time.monotonic() + 5
+    while committed_frames(store.path) == 0 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert committed_frames(store.path) == 1
+    assert store.stats()["pending"] == 0
+    store.close()
+
+
+def test_close_commits_pending_frames(tmp_path):
+    path = str(tmp_path / "history.db")
+    store = HistoryStore(path)
+    store.add_frame([((0, 0, 1, 1), "pending")], BASE)
+    store.close()
+    store.close()
+    assert committed_frames(path) == 1
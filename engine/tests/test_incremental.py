@@ -0,0 +1,135 @@
+import numpy as np
+import pytest
+
+from pipelines.incremental import (
+    FrameTracker,
+    IncrementalOcr,
+    dirty_rects,
+    grow_rects,
+    overlaps_any,
+)
+from vision_pipeline import ScreenshotSegmentationPipeline
+
+
+def blank(h=64, w=96):
+    return np.zeros((h, w, 3), dtype=np.uint8)
+
+
+def test_dirty_rects_cover_each_change_on_the_cell_grid():
+    before, after = blank(), blank()
+    after[5, 5] = 1          # cell (0, 0)
+    after[40:50, 70:90] = 9  # cells x 4-5, y 2-3
+    rects, fraction = dirty_rects(before, after, cell_size=16)
+    assert sorted(rects) == [(0, 0, 16, 16), (64, 32, 96, 64)]
+    assert fraction == pytest.approx(201 / (64 * 96))
+
+
+def test_dirty_rects_clip_to_the_frame_and_honour_the_threshold():
+    before, after = blank(50, 50), blank(50, 50)
+    after[49, 49] = 3
+    assert dirty_rects(before, after, cell_size=16)[0] == [(48, 48, 50, 50)]
+    assert dirty_rects(before, after, pixel_threshold=3, cell_size=16)[0] == []
+
+
+def test_dirty_rects_match_a_pixel_diff():
+    rng = np.random.default_rng(0)
+    before = rng.integers(0, 255, (120, 200, 3), dtype=np.uint8)
+    after = before.copy()
+    for _ in range(6):
+        y, x = rng.integers(0, 110), rng.integers(0, 190)
+        after[y:y + rng.integers(1, 10), x:x + rng.integers(1, 10)] ^= 0x40
+
+    rects, _ = dirty_rects(before, after, cell_size=8)
+    covered = np.zeros(before.shape[:2], dtype=bool)
+    for x1, y1, x2, y2 in rects:
+        covered[y1:y2, x1:x2] = True
+    changed = (before != after).any(axis=2)
+    assert covered[changed].all()
+    for x1, y1, x2, y2 in rects:
+        assert x1 % 8 == 0 and y1 % 8 == 0
+        assert changed[y1:y2, x1:x2].any()
+
+
+def test_overlaps_any():
+    boxes = [(0, 0, 10, 10), (20, 20, 30, 30), (10, 0, 20, 10)]
+    assert overlaps_any(boxes, [(5, 5, 12, 8)]).tolist() == [True, False, True]
+    assert overlaps_any(boxes, [(10, 10, 20, 20)]).tolist() == [False, False, False]
+    assert overlaps_any([], [(0, 0, 1, 1)]).tolist() == []
+
+
+def test_grow_rects_swallows_the_words_they_touch():
+    words = [(30, 0, 60, 10), (58, 0, 90, 10), (0, 50, 10, 60)]
+    grown = grow_rects([(40, 2, 45, 8)], words, margin=2, width=100, height=100)
+    assert grown == [(30, 0, 90, 10)]
+    assert grow_rects([(0, 0, 5, 5), (3, 3, 8, 8)], [], 0, 100, 100) == [(0, 0, 8, 8)]
+
+
+def test_tracker():
+    tracker = FrameTracker()
+    frame = blank()
+    assert tracker.compare(frame) is None
+    tracker.update(frame)
+    frame[0, 0] = 1  # the tracker keeps its own copy
+    assert tracker.compare(blank()).identical
+    change = tracker.compare(frame)
+    assert not change.identical and change.dirty == [(0, 0, 16, 16)]
+    assert tracker.compare(blank(32, 32)) is None
+    tracker.reset()
+    assert tracker.compare(frame) is None
+
+
+class Recorder:
+    def __init__(self, boxes):
+        self.boxes = boxes
+        self.ocr = []
+
+    def segment(self, frame):
+        return list(self.boxes)
+
+    def recognize(self, boxes):
+        self.ocr.append(list(boxes))
+        return [f"text{box}" for box in boxes]
+
+
+def test_only_segments_touching_a_change_are_read_again():
+    left, right = (0, 0, 40, 30), (50, 0, 90, 30)
+    pages = Recorder([left, right])
+    incremental = IncrementalOcr()
+    frame = blank()
+
+    boxes, texts = incremental.run(frame, pages.segment, pages.recognize)
+    assert boxes == [left, right] and texts == [f"text{left}", f"text{right}"]
+
+    changed = frame.copy()
+    changed[10, 60] = 255
+    assert incremental.run(changed, pages.segment, pages.recognize)[1] == texts
+    assert pages.ocr[-1] == [right]
+    assert incremental.last == {"identical": 0, "reused": 1, "ocr": 1}
+
+    assert incremental.run(changed, pages.segment, pages.recognize) == (boxes, texts)
+    assert incremental.last == {"identical": 1, "reused": 2, "ocr": 0}
+    assert len(pages.ocr) == 2
+
+    # A new segment is always read
+    pages.boxes.append((0, 40, 20, 60))
+    changed[0, 0] = 7
+    incremental.run(changed, pages.segment, pages.recognize)
+    assert pages.ocr[-1] == [left, (0, 40, 20, 60)]
+    assert incremental.stats["frames"] == 4 and incremental.stats["identical_frames"] == 1
+
+    incremental.reset()
+    incremental.run(changed, pages.segment, pages.recognize)
+    assert len(pages.ocr[-1]) == 3
+
+
+def test_an_identical_frame_gets_its_own_context(stub_tesseract, screenshot):
+    pipeline = ScreenshotSegmentationPipeline(ocr_cache=None, enable_preprocessing=False,
+                                              incremental=True)
+    image = screenshot(320, 200, density=0.3, seed=1)
+    first = pipeline.process(image)
+    first_metadata = dict(first.metadata)
+    second = pipeline.process(image)
+    assert second is not first and second.full_text == first.full_text
+    assert second.metadata["incremental"] == {"identical": True, "reocr_areas": 0}
+    assert first.metadata == first_metadata
+    assert pipeline._last_context is first
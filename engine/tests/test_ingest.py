@@ -0,0 +1,120 @@
+import json
+import os
+import subprocess
+import sys
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+import pytest
+
+from pipelines import ingest, screenshot_pipeline
+from pipelines.frame import Frame
+from pipelines.ingest import RawFormat
+
+
+@pytest.fixture
+def bgr(screenshot):
+    return screenshot(96, 64, seed=6)
+
+
+def raw(bgr, pixel_format, stride=None):
+    """`bgr` laid out as a raw buffer, rows padded to `stride` bytes"""
+    codes = {"bgr": None, "rgb": cv2.COLOR_BGR2RGB, "gray": cv2.COLOR_BGR2GRAY,
+             "bgra": cv2.COLOR_BGR2BGRA, "rgba": cv2.COLOR_BGR2RGBA}
+    pixels = bgr if codes[pixel_format] is None else cv2.cvtColor(bgr, codes[pixel_format])
+    rows = pixels.reshape(pixels.shape[0], -1)
+    stride = stride or rows.shape[1]
+    padded = np.full((rows.shape[0], stride), 0xAB, dtype=np.uint8)
+    padded[:, :rows.shape[1]] = rows
+    return padded.tobytes()[:(rows.shape[0] - 1) * stride + rows.shape[1]]
+
+
+@pytest.mark.parametrize("pixel_format", sorted(ingest.PIXEL_FORMATS))
+@pytest.mark.parametrize("padding", [0, 13])
+def test_raw_buffers_in_every_layout(bgr, pixel_format, padding):
+    h, w = bgr.shape[:2]
+    stride = w * ingest.PIXEL_FORMATS[pixel_format] + padding if padding else None
+    fmt = RawFormat(w, h, pixel_format, stride)
+    buffer = raw(bgr, pixel_format, stride)
+    assert len(buffer) == fmt.nbytes
+
+    expected = bgr if pixel_format != "gray" else cv2.cvtColor(
+        cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY), cv2.COLOR_GRAY2BGR)
+    out = ingest.from_raw(buffer, fmt)
+    assert out.flags["C_CONTIGUOUS"] and np.array_equal(out, expected)
+    assert np.array_equal(ingest.from_raw(buffer, fmt, "rgb"), expected[..., ::-1])
+    assert np.array_equal(ingest.from_raw(buffer, fmt, "gray"), cv2.cvtColor(expected, cv2.COLOR_BGR2GRAY))
+    assert np.array_equal(Frame.from_raw(buffer, fmt).pixels, expected[..., ::-1])
+
+
+def test_raw_format_validation():
+    with pytest.raises(ValueError, match="pixel format"):
+        RawFormat(4, 4, "yuv")
+    with pytest.raises(ValueError, match="frame size"):
+        RawFormat(0, 4)
+    with pytest.raises(ValueError, match="shorter than a row"):
+        RawFormat(4, 4, "bgra", stride=12)
+    with pytest.raises(ValueError, match="needs 64 bytes, got 63"):
+        ingest.raw_view(bytes(63), RawFormat(4, 4))
+
+    assert RawFormat.from_header({"image_path": "x.png"}) is None
+    assert RawFormat.from_header({"width": 4, "height": 2, "stride": "20"}) == RawFormat(4, 2, "bgra", 20)
+
+
+def test_encoded_bytes(bgr):
+    png = cv2.imencode(".png", bgr)[1].tobytes()
+    assert np.array_equal(ingest.decode(png), bgr)
+    assert np.array_equal(ingest.load(png, "rgb"), bgr[..., ::-1])
+    with pytest.raises(ValueError, match="decode"):
+        ingest.decode(b"not an image")
+
+
+def test_shared_memory_is_copied_and_left_to_its_producer(bgr):
+    buffer = raw(bgr, "bgra")
+    shm = shared_memory.SharedMemory(create=True, size=len(buffer))
+    try:
+        shm.buf[:len(buffer)] = buffer
+        header = {"shm": shm.name, "width": 96, "height": 64, "pixel_format": "bgra"}
+        out = ingest.load_job(header, b"")
+        shm.buf[:4] = b"\0\0\0\0"  # the frame is a copy
+        assert np.array_equal(out, bgr)
+        assert np.array_equal(Frame.from_shared_memory(shm.name, RawFormat(96, 64)).pixels[0, 1],
+                              bgr[0, 1, ::-1])
+        # Still attachable: reading it did not unlink it
+        shared_memory.SharedMemory(name=shm.name).close()
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def test_load_job(bgr, tmp_path):
+    path = tmp_path / "shot.png"
+    cv2.imwrite(str(path), bgr)
+    png = path.read_bytes()
+    assert np.array_equal(ingest.load_job({"image_path": str(path)}, b""), bgr)
+    assert np.array_equal(ingest.load_job({}, png), bgr)
+    assert np.array_equal(ingest.load_job({"width": 96, "height": 64, "pixel_format": "bgr"},
+                                          bgr.tobytes()), bgr)
+    with pytest.raises(ValueError, match="Shared-memory frames need"):
+        ingest.load_job({"shm": "frame"}, b"")
+    with pytest.raises(ValueError, match="Job needs"):
+        ingest.load_job({}, b"")
+
+
+def test_frames_on_stdin_match_a_path(ocr, blocks, tmp_path):
+    image = blocks
+    path = tmp_path / "shot.png"
+    cv2.imwrite(str(path), image)
+    env = dict(os.environ)
+
+    def run(*args, stdin=b""):
+        result = subprocess.run([sys.executable, screenshot_pipeline.__file__, *args], input=stdin,
+                                capture_output=True, check=True, env=env)
+        return json.loads(result.stdout)
+
+    expected = run(str(path))
+    assert len(expected) == 4
+    assert run("-", stdin=path.read_bytes()) == expected
+    assert run("-", "--width", "500", "--height", "300", "--pixel-format", "bgra",
+               stdin=raw(image, "bgra")) == expected
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+import pipeline
+from pipelines import screenshot_pipeline
+from pipelines.instrumentation import Instrumentation, add_metrics_hook, remove_metrics_hook
+from pipelines.ocr_engine import OcrEngine
+
+
+class SizeEngine(OcrEngine):
+    """Reads every crop as its shape"""
+
+    name = "size"
+
+    def recognize(self, image):
+        return "x".join(map(str, image.shape))
+
+    def recognize_regions(self, image, boxes):
+        return [f"{x2 - x1}x{y2 - y1}" for x1, y1, x2, y2 in boxes]
+
+
+def test_stage_records_times_and_allocations():
+    inst = Instrumentation(trace_allocations=True)
+    with inst.stage("decode"):
+        buffer = np.ones(1 << 20, dtype=np.uint8)
+    with inst.stage("idle"):
+        pass
+
+    decode, idle = inst.stages
+    assert decode["name"] == "decode" and decode["wall_ms"] >= 0 and decode["cpu_ms"] >= 0
+    assert decode["alloc_bytes"] >= buffer.nbytes
+    assert idle["alloc_bytes"] < buffer.nbytes
+    assert Instrumentation().stages == []
+
+
+def test_hooks_see_every_record():
+    local, shared = [], []
+    add_metrics_hook(shared.append)
+    try:
+        inst = Instrumentation(hooks=[local.append])
+        with inst.stage("ocr"):
+            inst.segment(0, 1.5, 1.0, 4096, width=64, height=64)
+        result = inst.finish(regions=1)
+    finally:
+        remove_metrics_hook(shared.append)
+
+    assert [r["type"] for r in local] == ["segment", "stage", "frame"] == [r["type"] for r in shared]
+    assert local[-1]["regions"] == 1
+    assert result["segments"] == [{"index": 0, "wall_ms": 1.5, "cpu_ms": 1.0,
+                                   "buffer_bytes": 4096, "width": 64, "height": 64}]
+    assert [s["name"] for s in result["stages"]] == ["ocr"]
+    assert result["total_wall_ms"] >= 0
+
+
+def test_segments_record_their_crop_bytes():
+    image = np.zeros((100, 200, 3), dtype=np.uint8)
+    boxes = [(0, 0, 50, 20), (10, 30, 110, 90)]
+    inst = Instrumentation()
+    crops = screenshot_pipeline.crop_segments(image, boxes)
+    assert screenshot_pipeline.run_ocr(crops, SizeEngine(), inst) == ["20x50x3", "60x100x3"]
+    assert [s["buffer_bytes"] for s in inst.segments] == [20 * 50 * 3, 60 * 100 * 3]
+
+    inst = Instrumentation()
+    screenshot_pipeline.run_ocr_regions(image, boxes, SizeEngine(), inst)
+    assert [s["buffer_bytes"] for s in inst.segments] == [20 * 50, 60 * 100]
+
+
+@pytest.mark.parametrize("mode, pixel_bytes", [("crops", 3), ("frame", 1)])
+def test_pipeline_regions_record_their_bytes(monkeypatch, mode, pixel_bytes):
+    monkeypatch.setenv("OCR_MODE", mode)
+    image = np.zeros((100, 200, 3), dtype=np.uint8)
+    inst = Instrumentation()
+    pipeline.ocr_regions(image, [{"x": 5, "y": 5, "w": 40, "h": 10}], SizeEngine(), inst)
+    segment, = inst.segments
+    assert segment["buffer_bytes"] == 40 * 10 * pixel_bytes
+    assert segment["bbox"] == [5, 5, 40, 10]
@@ -0,0 +1,79 @@
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from pipelines.merging import (
+    UnionFind,
+    candidate_pairs,
+    cluster_boxes,
+    gaps,
+    row_block_linker,
+    text_line_linker,
+)
+
+
+def random_boxes(seed, n=120):
+    rng = np.random.default_rng(seed)
+    return np.column_stack([rng.integers(0, 1500, n), rng.integers(0, 900, n),
+                            rng.integers(4, 160, n), rng.integers(6, 30, n)])
+
+
+def brute_force_clusters(boxes, linked):
+    uf = UnionFind(len(boxes))
+    for i, j in combinations(range(len(boxes)), 2):
+        if linked(boxes[[i]], boxes[[j]])[0]:
+            uf.union(i, j)
+    return sorted(sorted(g) for g in uf.groups())
+
+
+def test_union_find():
+    uf = UnionFind(6)
+    uf.union(0, 1)
+    uf.union(2, 3)
+    uf.union(1, 3)
+    uf.union(3, 0)
+    assert uf.find(0) == uf.find(2) != uf.find(4)
+    assert sorted(sorted(g) for g in uf.groups()) == [[0, 1, 2, 3], [4], [5]]
+
+
+def test_gaps():
+    a = np.array([[0, 0, 10, 10], [0, 0, 10, 10]])
+    b = np.array([[15, 2, 5, 5], [5, 30, 10, 10]])
+    h_gap, v_gap = gaps(a, b)
+    assert h_gap.tolist() == [5, -5] and v_gap.tolist() == [-7, 20]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_candidate_pairs_include_every_pair_in_reach(seed):
+    boxes = random_boxes(seed)
+    i, j = candidate_pairs(boxes, reach=20)
+    found = set(zip(i.tolist(), j.tolist()))
+    h_gap, v_gap = gaps(boxes[:, None].repeat(len(boxes), 1).reshape(-1, 4),
+                        np.tile(boxes, (len(boxes), 1)))
+    close = (h_gap < 20) & (v_gap < 20)
+    expected = {(a, b) for a, b in zip(*np.nonzero(close.reshape(len(boxes), -1))) if a < b}
+    assert expected <= found
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_text_line_clusters_match_all_pairs(seed):
+    boxes = random_boxes(seed)
+    linked = text_line_linker(20)
+    groups = cluster_boxes(boxes, linked, reach=20, relative_reach=0.5)
+    assert sorted(sorted(g) for g in groups) == brute_force_clusters(boxes, linked)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_row_block_clusters_match_all_pairs(seed):
+    boxes = random_boxes(seed + 100)
+    linked = row_block_linker(10, 15)
+    groups = cluster_boxes(boxes, linked, reach=15)
+    assert sorted(sorted(g) for g in groups) == brute_force_clusters(boxes, linked)
+
+
+def test_clusters_come_in_reading_order():
+    boxes = np.array([[200, 50, 40, 10], [0, 0, 40, 10], [45, 0, 40, 10], [0, 50, 40, 10]])
+    groups = cluster_boxes(boxes, text_line_linker(10), reach=10)
+    assert groups == [[1, 2], [3], [0]]
+    assert cluster_boxes(np.empty((0, 4)), text_line_linker(10), reach=10) == []
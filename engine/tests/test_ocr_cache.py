@@ -0,0 +1,170 @@
+import numpy as np
+import pytest
+
+from pipelines import ocr_cache
+from pipelines.ocr_cache import CachedOcrEngine, OcrCache, cached, content_key, overlapped
+from pipelines.ocr_engine import OcrConfig, OcrEngine, TesseractBatchEngine, TesseractCliEngine
+from pipelines.ocr_pool import ParallelOcrEngine
+
+
+class FakeEngine(OcrEngine):
+    """Reads a crop as the sum of its pixels and records every call"""
+
+    name = "fake"
+
+    def __init__(self, config=None):
+        super().__init__(config)
+        self.crops = 0
+        self.passes = []
+
+    def recognize(self, image):
+        self.crops += 1
+        return f"{self.name}:{int(np.asarray(image).sum())}"
+
+    def recognize_regions(self, image, boxes):
+        # Like texts_by_region, a box's text depends on the other boxes in the pass
+        self.passes.append(list(boxes))
+        return [f"{tuple(box)} of {len(boxes)}" for box in boxes]
+
+
+class OtherEngine(FakeEngine):
+    name = "other"
+
+
+def test_content_key_covers_pixels_shape_and_namespace(tmp_path):
+    image = np.zeros((4, 6), dtype=np.uint8)
+    key = content_key(image, "a")
+    assert key == content_key(image.copy(), "a")
+    assert key != content_key(image, "b")
+    assert key != content_key(image.reshape(6, 4), "a")
+    assert key != content_key(image.astype(np.uint16), "a")
+    assert content_key(image[:, ::2], "a") == content_key(np.ascontiguousarray(image[:, ::2]), "a")
+
+    path = tmp_path / "shot.png"
+    path.write_bytes(b"png bytes")
+    assert content_key(str(path), "a") == content_key(path, "a") != key
+
+
+def test_lru_evicts_the_least_recently_used():
+    cache = OcrCache(max_bytes=3 * (40 + 1 + 200))
+    for key in ("k" * 40, "j" * 40, "i" * 40):
+        cache.put(key, "x")
+    assert cache.get("k" * 40) == "x"  # now the most recent
+    cache.put("h" * 40, "x")
+    assert cache.get("j" * 40) is None
+    assert cache.get("k" * 40) == "x"
+    stats = cache.stats()
+    assert (stats["entries"], stats["evictions"], stats["hits"], stats["misses"]) == (3, 1, 2, 1)
+    assert stats["hit_rate"] == pytest.approx(2 / 3, abs=1e-4)
+
+
+def test_persisted_tier_survives_restarts(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first = OcrCache(path=path)
+    first.put_many({"a": "alpha", "b": "beta"})
+    first.close()
+
+    second = OcrCache(path=path)
+    assert (second.get("a"), second.get("b"), second.get("c")) == ("alpha", "beta", None)
+    assert second.stats()["disk_hits"] == 2
+    assert second.get("a") == "alpha" and second.stats()["disk_hits"] == 2  # now in memory
+    second.close()
+
+
+def test_cached_follows_the_environment(monkeypatch, tmp_path):
+    monkeypatch.setattr(ocr_cache, "_cache", None)
+    monkeypatch.setenv("OCR_CACHE_PATH", str(tmp_path / "shared.db"))
+    engine = FakeEngine()
+    wrapped = cached(engine)
+    assert isinstance(wrapped, CachedOcrEngine) and wrapped.cache is ocr_cache.get_ocr_cache()
+    assert wrapped.cache.path == str(tmp_path / "shared.db")
+    wrapped.cache.close()
+    monkeypatch.setenv("OCR_CACHE", "0")
+    assert cached(engine) is engine
+
+
+@pytest.fixture
+def frame():
+    return np.arange(100 * 100, dtype=np.uint8).reshape(100, 100)
+
+
+def test_only_misses_reach_the_engine(frame):
+    engine = CachedOcrEngine(FakeEngine(), OcrCache())
+    crops = [frame[:10, :10], frame[10:20, :10]]
+    assert engine.recognize_many(crops) == [f"fake:{c.sum()}" for c in crops]
+    assert engine.engine.crops == 2
+
+    timed = engine.recognize_many_timed([frame[:10, :10], frame[20:30, :10]])
+    assert timed[0] == (f"fake:{crops[0].sum()}", 0.0, 0.0)
+    assert engine.engine.crops == 3
+
+    order = [i for i, _ in engine.iter_recognize_timed([frame[30:40, :10], frame[:10, :10]])]
+    assert order == [1, 0]  # the hit comes first
+    assert engine.cache.stats()["hits"] == 2
+
+
+def test_results_are_namespaced_by_engine(frame):
+    cache = OcrCache()
+    fake, other = CachedOcrEngine(FakeEngine(), cache), CachedOcrEngine(OtherEngine(), cache)
+    crop = frame[:10, :10]
+
+    assert fake.recognize(crop) == fake.recognize(crop) == f"fake:{crop.sum()}"
+    assert other.recognize(crop) == f"other:{crop.sum()}"
+    assert (fake.engine.crops, other.engine.crops) == (1, 1)
+
+
+def test_results_are_namespaced_by_config(frame):
+    cache = OcrCache()
+    english = CachedOcrEngine(FakeEngine(OcrConfig(lang="eng")), cache)
+    german = CachedOcrEngine(FakeEngine(OcrConfig(lang="deu")), cache)
+    english.recognize(frame)
+    german.recognize(frame)
+    assert german.engine.crops == 1
+
+
+def test_wrappers_share_the_namespace_of_the_engine_they_run():
+    cache = OcrCache()
+    assert ParallelOcrEngine(TesseractCliEngine.name).backend == TesseractCliEngine.name
+    assert (CachedOcrEngine(ParallelOcrEngine("cli"), cache).namespace
+            == CachedOcrEngine(TesseractCliEngine(), cache).namespace
+            != CachedOcrEngine(TesseractBatchEngine(), cache).namespace)
+    assert CachedOcrEngine(CachedOcrEngine(FakeEngine(), cache), cache).backend == "fake"
+
+
+def test_frame_pass_skips_only_boxes_it_has_seen(frame):
+    engine = CachedOcrEngine(FakeEngine(), OcrCache())
+    boxes = [(0, 0, 10, 10), (20, 0, 30, 10)]
+    first = engine.recognize_regions(frame, boxes)
+    assert engine.recognize_regions(frame, boxes) == first
+    assert engine.recognize_regions(frame, boxes + [(50, 50, 60, 60)])[:2] == first
+    assert engine.engine.passes == [boxes, [(50, 50, 60, 60)]]
+
+
+def test_frame_and_crop_results_are_kept_apart(frame):
+    engine = CachedOcrEngine(FakeEngine(), OcrCache())
+    engine.recognize_regions(frame, [(0, 0, 10, 10)])
+    assert engine.recognize(frame[0:10, 0:10]).startswith("fake:")
+
+
+def test_overlapping_boxes_are_always_read_together(frame):
+    engine = CachedOcrEngine(FakeEngine(), OcrCache())
+    panel, label, apart = (0, 0, 40, 40), (5, 5, 15, 15), (60, 60, 70, 70)
+
+    engine.recognize_regions(frame, [label, apart])
+    texts = engine.recognize_regions(frame, [panel, label, apart])
+    # The label's pixels were cached on their own, but inside the panel it must be re-read
+    assert engine.engine.passes[-1] == [panel, label]
+    assert texts == ["(0, 0, 40, 40) of 2", "(5, 5, 15, 15) of 2", "(60, 60, 70, 70) of 2"]
+
+
+def test_boxes_read_next_to_an_overlapping_one_are_not_cached(frame):
+    engine = CachedOcrEngine(FakeEngine(), OcrCache())
+    panel, label = (0, 0, 40, 40), (5, 5, 15, 15)
+    engine.recognize_regions(frame, [panel, label])
+    assert engine.recognize_regions(frame, [label]) == ["(5, 5, 15, 15) of 1"]
+    assert engine.engine.passes == [[panel, label], [label]]
+
+
+def test_overlapped():
+    assert overlapped([(0, 0, 10, 10), (5, 5, 15, 15), (20, 20, 30, 30), (30, 20, 40, 30)]) == {0, 1}
+    assert overlapped([]) == set()
@@ -0,0 +1,110 @@
+import cv2
+import numpy as np
+import pytest
+
+from pipelines import ocr_engine
+from pipelines.ocr_engine import (
+    OcrConfig,
+    TesseractBatchEngine,
+    TesseractCliEngine,
+    _share_time,
+    create_engine,
+    get_engine,
+    ocr_mode,
+    parse_tsv,
+    resolve_engine_name,
+)
+
+
+def page(ink):
+    image = np.full((16, 24, 3), 255, dtype=np.uint8)
+    image.reshape(-1, 3)[:ink] = 0
+    return image
+
+
+def test_config_cli_args():
+    assert OcrConfig().cli_args() == ["-l", "eng"]
+    assert OcrConfig("deu", psm=6, oem=1).cli_args() == ["-l", "deu", "--psm", "6", "--oem", "1"]
+    assert OcrConfig() == OcrConfig() and hash(OcrConfig()) == hash(OcrConfig())
+
+
+def test_engine_names(monkeypatch):
+    monkeypatch.setattr(ocr_engine, "tesserocr", None)
+    monkeypatch.delenv("OCR_ENGINE", raising=False)
+    assert resolve_engine_name() == resolve_engine_name("auto") == "batch"
+    monkeypatch.setenv("OCR_ENGINE", "cli")
+    assert resolve_engine_name() == "cli"
+    assert isinstance(create_engine("cli"), TesseractCliEngine)
+    with pytest.raises(ValueError, match="Unknown OCR engine"):
+        create_engine("easyocr")
+
+
+def test_shared_engines_are_reused_per_name_and_config(monkeypatch):
+    monkeypatch.setattr(ocr_engine, "_engines", {})
+    assert get_engine("cli") is get_engine("cli", OcrConfig())
+    assert get_engine("cli") is not get_engine("cli", OcrConfig(psm=6))
+    assert get_engine("cli") is not get_engine("batch")
+
+
+def test_ocr_mode(monkeypatch):
+    monkeypatch.delenv("OCR_MODE", raising=False)
+    assert ocr_mode() == "crops"
+    monkeypatch.setenv("OCR_MODE", "frame")
+    assert ocr_mode() == "frame"
+    monkeypatch.setenv("OCR_MODE", "pages")
+    with pytest.raises(ValueError):
+        ocr_mode()
+
+
+def test_share_time_splits_by_size():
+    assert _share_time(["a", "b"], [1, 3], 100.0, 40.0) == [("a", 25.0, 10.0), ("b", 75.0, 30.0)]
+    assert _share_time(["a"], [0], 5.0, 1.0) == [("a", 0.0, 0.0)]
+
+
+def test_parse_tsv():
+    tsv = ("level\tpage_num\tleft\ttop\twidth\theight\tconf\ttext\n"
+           "1\t1\t0\t0\t100\t50\t-1\t\n"
+           "5\t1\t3\t4\t20\t10\t91.5\tHello\n")
+    data = parse_tsv(tsv)
+    assert data["level"] == [1, 5] and data["left"] == [0, 3]
+    assert data["conf"] == [-1.0, 91.5]
+    assert data["text"] == ["", "Hello"]
+    assert parse_tsv("") == {}
+
+
+@pytest.mark.parametrize("engine_class", [TesseractCliEngine, TesseractBatchEngine])
+def test_engines_read_arrays_and_paths(stub_tesseract, tmp_path, engine_class):
+    engine = engine_class()
+    path = tmp_path / "page.png"
+    cv2.imwrite(str(path), page(7))
+
+    assert engine.recognize(page(3)) == "ink 3"
+    assert engine.recognize(str(path)) == "ink 7"
+    assert engine.recognize_many([page(1), str(path), page(2)]) == ["ink 1", "ink 7", "ink 2"]
+    assert engine.recognize_many([]) == []
+
+    timed = engine.recognize_many_timed([page(4), page(5)])
+    assert [text for text, _, _ in timed] == ["ink 4", "ink 5"]
+    assert all(wall >= 0 and cpu >= 0 for _, wall, cpu in timed)
+    assert sorted(i for i, _ in engine.iter_recognize_timed([page(1), page(2)])) == [0, 1]
+
+
+def test_batch_engine_runs_one_process_per_batch(stub_tesseract, monkeypatch):
+    calls = []
+    run = ocr_engine._run_tesseract
+
+    def counting(source, args, stdin=None):
+        calls.append(source)
+        return run(source, args, stdin)
+
+    monkeypatch.setattr(ocr_engine, "_run_tesseract", counting)
+    texts = TesseractBatchEngine().recognize_many([page(i) for i in range(1, 6)])
+    assert texts == [f"ink {i}" for i in range(1, 6)]
+    assert calls == ["stdin"]  # arrays are piped, never written to disk
+
+
+def test_failures_raise_runtime_error(stub_tesseract):
+    blank = np.full((8, 8), 255, dtype=np.uint8)
+    for engine in (TesseractCliEngine(), TesseractBatchEngine()):
+        with pytest.raises(RuntimeError, match="blank page"):
+            engine.recognize(blank)
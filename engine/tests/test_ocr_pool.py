@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+import pipeline
+from pipelines.instrumentation import Instrumentation
+from pipelines.ocr_engine import TesseractBatchEngine, TesseractCliEngine
+from pipelines.ocr_pool import ParallelOcrEngine, _split, resolve_max_workers
+
+
+def page(ink, blank=False):
+    """20x20 white image with `ink` dark pixels in its first rows"""
+    image = np.full((20, 20), 255, dtype=np.uint8)
+    if not blank:
+        image.flat[:ink] = 0
+    return image
+
+
+def frame_with(inks):
+    """One 20px-wide band per region, side by side; None leaves a band blank"""
+    return np.hstack([page(ink or 0, blank=ink is None) for ink in inks])
+
+
+def regions_of(n):
+    return [{"x": 20 * i, "y": 0, "w": 20, "h": 20} for i in range(n)]
+
+
+def test_split_keeps_order_and_evens_out():
+    chunks = _split(list(range(10)), 4)
+    assert [len(c) for c in chunks] == [3, 3, 2, 2]
+    assert sum(chunks, []) == list(range(10))
+
+
+def test_max_workers_is_clamped_to_the_cores(monkeypatch):
+    monkeypatch.setattr("pipelines.ocr_pool.available_cores", lambda: 4)
+    monkeypatch.setenv("OCR_MAX_WORKERS", "3")
+    assert resolve_max_workers() == 3
+    assert resolve_max_workers(16) == 4
+    assert resolve_max_workers(0) == 1
+
+
+@pytest.mark.parametrize("engine_name", [TesseractCliEngine.name, TesseractBatchEngine.name])
+def test_pool_returns_texts_in_input_order(stub_tesseract, engine_name):
+    images = [page(ink) for ink in range(1, 12)]
+    engine = ParallelOcrEngine(engine_name, max_workers=2)
+    engine.max_workers = 2  # even on a single core
+    try:
+        assert engine.recognize_many(images) == [f"ink {ink}" for ink in range(1, 12)]
+        timed = engine.recognize_many_timed(images[:3])
+        assert [text for text, _, _ in timed] == ["ink 1", "ink 2", "ink 3"]
+        assert sorted(i for i, _ in engine.iter_recognize_timed(images[:3])) == [0, 1, 2]
+    finally:
+        engine.close()
+
+
+def test_ocr_regions(stub_tesseract):
+    engine = TesseractBatchEngine()
+    assert pipeline.ocr_regions(frame_with([3, 5]), regions_of(2), engine) == ["ink 3", "ink 5"]
+
+
+def test_region_tesseract_fails_on_reads_as_empty(stub_tesseract):
+    # The blank band fails the whole batch; only that region is lost
+    image, regions = frame_with([3, None, 5]), regions_of(3)
+    engine = TesseractBatchEngine()
+    with pytest.raises(RuntimeError):
+        engine.recognize_many([image[:, :20], image[:, 20:40]])
+
+    assert pipeline.ocr_regions(image, regions, engine) == ["ink 3", "", "ink 5"]
+
+    inst = Instrumentation()
+    assert pipeline.ocr_regions(image, regions, engine, inst) == ["ink 3", "", "ink 5"]
+    assert [s["bbox"][0] for s in inst.segments] == [0, 20, 40]
+    assert pipeline.ocr_region(image, regions[1], engine) == ""
+
+
+def test_frame_pass_failure_falls_back_to_regions(stub_tesseract, monkeypatch):
+    monkeypatch.setenv("OCR_MODE", "frame")
+    engine = TesseractCliEngine()
+    # Only blank boxes: the masked frame is blank, so the frame pass fails
+    image = np.full((20, 60), 255, dtype=np.uint8)
+    image[:, 40:] = 0
+    assert pipeline.ocr_regions(image, regions_of(2), engine) == ["", ""]
+    assert pipeline.ocr_regions(image, regions_of(3), engine) == ["", "", "w40_0"]
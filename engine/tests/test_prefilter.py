@@ -0,0 +1,66 @@
+import cv2
+import numpy as np
+import pytest
+
+from pipeline import prefilter_regions
+from pipelines.prefilter import (
+    _ramp,
+    default_threshold,
+    split_boxes,
+    text_features,
+    text_score,
+    text_scores,
+)
+
+
+def frame():
+    """Text, a flat panel, a gradient, noise and a soft photo side by side (BGR)"""
+    gray = np.full((60, 1500), 255, dtype=np.uint8)
+    cv2.putText(gray[:, :300], "Hello world 123", (5, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, 0, 2)
+    gray[:, 300:600] = 200
+    gray[:, 600:900] = np.linspace(0, 255, 300).astype(np.uint8)
+    noise = np.random.default_rng(0).integers(0, 255, (60, 300), dtype=np.uint8)
+    gray[:, 900:1200] = noise
+    gray[:, 1200:] = cv2.GaussianBlur(noise, (7, 7), 0)
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+
+
+BOXES = [(x, 0, x + 300, 60) for x in range(0, 1500, 300)]
+
+
+def test_ramp():
+    assert [_ramp(v, 0.001, 0.005) for v in (0.0, 0.003, 0.01)] == pytest.approx([0, 0.5, 1])
+    assert [_ramp(v, 0.7, 0.5) for v in (0.9, 0.6, 0.1)] == pytest.approx([0, 0.5, 1])
+
+
+def test_only_the_text_segment_scores():
+    scores = text_scores(frame(), BOXES)
+    assert scores[0] == 1.0
+    assert scores[1:].tolist() == [0.0] * 4
+
+
+def test_score_shortcut_matches_the_features():
+    gray = cv2.cvtColor(frame(), cv2.COLOR_BGR2GRAY)
+    for x1, y1, x2, y2 in BOXES + [(150, 0, 450, 60), (1000, 10, 1400, 50)]:
+        crop = gray[y1:y2, x1:x2]
+        assert text_score(crop) == text_features(crop).score
+    assert text_features(gray[:, 300:600]).stroke_cv == float("inf")
+
+
+def test_split_boxes_keeps_order(monkeypatch):
+    image = frame()
+    boxes = [BOXES[3], BOXES[0], BOXES[1], (20, 5, 200, 55)]
+    assert split_boxes(image, boxes, 0.5) == ([BOXES[0], (20, 5, 200, 55)], [BOXES[3], BOXES[1]])
+    assert split_boxes(image, boxes, 0) == (boxes, [])
+    assert split_boxes(image, [], 0.5) == ([], [])
+
+    monkeypatch.setenv("OCR_TEXT_THRESHOLD", "0")
+    assert default_threshold() == 0.0 and split_boxes(image, boxes) == (boxes, [])
+    monkeypatch.delenv("OCR_TEXT_THRESHOLD")
+    assert default_threshold() == 0.5
+
+
+def test_prefilter_regions():
+    regions = [{"x": x1, "y": y1, "w": x2 - x1, "h": y2 - y1} for x1, y1, x2, y2 in BOXES]
+    assert prefilter_regions(frame(), regions, 0.5) == (regions[:1], 4)
+    assert prefilter_regions(frame(), regions, 0) == (regions, 0)
@@ -0,0 +1,74 @@
+import cv2
+import numpy as np
+import pytest
+
+from pipelines.frame import Frame
+from pipelines.preprocessing import binarize, speckle_map, threshold
+from vision_pipeline import ScreenshotSegmentationPipeline
+
+
+@pytest.fixture(scope="module")
+def gray(screenshot):
+    return cv2.cvtColor(screenshot(640, 384, seed=3), cv2.COLOR_BGR2GRAY)
+
+
+def add_speckle(gray, y, x, size=128, seed=0):
+    noisy = gray.copy()
+    rng = np.random.default_rng(seed)
+    patch = noisy[y:y + size, x:x + size]
+    patch[rng.random(patch.shape) < 0.05] = 0
+    return noisy
+
+
+def test_fast_and_quality_profiles(gray):
+    binary = threshold(gray)
+    assert np.array_equal(binarize(gray, "fast")[0], binary)
+    out, report = binarize(gray, "quality")
+    assert np.array_equal(out, cv2.fastNlMeansDenoising(binary))
+    assert report == {"profile": "quality"}
+    with pytest.raises(ValueError, match="Unknown preprocessing profile"):
+        binarize(gray, "best")
+
+
+def test_speckle_map_counts_isolated_pixels_per_tile():
+    binary = np.full((20, 30), 255, dtype=np.uint8)
+    binary[2, 2] = 0                # isolated
+    binary[10, 10:13] = 0           # a stroke: the middle pixel has two neighbours
+    binary[17, 25] = binary[18, 26] = 0  # a diagonal pair: still isolated
+    noise = speckle_map(binary, tile_size=16)
+    assert noise.shape == (2, 2)
+    assert noise[0, 0] == pytest.approx(3 / 256)   # both stroke ends count
+    assert noise[0, 1] == 0
+    assert noise[1, 0] == 0
+    assert noise[1, 1] == pytest.approx(2 / (4 * 14))
+
+
+def test_adaptive_leaves_clean_frames_alone(gray):
+    out, report = binarize(gray, "adaptive")
+    assert report["denoised_tiles"] == 0 and report["tiles"] == 3 * 5
+    assert np.array_equal(out, threshold(gray))
+
+
+def test_adaptive_denoised_tiles_match_the_quality_profile(gray):
+    noisy = add_speckle(gray, 128, 256)
+    out, report = binarize(noisy, "adaptive")
+    assert report["denoised_tiles"] == 1
+
+    quality, _ = binarize(noisy, "quality")
+    fast, _ = binarize(noisy, "fast")
+    assert np.array_equal(out[128:256, 256:384], quality[128:256, 256:384])
+    out[128:256, 256:384] = fast[128:256, 256:384]
+    assert np.array_equal(out, fast)  # clean tiles are left thresholded only
+
+
+def test_pipeline_counts_adaptive_tiles(gray, monkeypatch):
+    monkeypatch.delenv("PREPROCESS_PROFILE", raising=False)
+    assert ScreenshotSegmentationPipeline(ocr_cache=None).preprocess_profile == "quality"
+    monkeypatch.setenv("PREPROCESS_PROFILE", "adaptive")
+    pipeline = ScreenshotSegmentationPipeline(ocr_cache=None)
+    noisy = cv2.cvtColor(add_speckle(gray, 0, 0), cv2.COLOR_GRAY2BGR)
+    pipeline.preprocess_frame(Frame.load(noisy))
+    assert pipeline._preprocess_tiles["tiles"] == 15
+    assert pipeline._preprocess_tiles["denoised_tiles"] >= 1
+    with pytest.raises(ValueError):
+        ScreenshotSegmentationPipeline(ocr_cache=None, preprocess_profile="best")
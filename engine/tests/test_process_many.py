@@ -0,0 +1,54 @@
+import cv2
+import pytest
+
+from vision_pipeline import ScreenshotSegmentationPipeline
+
+
+@pytest.fixture
+def pipeline(stub_tesseract):
+    return ScreenshotSegmentationPipeline(ocr_cache=None, enable_preprocessing=False)
+
+
+@pytest.fixture
+def images(screenshot):
+    return [cv2.cvtColor(screenshot(320, 200, density=0.3, seed=seed), cv2.COLOR_BGR2RGB)
+            for seed in range(6)]
+
+
+def test_ordered_results_match_process(pipeline, images):
+    expected = [pipeline.process(image).full_text for image in images]
+    contexts = list(pipeline.process_many(images, max_workers=3, ordered=True))
+    assert [c.metadata["batch_index"] for c in contexts] == list(range(len(images)))
+    assert [c.full_text for c in contexts] == expected
+
+
+def test_unordered_results_cover_every_input(pipeline, images):
+    contexts = list(pipeline.process_many(images, max_workers=2))
+    assert sorted(c.metadata["batch_index"] for c in contexts) == list(range(len(images)))
+
+
+def test_inputs_are_read_ahead_only_a_few_at_a_time(pipeline, images):
+    pulled = []
+
+    def lazy():
+        for image in images * 5:
+            pulled.append(1)
+            yield image
+
+    results = pipeline.process_many(lazy(), max_workers=2)
+    next(results)
+    assert len(pulled) == 2 * 2  # two per worker
+    results.close()
+
+
+def test_errors_surface_from_the_generator(pipeline, images, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        list(pipeline.process_many([images[0], str(tmp_path / "missing.png")], ordered=True))
+
+
+def test_batch_runs_leave_incremental_state_alone(stub_tesseract, images):
+    pipeline = ScreenshotSegmentationPipeline(ocr_cache=None, enable_preprocessing=False,
+                                              incremental=True)
+    list(pipeline.process_many(images[:2]))
+    assert pipeline._last_context is None
+    assert pipeline.process(images[0]).metadata["incremental"]["identical"] is False
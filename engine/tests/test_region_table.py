@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from pipelines.instrumentation import Instrumentation
+from pipelines.region_table import RegionTable, RegionView
+from vision_pipeline import ScreenshotContext, ScreenshotSegmentationPipeline, TextRegion
+
+REGIONS = [
+    TextRegion("Settings", (10, 5, 80, 20), 95.0, "header"),
+    TextRegion("Save", (200, 400, 40, 18), 88.5, "button"),
+    TextRegion("Cancel", (10, 400, 50, 18), 91.0, "button"),
+]
+
+
+def as_tuples(regions):
+    return [(r.text, r.bbox, r.confidence, r.region_type) for r in regions]
+
+
+@pytest.fixture
+def table():
+    return RegionTable.from_regions(REGIONS)
+
+
+def test_round_trips_text_regions(table):
+    assert len(table) == 3
+    assert as_tuples(table) == as_tuples(REGIONS)
+    assert TextRegion.from_table(table) == REGIONS
+    assert RegionTable.from_regions(table) is table
+    assert len(RegionTable.from_regions([])) == 0
+
+
+def test_views_behave_like_text_regions(table):
+    view = table[-1]
+    assert isinstance(view, RegionView)
+    assert view.center == REGIONS[2].center == (35, 409)
+    view.text = "Close"
+    view.bbox = (0, 0, 1, 1)
+    assert (table.text[2], table.boxes()[2].tolist()) == ("Close", [0, 0, 1, 1])
+    with pytest.raises(IndexError):
+        table[3]
+
+
+def test_slices_masks_and_index_arrays_give_tables(table):
+    assert as_tuples(table[1:]) == as_tuples(REGIONS[1:])
+    assert as_tuples(table[table.of_type("button")]) == as_tuples(REGIONS[1:])
+    assert as_tuples(table.take([2, 0])) == as_tuples([REGIONS[2], REGIONS[0]])
+    assert table.reading_order().tolist() == [0, 2, 1]
+    assert sorted(table.region_types()) == ["button", "header"]
+
+
+def test_concat_shift_and_corners(table):
+    moved = table.shifted(100, 50)
+    both = RegionTable.concat([table, RegionTable.empty(), moved])
+    assert len(both) == 6
+    assert both.corners()[3].tolist() == [110, 55, 190, 75]
+    assert RegionTable.concat([table]) is table
+    assert len(RegionTable.concat([])) == 0
+
+
+def test_merge_matches_per_object_merging():
+    pipeline = ScreenshotSegmentationPipeline(ocr_cache=None, merge_threshold=20)
+    words = RegionTable.from_regions([
+        TextRegion("Quarterly", (10, 10, 60, 12), 90.0, "text"),
+        TextRegion("report", (75, 10, 40, 12), 80.0, "header"),
+        TextRegion("due", (120, 10, 20, 12), 70.0, "text"),
+        TextRegion("Footer", (10, 500, 50, 12), 99.0, "label"),
+    ])
+    merged = pipeline.merge_nearby_regions(words)
+    assert as_tuples(merged) == [
+        ("Quarterly report due", (10, 10, 130, 12), 80.0, "text"),
+        ("Footer", (10, 500, 50, 12), 99.0, "label"),
+    ]
+
+
+# ScreenshotContext.text_regions is part of the public output: it stays a list
+# of TextRegion, with the table alongside as region_table
+
+def test_context_text_regions_stay_a_list_of_text_regions(table):
+    context = ScreenshotContext(list(REGIONS), "", "", "", {})
+    assert isinstance(context.text_regions, list)
+    assert all(isinstance(r, TextRegion) for r in context.text_regions)
+    assert context.text_regions[:2] == REGIONS[:2]
+    assert context == ScreenshotContext(list(REGIONS), "", "", "", {}, region_table=table)
+
+    context.text_regions.append(TextRegion("New", (0, 0, 1, 1), 50.0, "text"))
+    del context.text_regions[0]
+    assert [r.text for r in context.text_regions] == ["Save", "Cancel", "New"]
+    assert as_tuples(context.region_table) == as_tuples(REGIONS)
+
+
+def test_pipeline_context_has_both_forms(table):
+    pipeline = ScreenshotSegmentationPipeline(ocr_cache=None)
+    context = pipeline._build_context(table, (640, 480), Instrumentation(), None)
+    assert all(type(r) is TextRegion for r in context.text_regions)
+    assert as_tuples(context.text_regions) == as_tuples(context.region_table)
+    assert isinstance(context.region_table, RegionTable)
+    assert context.full_text == "\n".join(
+        np.asarray([r.text for r in context.text_regions])[context.region_table.reading_order()])
@@ -0,0 +1,159 @@
+import os
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from pipelines import screenshot_pipeline
+from pipelines.incremental import FrameChange
+from pipelines.scheduler import BACKOFF, AdaptiveInterval, ContinuousCapture
+from pipelines.worker import read_frame, write_frame
+
+
+def test_interval_follows_the_amount_of_change():
+    policy = AdaptiveInterval(0.1, 1.0)
+    assert policy.interval == 0.1
+    assert policy.update(FrameChange(True), 0.01) == pytest.approx(0.1 * BACKOFF)
+    assert policy.update(FrameChange(False, dirty_fraction=0.0001), 0.01) == pytest.approx(0.1 * BACKOFF ** 2)
+    for _ in range(5):
+        policy.update(FrameChange(True), 0.01)
+    assert policy.interval == 1.0
+    assert policy.update(FrameChange(False, dirty_fraction=0.001), 0.01) == pytest.approx(0.5)
+    assert policy.update(None, 0.01) == 0.1
+    # Never faster than the pipeline itself
+    assert policy.update(None, 0.3) == 0.3
+    with pytest.raises(ValueError):
+        AdaptiveInterval(0.5, 0.1)
+
+
+def frame(value):
+    return np.full((32, 32, 3), value, dtype=np.uint8)
+
+
+class Recorder:
+    def __init__(self, **kwargs):
+        self.processed = []
+        self.decoded = []
+        self.outcomes = []
+        self.capture = ContinuousCapture(self.process, self.outcomes.append, self.decode, **kwargs)
+
+    def process(self, image):
+        if image[0, 0, 0] == 99:
+            raise ValueError("bad frame")
+        self.processed.append(int(image[0, 0, 0]))
+        return f"result {image[0, 0, 0]}"
+
+    def decode(self, item):
+        self.decoded.append(item)
+        return frame(item)
+
+    def wait_for(self, count):
+        deadline = time.monotonic() + 10
+        while len(self.outcomes) < count:
+            assert time.monotonic() < deadline
+            time.sleep(0.001)
+
+    def drain(self, *items):
+        for item in items:
+            self.capture.submit(item)
+        self.capture.close()
+        self.capture.run()
+        return [(o.item, o.status) for o in self.outcomes]
+
+
+def test_a_full_backlog_drops_the_oldest_frame():
+    recorder = Recorder()
+    assert recorder.drain(1, 2, 3) == [(1, "dropped"), (2, "dropped"), (3, "processed")]
+    assert recorder.decoded == [3]  # dropped frames are never decoded
+    assert recorder.outcomes[-1].result == "result 3"
+
+
+def test_waiting_frames_are_coalesced_into_the_newest():
+    recorder = Recorder(max_pending=3)
+    assert recorder.drain(1, 2, 3) == [(1, "coalesced"), (2, "coalesced"), (3, "processed")]
+    stats = recorder.capture.stats()
+    assert stats["submitted"] == 3 and stats["coalesced"] == 2 and stats["processed"] == 1
+    assert stats["pending"] == 0 and stats["latency_ms"]["max"] is not None
+
+
+def test_identical_frames_reuse_the_last_result_and_errors_are_reported():
+    recorder = Recorder(policy=AdaptiveInterval(0.001, 0.001))
+    recorder.capture.start()
+    for count, item in enumerate((5, 5, 99, 6), 1):
+        recorder.capture.submit(item)
+        recorder.wait_for(count)
+    recorder.capture.close()
+
+    assert [(o.item, o.status) for o in recorder.outcomes] == [
+        (5, "processed"), (5, "identical"), (99, "error"), (6, "processed")]
+    assert recorder.outcomes[1].result == "result 5"
+    assert recorder.outcomes[2].error == "ValueError: bad frame"
+    assert recorder.processed == [5, 6]
+    with pytest.raises(RuntimeError, match="closed"):
+        recorder.capture.submit(7)
+
+
+def test_frames_wait_for_the_interval():
+    recorder = Recorder(policy=AdaptiveInterval(0.3, 0.3))
+    recorder.capture.start()
+    recorder.capture.submit(1)
+    recorder.wait_for(1)
+    started = time.monotonic()
+    recorder.capture.submit(2)
+    recorder.capture.close()
+    assert time.monotonic() - started < 0.3  # close() does not wait for the interval...
+    assert recorder.processed == [1, 2]  # ...but the last frame is still handled
+
+    recorder = Recorder(policy=AdaptiveInterval(0.3, 0.3))
+    recorder.capture.start()
+    recorder.capture.submit(1)
+    recorder.wait_for(1)
+    recorder.capture.submit(2)
+    time.sleep(0.1)
+    assert recorder.processed == [1]
+    recorder.wait_for(2)
+    recorder.capture.close()
+    assert recorder.outcomes[1].latency_ms >= 100
+
+
+def test_continuous_mode_answers_every_frame(stub_tesseract):
+    env = dict(os.environ, OCR_ENGINE="batch", OCR_MAX_WORKERS="1")
+    env.pop("OCR_HISTORY_PATH", None)
+    proc = subprocess.Popen([sys.executable, screenshot_pipeline.__file__, "--continuous",
+                             "--min-interval", "0.05", "--max-interval", "0.05"],
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env)
+    image = np.full((200, 300, 3), 255, dtype=np.uint8)
+    image[50:80:6, 20:200:3] = 0
+    png = cv2.imencode(".png", image)[1].tobytes()
+    for i in range(1, 21):
+        write_frame(proc.stdin, {"id": i}, png)
+    proc.stdin.flush()
+
+    replies = [read_frame(proc.stdout)[0] for _ in range(20)]
+    write_frame(proc.stdin, {"id": "s", "op": "stats"})
+    proc.stdin.flush()
+    stats, _ = read_frame(proc.stdout)
+    proc.stdin.close()
+    proc.wait(timeout=30)
+
+    assert sorted(reply["id"] for reply in replies) == list(range(1, 21))
+    statuses = [reply["status"] for reply in replies]
+    assert statuses.count("processed") == 1 and "error" not in statuses
+    assert set(statuses) <= {"processed", "identical", "coalesced", "dropped"}
+    processed = next(r for r in replies if r["status"] == "processed")
+    assert processed["result"] and all(text.startswith("ink ") for text in processed["result"])
+    assert stats["result"]["scheduler"]["submitted"] == 20
+
+
+@pytest.mark.parametrize("flags, message", [
+    (["--min-interval", "6"], "need 0 < --min-interval <= --max-interval"),
+    (["--max-interval", "0.01"], "need 0 < --min-interval <= --max-interval"),
+    (["--max-pending", "0"], "--max-pending must be at least 1"),
+])
+def test_continuous_bounds_are_checked_against_the_scheduler_defaults(flags, message):
+    result = subprocess.run([sys.executable, screenshot_pipeline.__file__, "--continuous", *flags],
+                            capture_output=True, text=True)
+    assert result.returncode == 2 and message in result.stderr
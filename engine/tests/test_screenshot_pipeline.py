@@ -0,0 +1,39 @@
+import cv2
+import numpy as np
+
+from pipelines import screenshot_pipeline
+
+
+def test_crops_are_views_of_the_frame(blocks):
+    image = blocks
+    boxes = [(0, 0, 10, 20), (5, 5, 50, 60)]
+    crops = screenshot_pipeline.crop_segments(image, boxes)
+    assert [c.shape[:2] for c in crops] == [(20, 10), (55, 45)]
+    assert all(np.shares_memory(c, image) for c in crops)
+
+
+def test_segments_never_touch_disk_by_default(ocr, blocks, tmp_path):
+    image = blocks
+    texts = screenshot_pipeline.process_image(image)
+    boxes = screenshot_pipeline.sort_boxes_reading_order(
+        screenshot_pipeline.find_segments(screenshot_pipeline.preprocess(image), image))
+    crops = screenshot_pipeline.crop_segments(image, boxes)
+    assert texts == [f"ink {(crop < 128).all(axis=2).sum()}" for crop in crops]
+    assert len(texts) == 4
+    assert not (tmp_path / "src").exists()
+
+
+def test_debug_segments_writes_each_crop(ocr, blocks, tmp_path):
+    segments = tmp_path / "src" / "segments"
+    segments.mkdir(parents=True)
+    (segments / "999.png").write_bytes(b"stale")
+
+    image = blocks
+    screenshot_pipeline.process_image(image, debug_segments=True)
+    written = sorted(p.name for p in segments.iterdir())
+    assert written == ["001.png", "002.png", "003.png", "004.png"]
+
+    boxes = screenshot_pipeline.sort_boxes_reading_order(
+        screenshot_pipeline.find_segments(screenshot_pipeline.preprocess(image), image))
+    x1, y1, x2, y2 = boxes[0]
+    assert np.array_equal(cv2.imread(str(segments / "001.png")), image[y1:y2, x1:x2])
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from bench_segmenter import segment_image_reference
+from pipeline import _runs, segment_image
+
+
+def runs_reference(active, min_length):
+    runs, start = [], None
+    for i, value in enumerate(active):
+        if value and start is None:
+            start = i
+        elif not value and start is not None:
+            if i - start > min_length:
+                runs.append((start, i))
+            start = None
+    if start is not None:
+        runs.append((start, len(active)))
+    return runs
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_runs_match_the_loop(seed):
+    rng = np.random.default_rng(seed)
+    active = rng.random(rng.integers(1, 300)) < rng.uniform(0.2, 0.95)
+    min_length = int(rng.integers(0, 15))
+    starts, ends = _runs(active, min_length)
+    assert list(zip(starts.tolist(), ends.tolist())) == runs_reference(active, min_length)
+
+
+def test_runs_edge_cases():
+    assert _runs(np.zeros(5, dtype=bool), 0)[0].tolist() == []
+    assert [a.tolist() for a in _runs(np.ones(3, dtype=bool), 12)] == [[0], [3]]
+
+
+@pytest.mark.parametrize("size, density, seed", [
+    ((1920, 1080), 0.5, 0),
+    ((1920, 1080), 0.9, 1),
+    ((2560, 1440), 0.3, 2),
+    ((1280, 720), 0.7, 3),
+    ((1111, 777), 0.5, 4),
+])
+def test_segmenter_matches_the_reference(screenshot, size, density, seed):
+    image = screenshot(*size, density=density, seed=seed)
+    assert segment_image(image, tiled="never") == segment_image_reference(image)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_segmenter_matches_the_reference_on_random_blocks(seed):
+    rng = np.random.default_rng(seed)
+    image = np.full((400, 640, 3), 255, dtype=np.uint8)
+    for _ in range(40):
+        x, y = rng.integers(0, 600), rng.integers(0, 380)
+        image[y:y + rng.integers(2, 30), x:x + rng.integers(2, 120)] = rng.integers(0, 90)
+    assert segment_image(image, tiled="never") == segment_image_reference(image)
@@ -0,0 +1,55 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import cv2
+import pytest
+
+from pipelines import screenshot_pipeline
+from pipelines.incremental import IncrementalOcr
+
+SCREENSHOT_PIPELINE = Path(screenshot_pipeline.__file__)
+
+
+def stream(image, **kwargs):
+    records = []
+    summary = screenshot_pipeline.stream_image(image, records.append, **kwargs)
+    return records, summary
+
+
+@pytest.mark.parametrize("mode", ["crops", "frame"])
+def test_streamed_segments_add_up_to_the_summary(ocr, blocks, monkeypatch, mode):
+    monkeypatch.setenv("OCR_MODE", mode)
+    image = blocks
+    records, summary = stream(image)
+
+    assert summary["type"] == "summary" and len(records) == 4
+    assert summary["texts"] == screenshot_pipeline.process_image(image)
+    assert [r["text"] for r in sorted(records, key=lambda r: r["index"])] == summary["texts"]
+    assert summary["segments"] == len(records) + summary["empty"]
+    for record in records:
+        assert record["type"] == "segment" and record["reused"] is False
+        x, y, w, h = record["bbox"]
+        assert w > 0 and h > 0 and record["text"].strip()
+
+
+def test_unchanged_segments_stream_as_reused(ocr, blocks):
+    image = blocks
+    incremental = IncrementalOcr()
+    first, _ = stream(image, incremental=incremental)
+    again, summary = stream(image, incremental=incremental)
+    assert summary["reused"] == len(first) and all(r["reused"] for r in again)
+    assert [r["text"] for r in again] == [r["text"] for r in first]
+
+
+def test_stream_flag_prints_ndjson(ocr, blocks, tmp_path):
+    path = tmp_path / "shot.png"
+    cv2.imwrite(str(path), blocks)
+    out = subprocess.run([sys.executable, str(SCREENSHOT_PIPELINE), str(path), "--stream"],
+                         capture_output=True, check=True, text=True, env=dict(os.environ)).stdout
+    *segments, summary = [json.loads(line) for line in out.splitlines()]
+    assert summary["type"] == "summary" and len(segments) == 4
+    assert {r["type"] for r in segments} == {"segment"}
+    assert sorted(r["text"] for r in segments) == sorted(summary["texts"])
@@ -0,0 +1,98 @@
+import cv2
+import numpy as np
+import pytest
+
+import pipeline
+import vision_pipeline
+from pipelines import screenshot_pipeline
+from pipelines.frame import Frame
+from pipelines.region_table import RegionTable
+from pipelines.tiling import drop_seam_fragments, owned, should_tile, stitch, tile_grid
+
+
+@pytest.mark.parametrize("width, height, tile_size", [(1920, 1080, 512), (1000, 700, 1024), (777, 333, 100)])
+def test_cores_partition_the_frame(width, height, tile_size):
+    tiles = tile_grid(width, height, tile_size, overlap=16)
+    cover = np.zeros((height, width), dtype=np.int32)
+    for tile in tiles:
+        x1, y1, x2, y2 = tile.core
+        assert x2 - x1 <= tile_size and y2 - y1 <= tile_size
+        cover[y1:y2, x1:x2] += 1
+        ox1, oy1, ox2, oy2 = tile.outer
+        assert (0, 0) <= (ox1, oy1) and (ox2, oy2) <= (width, height)
+        assert ox1 == max(x1 - 16, 0) and ox2 == min(x2 + 16, width)
+    assert (cover == 1).all()
+
+
+def test_stitch_puts_each_core_back():
+    image = np.random.default_rng(0).integers(0, 255, (300, 500), dtype=np.uint8)
+    tiles = tile_grid(500, 300, 128, overlap=10)
+    assert np.array_equal(stitch([tile.crop(image) for tile in tiles], tiles, 500, 300), image)
+
+
+def test_every_box_is_owned_by_one_tile():
+    rng = np.random.default_rng(1)
+    boxes = np.column_stack([rng.integers(0, 900, 200), rng.integers(0, 500, 200),
+                             rng.integers(1, 100, 200), rng.integers(1, 40, 200)])
+    owners = np.sum([owned(boxes, tile) for tile in tile_grid(1000, 540, 256)], axis=0)
+    assert (owners == 1).all()
+
+
+def test_seam_fragments_give_way_to_the_whole_word():
+    boxes = [(90, 10, 60, 20),   # whole word, tile 0
+             (100, 10, 50, 20),  # the part the next tile saw
+             (300, 10, 40, 20),  # elsewhere, tile 1
+             (92, 12, 6, 10)]    # small, but only covered from its own tile
+    assert drop_seam_fragments(boxes, [0, 1, 1, 0]).tolist() == [True, False, True, True]
+    assert drop_seam_fragments(np.empty((0, 4)), []).tolist() == []
+
+
+def test_should_tile():
+    assert should_tile(10, 10, "always") and not should_tile(8000, 8000, "never")
+    assert not should_tile(1920, 1080, "auto")
+    with pytest.raises(ValueError):
+        should_tile(10, 10, "sometimes")
+
+
+@pytest.mark.parametrize("size", [(1920, 1080), (1111, 777)])
+def test_tiled_mask_matches_full_frame(screenshot, size):
+    image = screenshot(*size, seed=3)
+    full = screenshot_pipeline.preprocess(image)
+    tiled = screenshot_pipeline.preprocess_tiled(image, tile_size=400, max_workers=2)
+    assert np.array_equal(tiled, full)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_tiled_otsu_binarization_matches_full_frame(screenshot, seed):
+    image = screenshot(1920, 1080, density=0.3 + 0.3 * seed, seed=seed)
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    _, full = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    assert np.array_equal(pipeline._binarize_tiled(image, tile_size=300), full)
+    assert pipeline.segment_image(image, "always") == pipeline.segment_image(image, "never")
+
+
+def test_otsu_threshold_matches_opencv():
+    rng = np.random.default_rng(2)
+    for _ in range(20):
+        gray = rng.normal(rng.uniform(40, 200), rng.uniform(5, 60), (64, 64)).clip(0, 255).astype(np.uint8)
+        hist = cv2.calcHist([gray], [0], None, [256], [0, 256]).ravel()
+        t, _ = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        assert pipeline._otsu_threshold(hist) == int(t)
+
+
+def test_tiles_are_views_sharing_the_frames_planes(screenshot, monkeypatch):
+    frame = Frame(cv2.cvtColor(screenshot(900, 600), cv2.COLOR_BGR2RGB))
+    gray = frame.gray
+    seen = []
+
+    def binarize(plane, profile):
+        seen.append(plane)
+        return plane, {}
+
+    monkeypatch.setattr(vision_pipeline, "binarize", binarize)
+    vp = vision_pipeline.ScreenshotSegmentationPipeline(ocr_cache=None, tiled="always", tile_size=256)
+    monkeypatch.setattr(vp, "extract_text_regions", lambda image: RegionTable.empty())
+
+    assert len(vp._extract_tiled(frame)) == 0
+    assert len(seen) == len(tile_grid(900, 600, 256))
+    assert all(np.shares_memory(plane, gray) for plane in seen)
@@ -0,0 +1,132 @@
+import io
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import cv2
+import pytest
+
+from pipelines.worker import (
+    HEADER_SIZE,
+    ProtocolError,
+    handle_frame,
+    read_frame,
+    serve_stream,
+    write_frame,
+)
+
+SCREENSHOT_PIPELINE = Path(__file__).resolve().parent.parent / "src" / "pipelines" / "screenshot_pipeline.py"
+
+
+def frames(*items):
+    stream = io.BytesIO()
+    for header, payload in items:
+        write_frame(stream, header, payload)
+    stream.seek(0)
+    return stream
+
+
+def read_all(stream):
+    stream.seek(0)
+    out = []
+    while (frame := read_frame(stream)) is not None:
+        out.append(frame)
+    return out
+
+
+def test_frames_round_trip():
+    stream = frames(({"id": 1}, b""), ({"id": 2, "op": "x"}, b"\x00payload\xff"))
+    assert read_frame(stream) == ({"id": 1}, b"")
+    assert read_frame(stream) == ({"id": 2, "op": "x", "payload_size": 9}, b"\x00payload\xff")
+    assert read_frame(stream) is None
+
+
+@pytest.mark.parametrize("raw, message", [
+    (HEADER_SIZE.pack(10) + b"{}", "outstanding"),
+    (HEADER_SIZE.pack(1 << 30), "exceeds limit"),
+    (HEADER_SIZE.pack(2) + b"[]", "JSON object"),
+    (HEADER_SIZE.pack(19) + b'{"payload_size": 9}' + b"abc", "outstanding"),
+])
+def test_malformed_frames_are_rejected(raw, message):
+    with pytest.raises(ProtocolError, match=message):
+        read_frame(io.BytesIO(raw))
+
+
+def test_handler_errors_become_replies():
+    def handler(header, payload, emit):
+        raise KeyError("image_path")
+
+    reply = handle_frame(handler, {"id": 7}, b"")
+    assert reply == {"id": 7, "ok": False, "error": "KeyError: 'image_path'"}
+
+
+def test_serve_stream_answers_every_job_in_order():
+    def handler(header, payload, emit):
+        emit({"seen": len(payload)})
+        return payload.decode().upper()
+
+    reader = frames(({"id": 1, "op": "ping"}, b""), ({"id": 2}, b"abc"),
+                    ({"id": 3, "op": "shutdown"}, b""), ({"id": 4}, b"never read"))
+    writer = io.BytesIO()
+    assert serve_stream(handler, reader, writer) is True
+
+    replies = [header for header, _ in read_all(writer)]
+    assert replies[0] == {"id": 1, "ok": True, "result": "pong"}
+    assert replies[1] == {"id": 2, "ok": True, "partial": {"seen": 3}}
+    assert replies[2]["result"] == "ABC" and replies[2]["id"] == 2
+    assert replies[3] == {"id": 3, "ok": True, "result": None}
+    assert len(replies) == 4
+
+
+def test_garbage_gets_a_protocol_error_and_ends_the_stream():
+    writer = io.BytesIO()
+    assert serve_stream(lambda *_: None, io.BytesIO(HEADER_SIZE.pack(3) + b"{x}"), writer) is False
+    (reply, _), = read_all(writer)
+    assert reply["ok"] is False and reply["error"].startswith("ProtocolError")
+
+
+@pytest.fixture
+def worker(stub_tesseract, tmp_path):
+    env = dict(os.environ, OCR_ENGINE="batch", OCR_MAX_WORKERS="1", OCR_CACHE="0")
+    env.pop("OCR_HISTORY_PATH", None)
+    proc = subprocess.Popen([sys.executable, str(SCREENSHOT_PIPELINE), "--worker"],
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, cwd=tmp_path, env=env)
+
+    def request(header, payload=b""):
+        write_frame(proc.stdin, header, payload)
+        records = []
+        while True:
+            reply, _ = read_frame(proc.stdout)
+            records.append(reply)
+            if "partial" not in reply:
+                return records
+
+    yield request
+    proc.stdin.close()
+    proc.wait(timeout=30)
+
+
+def test_worker_round_trip_with_stub_tesseract(worker, screenshot, tmp_path):
+    image = screenshot(640, 360, seed=1)
+    ok, png = cv2.imencode(".png", image)
+    path = tmp_path / "shot.png"
+    cv2.imwrite(str(path), image)
+
+    assert worker({"id": 1, "op": "ping"}) == [{"id": 1, "ok": True, "result": "pong"}]
+
+    by_payload, = worker({"id": 2}, png.tobytes())
+    by_path, = worker({"id": 3, "image_path": str(path)})
+    assert by_payload["ok"] and by_payload["id"] == 2
+    texts = by_payload["result"]
+    assert texts and all(text.startswith("ink ") for text in texts)
+    assert by_path["result"] == texts
+
+    *partials, summary = worker({"id": 4, "image_path": str(path), "stream": True})
+    assert [p["partial"]["text"] for p in partials] == texts
+    assert summary["result"]["texts"] == texts
+
+    failed, = worker({"id": 5, "image_path": str(tmp_path / "missing.png")})
+    assert failed["ok"] is False and failed["id"] == 5
+    assert worker({"id": 6, "op": "shutdown"}) == [{"id": 6, "ok": True, "result": None}]
+
@@ -0,0 +1,103 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+import cv2
+import pytest
+
+from pipelines import screenshot_pipeline
+from pipelines.lazy import LazyModule, lazy_import
+
+SCRIPT = screenshot_pipeline.__file__
+
+
+def test_lazy_import(tmp_path, monkeypatch):
+    assert lazy_import("json") is json
+    (tmp_path / "lazy_probe.py").write_text("VALUE = 42\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    probe = lazy_import("lazy_probe")
+    assert isinstance(probe, LazyModule) and "not loaded" in repr(probe)
+    assert "lazy_probe" not in sys.modules
+    assert probe.VALUE == 42
+    assert "lazy_probe" in sys.modules and "(loaded)" in repr(probe)
+    monkeypatch.delitem(sys.modules, "lazy_probe")
+
+
+def run(*args, env, check=True):
+    return subprocess.run([sys.executable, SCRIPT, *args], capture_output=True, text=True,
+                          env=env, check=check)
+
+
+@pytest.fixture
+def env(ocr):
+    return dict(os.environ)
+
+
+@pytest.fixture
+def image_path(blocks, tmp_path):
+    path = tmp_path / "shot.png"
+    cv2.imwrite(str(path), blocks)
+    return str(path)
+
+
+@pytest.fixture
+def zygote(env, tmp_path):
+    socket_path = str(tmp_path / "z.sock")
+    proc = subprocess.Popen([sys.executable, SCRIPT, "--zygote", socket_path], env=env)
+    deadline = time.monotonic() + 30
+    while not os.path.exists(socket_path):
+        assert proc.poll() is None and time.monotonic() < deadline
+        time.sleep(0.05)
+    yield socket_path
+    proc.terminate()
+    proc.wait(timeout=30)
+
+
+def test_connect_matches_a_local_run(env, zygote, image_path):
+    local = json.loads(run(image_path, env=env).stdout)
+    assert len(local) == 4
+    assert json.loads(run("--connect", zygote, image_path, env=env).stdout) == local
+    tiled = run("--connect", zygote, image_path, "--tiled", "always", env=env).stdout
+    assert json.loads(tiled) == local
+
+    *segments, summary = map(json.loads, run("--connect", zygote, image_path, "--stream",
+                                              env=env).stdout.splitlines())
+    assert len(segments) == 4 and sorted(summary["texts"]) == sorted(local)
+
+
+def test_connect_does_not_import_the_processing_stack(env, zygote, image_path):
+    probe = ("import runpy, sys\n"
+             f"sys.argv = [{SCRIPT!r}, '--connect', {zygote!r}, {image_path!r}]\n"
+             f"runpy.run_path({SCRIPT!r}, run_name='__main__')\n"
+             "sys.stderr.write(repr(sorted({'cv2', 'numpy'} & set(sys.modules))))\n")
+    result = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True,
+                            env=env, check=True)
+    assert len(json.loads(result.stdout)) == 4
+    assert result.stderr == "[]"
+
+
+def test_importing_the_llm_context_pipeline_is_cheap():
+    src = os.path.dirname(os.path.dirname(SCRIPT))
+    probe = (f"import sys; sys.path.insert(0, {src!r}); import pipeline\n"
+             "sys.stdout.write(repr(sorted({'cv2', 'numpy', 'PIL'} & set(sys.modules))))\n")
+    result = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True,
+                            check=True)
+    assert result.stdout == "[]"
+
+
+def test_connect_runs_locally_without_a_zygote(env, image_path, tmp_path):
+    result = run("--connect", str(tmp_path / "none.sock"), image_path, env=env)
+    assert json.loads(result.stdout) == json.loads(run(image_path, env=env).stdout)
+
+
+@pytest.mark.parametrize("flags", [
+    ["--connect", "z.sock", "--max-workers", "2"],
+    ["--connect", "z.sock", "--no-cache", "--ocr-mode", "frame"],
+    ["--zygote", "z.sock", "--incremental"],
+])
+def test_flags_that_would_be_ignored_are_rejected(env, flags):
+    result = run(*flags, env=env, check=False)
+    assert result.returncode == 2 and "cannot be used with" in result.stderr